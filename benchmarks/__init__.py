@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for the import and lookup hot paths. Run a module with `python -m benchmarks.<name>`.
+"""
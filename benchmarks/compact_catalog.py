@@ -0,0 +1,64 @@
+"""
+Compares the memory taken by the catalog as ORM instances and as a `CompactCatalog`, per 10,000
+printings.
+
+    python -m benchmarks.compact_catalog [--cards 10000]
+"""
+import argparse
+import gc
+import pickle
+import tracemalloc
+
+from benchmarks.utils import best_time, setup_django
+from tests.utils.catalog import make_catalog
+
+
+def measure(func):
+    """
+    Returns the result of `func` and the bytes still allocated for it once it returns.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def load_instances():
+    from fab_cards.models import Card, Printing, Set
+    return list(Set.objects.all()), list(Card.objects.all()), list(Printing.objects.all())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cards', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from fab_cards.models import Printing
+    from fab_cards.utils.compact import CompactCatalog
+    from fab_cards.utils.import_cards import parse_data
+
+    parse_data(make_catalog(args.cards), bulk=True)
+    printings = Printing.objects.count()
+    per_10k = 10000.0 / printings
+
+    _, orm_bytes = measure(load_instances)
+    catalog, compact_bytes = measure(CompactCatalog.from_db)
+    _, loaded_bytes = measure(lambda: pickle.loads(pickle.dumps(catalog, protocol=pickle.HIGHEST_PROTOCOL)))
+    pickled = len(pickle.dumps(catalog, protocol=pickle.HIGHEST_PROTOCOL))
+
+    print('{} printings'.format(printings))
+    print('{:>24}  {:>12}  {:>10}'.format('', 'MB/10k', 'build s'))
+    print('{:>24}  {:>12.2f}  {:>10.3f}'.format('ORM instances', orm_bytes * per_10k / 2 ** 20,
+                                                best_time(load_instances, 3)))
+    print('{:>24}  {:>12.2f}  {:>10.3f}'.format('CompactCatalog', compact_bytes * per_10k / 2 ** 20,
+                                                best_time(CompactCatalog.from_db, 3)))
+    print('{:>24}  {:>12.2f}'.format('CompactCatalog unpickled', loaded_bytes * per_10k / 2 ** 20))
+    print('{:>24}  {:>12.2f}'.format('pickle size', pickled * per_10k / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""
+Times `normalize_catalog` on synthetic catalogs of increasing size. Per-record cost should stay flat
+as the catalog grows.
+
+    python -m benchmarks.normalize [--sizes 25000 50000 100000] [--repeat 3]
+"""
+import argparse
+
+from benchmarks.utils import best_time
+from fab_cards.utils.normalize import normalize_catalog
+from tests.utils.catalog import make_catalog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[25000, 50000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print('{:>8}  {:>10}  {:>12}'.format('cards', 'seconds', 'us/card'))
+    for size in args.sizes:
+        cards = make_catalog(size)
+        seconds = best_time(lambda: normalize_catalog(cards), args.repeat)
+        print('{:>8}  {:>10.3f}  {:>12.2f}'.format(size, seconds, seconds / size * 1e6))
+
+
+if __name__ == '__main__':
+    main()
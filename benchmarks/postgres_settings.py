@@ -0,0 +1,18 @@
+"""
+Settings for running the benchmarks against a local PostgreSQL database, which must exist and will
+be written to. Connection details come from the usual `PG*` environment variables.
+"""
+import os
+
+from tests.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("PGDATABASE", "fab_cards_bench"),
+        "USER": os.environ.get("PGUSER", ""),
+        "PASSWORD": os.environ.get("PGPASSWORD", ""),
+        "HOST": os.environ.get("PGHOST", "localhost"),
+        "PORT": os.environ.get("PGPORT", ""),
+    }
+}
@@ -0,0 +1,49 @@
+"""
+Times `PrintingQuerySet.random` against loading every id, as the printings table grows. The sampler's
+latency should stay flat.
+
+    python -m benchmarks.random_printings [--sizes 1000 10000 100000] [--num 15] [--calls 50]
+"""
+import argparse
+import random
+
+from benchmarks.utils import best_time, setup_django
+
+
+def populate(size):
+    from fab_cards.models import Card, Printing, Set
+
+    Printing.objects.all().delete()
+    card, _ = Card.objects.get_or_create(identifier='benchmark-card', defaults={'name': 'Benchmark Card'})
+    card_set, _ = Set.objects.get_or_create(code='BEN', defaults={'name': 'Benchmark Set'})
+    Printing.objects.bulk_create(
+        (Printing(card=card, set=card_set, sku='BEN{}'.format(i)) for i in range(size)), batch_size=5000)
+
+
+def load_all_ids(queryset, num, rng):
+    ids = list(queryset.values_list('id', flat=True))
+    return list(queryset.filter(id__in=rng.sample(ids, num)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--num', type=int, default=15)
+    parser.add_argument('--calls', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from fab_cards.models import Printing
+
+    rng = random.Random(0)
+    print('{:>9}  {:>14}  {:>14}'.format('printings', 'random() ms', 'all ids ms'))
+    for size in args.sizes:
+        populate(size)
+        queryset = Printing.objects.all()
+        sampler = best_time(lambda: [list(queryset.random(args.num, rng=rng)) for _ in range(args.calls)], 3)
+        baseline = best_time(lambda: [load_all_ids(queryset, args.num, rng) for _ in range(args.calls)], 3)
+        print('{:>9}  {:>14.3f}  {:>14.3f}'.format(size, sampler / args.calls * 1e3, baseline / args.calls * 1e3))
+
+
+if __name__ == '__main__':
+    main()
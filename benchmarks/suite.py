@@ -0,0 +1,245 @@
+"""
+Runs every hot-path scenario on synthetic catalogs and compares the results with a saved baseline.
+
+    python -m benchmarks.suite [--sizes 1000 10000 100000] [--scenarios fetch import_cold ...]
+                               [--settings benchmarks.postgres_settings] [--repeat 3]
+                               [--output results.json] [--baseline baseline.json] [--threshold 0.25]
+
+Everything runs offline: catalogs come from `tests.utils.catalog.make_catalog` and are served by the
+stub API server. Results are written as JSON, keyed by `scenario/size`. When given a baseline, the
+suite exits with status 1 if any scenario got slower by more than `threshold` (a fraction).
+Only compare results taken on the same machine and database.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+from collections import OrderedDict
+
+from benchmarks.utils import best_time, setup_django
+from tests.utils.catalog import make_catalog
+
+# Operations timed per run by the scenarios that repeat a cheap call.
+LOOKUPS = 1000
+SAMPLES = 50
+DRAWS = 10000
+PACKS = 2000
+
+# Eleven commons, a rare, super rare or majestic, and a legendary.
+PACK_TEMPLATE = ['C'] * 11 + [{'R': 6, 'S': 3, 'M': 1}, 'L']
+
+
+def clear_catalog():
+    from fab_cards.models import Card, Set
+    Card.objects.all().delete()
+    Set.objects.all().delete()
+
+
+def ensure_catalog(cards):
+    from fab_cards.models import Card
+    from fab_cards.utils.import_cards import parse_data
+    if Card.objects.count() != len(cards):
+        clear_catalog()
+        parse_data(cards, bulk=True)
+
+
+def bench_fetch(cards, repeat):
+    from fab_cards.utils.import_cards import fetch_data
+    from tests.utils.server import StubAPIServer
+    with StubAPIServer(cards) as server:
+        return best_time(lambda: fetch_data(server.url), repeat), 1
+
+
+def bench_import_cold(cards, repeat):
+    from fab_cards.utils.import_cards import parse_data
+    return best_time(lambda: parse_data(cards, bulk=True), repeat, setup=clear_catalog), 1
+
+
+def bench_import_noop(cards, repeat):
+    from fab_cards.utils.import_cards import parse_data
+    ensure_catalog(cards)
+    return best_time(lambda: parse_data(cards, bulk=True), repeat), 1
+
+
+def bench_import_changed_only(cards, repeat):
+    from fab_cards.utils.import_cards import parse_data
+    ensure_catalog(cards)
+    return best_time(lambda: parse_data(cards, bulk=True, changed_only=True), repeat), 1
+
+
+def bench_random(cards, repeat):
+    from fab_cards.models import Printing
+    ensure_catalog(cards)
+    rng = random.Random(0)
+    queryset = Printing.objects.all()
+    return best_time(lambda: [list(queryset.random(15, rng=rng)) for _ in range(SAMPLES)], repeat), SAMPLES
+
+
+def card_weights(cards):
+    return {card['identifier']: 1 + index % 7 for index, card in enumerate(cards)}
+
+
+def bench_weighted_choice(cards, repeat):
+    from fab_cards.utils.random import weighted_choice
+    weights = card_weights(cards)
+    rng = random.Random(0)
+
+    def run():
+        for _ in range(SAMPLES):
+            weighted_choice(weights, rng=rng)
+    return best_time(run, repeat), SAMPLES
+
+
+def bench_weighted_sampler(cards, repeat):
+    from fab_cards.utils.random import WeightedSampler
+    weights = card_weights(cards)
+
+    def run():
+        sampler = WeightedSampler(weights, rng=random.Random(0))
+        for _ in range(DRAWS):
+            sampler.draw()
+    return best_time(run, repeat), DRAWS
+
+
+def bench_packs(cards, repeat):
+    from fab_cards.utils.packs import PackGenerator
+    ensure_catalog(cards)
+    generator = PackGenerator('WTR', PACK_TEMPLATE, rng=random.Random(0))
+    return best_time(lambda: generator.generate_many(PACKS), repeat), PACKS
+
+
+def lookup_identifiers(cards):
+    rng = random.Random(0)
+    return [cards[rng.randrange(len(cards))]['identifier'] for _ in range(LOOKUPS)]
+
+
+def bench_lookup_orm(cards, repeat):
+    from fab_cards.models import Card
+    ensure_catalog(cards)
+    identifiers = lookup_identifiers(cards)
+    seconds = best_time(lambda: [Card.objects.get(identifier=identifier) for identifier in identifiers], repeat)
+    return seconds, LOOKUPS
+
+
+def bench_lookup_cache(cards, repeat):
+    from fab_cards.utils.cache import CatalogCache
+    ensure_catalog(cards)
+    identifiers = lookup_identifiers(cards)
+    cache = CatalogCache(max_size=len(cards))
+    for identifier in identifiers:
+        cache.card(identifier)
+    return best_time(lambda: [cache.card(identifier) for identifier in identifiers], repeat), LOOKUPS
+
+
+def bench_lookup_compact(cards, repeat):
+    from fab_cards.utils.compact import CompactCatalog
+    ensure_catalog(cards)
+    identifiers = lookup_identifiers(cards)
+    catalog = CompactCatalog.from_db()
+    return best_time(lambda: [catalog.card(identifier) for identifier in identifiers], repeat), LOOKUPS
+
+
+def bench_fuzzy(cards, repeat):
+    from fab_cards.utils.fuzzy import TrigramIndex
+    ensure_catalog(cards)
+    index = TrigramIndex.from_db()
+    rng = random.Random(0)
+    names = [cards[rng.randrange(len(cards))]['name'] for _ in range(LOOKUPS // 10)]
+    # Misspell each name by swapping two letters.
+    names = [name[:3] + name[4] + name[3] + name[5:] for name in names]
+    return best_time(lambda: [index.search(name) for name in names], repeat), len(names)
+
+
+SCENARIOS = OrderedDict([
+    ('fetch', bench_fetch),
+    ('import_cold', bench_import_cold),
+    ('import_noop', bench_import_noop),
+    ('import_changed_only', bench_import_changed_only),
+    ('random', bench_random),
+    ('weighted_choice', bench_weighted_choice),
+    ('weighted_sampler', bench_weighted_sampler),
+    ('packs', bench_packs),
+    ('lookup_orm', bench_lookup_orm),
+    ('lookup_cache', bench_lookup_cache),
+    ('lookup_compact', bench_lookup_compact),
+    ('fuzzy', bench_fuzzy),
+])
+
+
+def run_suite(sizes, scenarios, repeat):
+    from django.db import connection
+    import django
+
+    results = OrderedDict()
+    for size in sizes:
+        cards = make_catalog(size)
+        for name in scenarios:
+            seconds, ops = SCENARIOS[name](cards, repeat)
+            key = '{}/{}'.format(name, size)
+            results[key] = {'seconds': seconds, 'us_per_op': seconds / ops * 1e6}
+            print('{:>28}  {:>10.4f} s  {:>12.2f} us/op'.format(key, seconds, seconds / ops * 1e6))
+        clear_catalog()
+    return {
+        'meta': {
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.machine(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns the `(key, baseline seconds, seconds)` of every scenario more than `threshold` slower
+    than in `baseline`.
+    """
+    regressions = []
+    for key, result in results['results'].items():
+        before = baseline['results'].get(key)
+        if before and result['seconds'] > before['seconds'] * (1 + threshold):
+            regressions.append((key, before['seconds'], result['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--settings', default='tests.settings',
+                        help='Django settings module; benchmarks.postgres_settings uses a local PostgreSQL.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', metavar='PATH')
+    parser.add_argument('--baseline', metavar='PATH')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    setup_django(args.settings)
+    from django.conf import settings
+    # Don't time Django's logging of every query.
+    settings.DEBUG = False
+    results = run_suite(args.sizes, args.scenarios, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['meta']['database'] != results['meta']['database']:
+            print('Baseline was taken on {}, not {}.'.format(
+                baseline['meta']['database'], results['meta']['database']))
+            return 2
+        regressions = compare(results, baseline, args.threshold)
+        for key, before, after in regressions:
+            print('REGRESSION {}: {:.4f} s -> {:.4f} s (+{:.0%})'.format(key, before, after, after / before - 1))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import os
+import time
+
+
+def setup_django(settings='tests.settings'):
+    """
+    Configures Django with the `settings` module, overriding any `DJANGO_SETTINGS_MODULE`, and
+    creates the tables in its database (an in-memory SQLite database for the test settings).
+    """
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def best_time(func, repeat, setup=None):
+    """
+    Returns the best time of `repeat` calls of `func`, calling `setup` untimed before each.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
@@ -57,6 +57,7 @@ setup(
     package_dir={"": "src"},
     include_package_data=True,
     install_requires=["django-light-enums>=0.1.6", "inflect>=0.2.5", "requests>=2.18.2"],
+    extras_require={"async": ["httpx>=0.18"], "parquet": ["pyarrow"]},
     license="MIT",
     zip_safe=False,
     keywords='django-fab-cards',
@@ -7,6 +7,11 @@ from .models import Card, Set, Printing
 class CardAdmin(admin.ModelAdmin):
     search_fields = ['name']
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(id__in=Card.objects.search(search_term).values('id')), False
+
 
 @admin.register(Set)
 class SetAdmin(admin.ModelAdmin):
@@ -18,4 +23,9 @@ class SetAdmin(admin.ModelAdmin):
 class PrintingAdmin(admin.ModelAdmin):
     search_fields = ['card__name']
     list_filter = ['set']
+    list_select_related = ['card', 'set']
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(card__in=Card.objects.search(search_term).values('id')), False
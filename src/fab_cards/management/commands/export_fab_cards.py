@@ -0,0 +1,35 @@
+import os
+
+from django.core.management import BaseCommand, CommandError
+
+from fab_cards.utils.export import CHUNK_SIZE, FORMATS, TABLES, export_catalog
+
+
+class Command(BaseCommand):
+    help = 'Exports the cards, printings and sets in your local database to flat files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory to write the files to; it is created if missing.')
+        parser.add_argument(
+            '--table', dest='tables', action='append', choices=list(TABLES),
+            help='Table to export; repeat for several (default: all of them). "printings_flat" joins each '
+                 'printing to its card and set.')
+        parser.add_argument(
+            '--format', dest='formats', action='append', choices=FORMATS,
+            help='File format; repeat for several (default: ndjson). Parquet requires pyarrow.')
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Gzip NDJSON and CSV files, and use gzip instead of snappy compression in Parquet files.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Number of rows read from the database at a time (default: {}).'.format(CHUNK_SIZE))
+
+    def handle(self, *args, **options):
+        try:
+            written = export_catalog(options['directory'], tables=options['tables'],
+                                     formats=options['formats'] or ['ndjson'], compress=options['gzip'],
+                                     chunk_size=options['chunk_size'])
+        except ImportError as exc:
+            raise CommandError(str(exc))
+        for path, count in written.items():
+            self.stdout.write("Wrote {} rows to {}.".format(count, os.path.relpath(path, options['directory'])))
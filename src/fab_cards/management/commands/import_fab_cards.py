@@ -1,13 +1,47 @@
+import cProfile
+
 from django.core.management import BaseCommand
 import inflect
 
 from fab_cards.models import Card, Printing, Set
+from fab_cards.utils.bulk import BATCH_SIZE
 from fab_cards.utils.import_cards import import_cards
+from fab_cards.utils.instrument import ImportReport
 
 
 class Command(BaseCommand):
     help = 'Imports data from FABDB into your local database.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='Diff against the existing rows in memory and write only the changes, in batches.')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Number of rows per bulk query (default: {}).'.format(BATCH_SIZE))
+        parser.add_argument(
+            '--changed-only', action='store_true',
+            help='Skip cards whose content fingerprint matches the one stored by the last import.')
+        parser.add_argument(
+            '--stream', action='store_true',
+            help='Write cards in batches as they are fetched instead of reading the whole catalog first.')
+        parser.add_argument(
+            '--staged', action='store_true',
+            help='Read and compare the whole catalog first, then write only the changes in one short transaction.')
+        parser.add_argument(
+            '--from-file', metavar='PATH',
+            help='Import from a snapshot or a newline-delimited JSON dump of the API instead of fetching it.')
+        parser.add_argument(
+            '--save-snapshot', metavar='PATH',
+            help='Also save the imported cards as a compressed snapshot, for later use with --from-file.')
+        parser.add_argument(
+            '--report', metavar='PATH',
+            help='Write a JSON report of the time, queries and HTTP requests of each import phase to PATH, '
+                 'or to standard output if PATH is "-".')
+        parser.add_argument(
+            '--profile', metavar='PATH',
+            help='Profile the import with cProfile and dump the statistics to PATH, for use with pstats.')
+
     def handle(self, *args, **options):
         models_to_track = [Set, Card, Printing]
         initial = {model: model.objects.count() for model in models_to_track}
@@ -15,8 +49,18 @@ class Command(BaseCommand):
         p = inflect.engine()
 
         self.stdout.write("Beginning import of all cards.")
-        import_cards()
+        kwargs = dict(bulk=options['bulk'], batch_size=options['batch_size'], changed_only=options['changed_only'],
+                      stream=options['stream'], path=options['from_file'], snapshot=options['save_snapshot'],
+                      staged=options['staged'])
+        profiler = cProfile.Profile() if options['profile'] else None
+        with ImportReport() as report:
+            if profiler:
+                stats = profiler.runcall(import_cards, **kwargs)
+            else:
+                stats = import_cards(**kwargs)
         self.stdout.write("Import complete.")
+        if profiler:
+            profiler.dump_stats(options['profile'])
 
         final = {model: model.objects.count() for model in models_to_track}
         status_strings = [
@@ -25,3 +69,24 @@ class Command(BaseCommand):
             for model in models_to_track
         ]
         self.stdout.write("Added {}.".format(p.join(status_strings)))
+
+        deleted = [(model, stats[model._meta.object_name]['deleted']) for model in models_to_track
+                   if stats.get(model._meta.object_name, {}).get('deleted')]
+        if deleted:
+            self.stdout.write("Removed {}.".format(p.join([
+                p.inflect("{0} stale num({0},)plural_noun({1})".format(count, model._meta.object_name))
+                for model, count in deleted
+            ])))
+
+        if options['bulk'] or options['changed_only'] or options['stream'] or options['staged']:
+            for model in models_to_track:
+                counts = stats.get(model._meta.object_name, {})
+                self.stdout.write("{}: {} inserted, {} updated, {} unchanged.".format(
+                    model._meta.verbose_name_plural.capitalize(), counts.get('inserted', 0),
+                    counts.get('updated', 0), counts.get('unchanged', 0)))
+
+        if options['report'] == '-':
+            self.stdout.write(report.to_json(indent=2))
+        elif options['report']:
+            with open(options['report'], 'w') as f:
+                f.write(report.to_json(indent=2))
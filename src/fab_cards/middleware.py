@@ -0,0 +1,18 @@
+from fab_cards.utils.cache import get_catalog_cache
+
+
+class CatalogVersionMiddleware(object):
+    """
+    Makes each request see the catalog as of the latest committed import, by checking the catalog
+    version before the request is handled. See `fab_cards.utils.cache`.
+
+    The version is read from the shared cache if `FAB_CARDS_CACHE_ALIAS` is set. Otherwise it costs
+    one query of the single-row `CatalogVersion` table per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        get_catalog_cache().check_version()
+        return self.get_response(request)
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fab_cards', '0003_alter_card_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='printing',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
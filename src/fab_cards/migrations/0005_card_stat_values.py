@@ -0,0 +1,81 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+STATS = ('attack', 'defense', 'resource', 'cost', 'intellect', 'life')
+
+
+def parse_stat(value):
+    if value is None or not str(value).strip():
+        return None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return -1
+
+
+def populate_stat_values(apps, schema_editor):
+    Card = apps.get_model('fab_cards', 'Card')
+    cards = []
+    for card in Card.objects.only('id', *STATS).iterator():
+        for stat in STATS:
+            setattr(card, stat + '_value', parse_stat(getattr(card, stat)))
+        cards.append(card)
+    Card.objects.bulk_update(cards, [stat + '_value' for stat in STATS], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fab_cards', '0004_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='attack_value',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='cost_value',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='defense_value',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='intellect_value',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='life_value',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='resource_value',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_stat_values, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['cost_value', 'resource_value'], name='fab_cards_card_cost_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['resource_value', 'cost_value'], name='fab_cards_card_resource_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['attack_value', 'defense_value'], name='fab_cards_card_attack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['life_value', 'intellect_value'], name='fab_cards_card_hero_idx'),
+        ),
+    ]
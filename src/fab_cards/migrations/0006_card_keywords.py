@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fab_cards', '0005_card_stat_values'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardKeyword',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keyword', models.CharField(max_length=64)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='card_keywords',
+                                           to='fab_cards.card')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='cardkeyword',
+            index=models.Index(fields=['keyword', 'card'], name='fab_cards_keyword_card_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cardkeyword',
+            unique_together={('card', 'keyword')},
+        ),
+    ]
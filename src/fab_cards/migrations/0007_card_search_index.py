@@ -0,0 +1,63 @@
+import django.db.models.deletion
+from django.db import OperationalError, migrations, models
+
+FTS_TABLE = 'fab_cards_card_fts'
+
+# Names count ten times as much as rules text when ranking.
+POSTGRES_VECTOR = ("setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+                   "setweight(to_tsvector('simple', coalesce(text, '')), 'B')")
+SQLITE_RANK = 'bm25(10.0, 1.0)'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE fab_cards_card ADD COLUMN search_vector tsvector')
+        schema_editor.execute('CREATE INDEX fab_cards_card_search_idx ON fab_cards_card USING GIN (search_vector)')
+        schema_editor.execute('UPDATE fab_cards_card SET search_vector = {}'.format(POSTGRES_VECTOR))
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute("CREATE VIRTUAL TABLE {} USING fts5(name, text, "
+                               "tokenize='unicode61 remove_diacritics 2', prefix='2 3')".format(FTS_TABLE))
+            except OperationalError:
+                # This SQLite build has no FTS5; searches fall back to icontains.
+                return
+            cursor.execute("INSERT INTO {0}({0}, rank) VALUES ('rank', %s)".format(FTS_TABLE), [SQLITE_RANK])
+            cursor.execute('INSERT INTO {}(rowid, name, text) SELECT id, name, text FROM fab_cards_card'.format(
+                FTS_TABLE))
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS fab_cards_card_search_idx')
+        schema_editor.execute('ALTER TABLE fab_cards_card DROP COLUMN IF EXISTS search_vector')
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS {}'.format(FTS_TABLE))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fab_cards', '0006_card_keywords'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name='CardSearchEntry',
+            fields=[
+                ('card', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING,
+                                              primary_key=True, related_name='search_entry', serialize=False,
+                                              to='fab_cards.card')),
+                ('name', models.TextField()),
+                ('text', models.TextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'fab_cards_card_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:09
+
+from django.db import migrations, models
+
+COLORS = ('red', 'yellow', 'blue')
+
+
+def display_name(identifier, name, resource):
+    if identifier.split('-')[-1] in COLORS and resource not in (None, ''):
+        try:
+            color = COLORS[int(resource) - 1] if int(resource) in (1, 2, 3) else False
+        except ValueError:
+            color = False
+        if color:
+            return f"{name} ({color})"
+    return name
+
+
+def populate_display_names(apps, schema_editor):
+    Card = apps.get_model('fab_cards', 'Card')
+    cards = []
+    for card in Card.objects.only('id', 'identifier', 'name', 'resource').iterator():
+        card.display_name = display_name(card.identifier, card.name, card.resource)
+        cards.append(card)
+    Card.objects.bulk_update(cards, ['display_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fab_cards', '0007_card_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='display_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(populate_display_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fab_cards', '0009_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedCard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identifier', models.CharField(max_length=255, unique=True)),
+                ('fingerprint', models.CharField(max_length=40)),
+                ('printings', models.PositiveIntegerField(default=0)),
+                ('record', models.TextField()),
+            ],
+        ),
+    ]
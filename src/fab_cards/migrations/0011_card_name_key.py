@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:27
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def name_key(name):
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    name = re.sub(r"['’]", '', name.lower())
+    return ' '.join(re.sub(r'\W+', ' ', name).split())
+
+
+def populate_name_keys(apps, schema_editor):
+    Card = apps.get_model('fab_cards', 'Card')
+    cards = []
+    for card in Card.objects.only('id', 'display_name').iterator():
+        card.name_key = name_key(card.display_name)
+        cards.append(card)
+    Card.objects.bulk_update(cards, ['name_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fab_cards', '0010_staged_card'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='name_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.RunPython(populate_name_keys, migrations.RunPython.noop),
+    ]
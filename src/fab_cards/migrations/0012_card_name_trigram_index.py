@@ -0,0 +1,32 @@
+from django.db import OperationalError, ProgrammingError, migrations, transaction
+
+TRIGRAM_INDEX = 'fab_cards_card_name_trgm_idx'
+
+
+def create_trigram_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except (OperationalError, ProgrammingError):
+        # pg_trgm is not installed, or this role may not create extensions; lookups use a TrigramIndex.
+        return
+    schema_editor.execute('CREATE INDEX {} ON fab_cards_card USING GIN (name_key gin_trgm_ops)'.format(TRIGRAM_INDEX))
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS {}'.format(TRIGRAM_INDEX))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fab_cards', '0011_card_name_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,19 +1,142 @@
 from __future__ import unicode_literals
 
+import math
 import random
+import re
+import unicodedata
 
 from django.db import models
+from django.utils import timezone
 from six import python_2_unicode_compatible
 from django_light_enums import enum
 
 
+STAT_FIELDS = ('attack', 'defense', 'resource', 'cost', 'intellect', 'life')
+
+# Stored in a stat's integer column when the stat is not a plain number, such as "X" or "*". Filter
+# on ranges of values with `CardQuerySet.stat_range`, which leaves these cards out.
+VARIABLE_STAT = -1
+
+
+def parse_stat(value):
+    """
+    Returns the integer value of a stat as FABDB writes it: `None` if the card has no such stat,
+    and `VARIABLE_STAT` if it is not a plain number.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return VARIABLE_STAT
+
+
+PITCH_COLORS = ('red', 'yellow', 'blue')
+
+
+def pitch_color(resource):
+    """
+    Returns the color of a card's pitch bar for an integer `resource`, or `False` if it has none.
+    """
+    if resource in (1, 2, 3):
+        return PITCH_COLORS[resource - 1]
+    return False
+
+
+def display_name(identifier, name, resource):
+    """
+    Returns the name a card is shown under: its name, followed by its color if the same name is
+    printed in several colors. A card whose resource has no color, such as "X", is shown under its
+    name alone.
+    """
+    if identifier.split('-')[-1] in PITCH_COLORS:
+        color = pitch_color(parse_stat(resource))
+        if color:
+            return f"{name} ({color})"
+    return name
+
+
+def name_key(name):
+    """
+    Returns `name` normalized for matching names typed by people: lowercase, without accents or
+    apostrophes, and with any other punctuation collapsed into single spaces, so that
+    "Warrior's Valor (Red)" and "warriors valor red" have the same key.
+    """
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    name = re.sub(r"['’]", '', name.lower())
+    return ' '.join(re.sub(r'\W+', ' ', name).split())
+
+
 @python_2_unicode_compatible
 class NameMixin(object):
     def __str__(self):
         return self.name
 
 
+def normalize_keyword(keyword):
+    return ' '.join(keyword.lower().split())
+
+
+class CardQuerySet(models.QuerySet):
+    def with_keywords(self, *keywords, **kwargs):
+        """
+        Returns the cards that have all of `keywords`, or any of them if `match_any=True`.
+
+        Keywords are matched whole and case-insensitively against `CardKeyword` rows, so "go" does
+        not match "go again".
+        """
+        match_any = kwargs.pop('match_any', False)
+        if kwargs:
+            raise TypeError("Unexpected keyword arguments: {}".format(', '.join(kwargs)))
+        keywords = {normalize_keyword(keyword) for keyword in keywords}
+        if not keywords:
+            return self
+        matches = CardKeyword.objects.filter(keyword__in=keywords)
+        if not match_any and len(keywords) > 1:
+            matches = matches.values('card_id').annotate(matched=models.Count('keyword')).filter(
+                matched=len(keywords))
+        return self.filter(id__in=matches.values('card_id'))
+
+    def stat_range(self, stat, minimum=None, maximum=None):
+        """
+        Returns the cards whose `stat` (one of `STAT_FIELDS`) is a number between `minimum` and
+        `maximum`, inclusive. Cards without the stat, or with a variable one such as "X", are left out,
+        so `stat_range('cost', maximum=2)` doesn't match a cost of X.
+        """
+        if stat not in STAT_FIELDS:
+            raise ValueError("Unknown stat: {}".format(stat))
+        field = stat + '_value'
+        lookups = {field + '__gt': VARIABLE_STAT}
+        if minimum is not None:
+            lookups[field + '__gte'] = minimum
+        if maximum is not None:
+            lookups[field + '__lte'] = maximum
+        return self.filter(**lookups)
+
+    def search(self, query):
+        """
+        Returns the cards whose name or text contains every word of `query`, matching words by
+        prefix and ordering the best matches first. See `fab_cards.utils.search`.
+        """
+        from fab_cards.utils.search import search
+        return search(self, query)
+
+    def fuzzy(self, name, limit=10):
+        """
+        Returns a list of up to `limit` cards whose names are most similar to `name`, tolerating
+        typos, best first. See `fab_cards.utils.fuzzy`.
+        """
+        from fab_cards.utils.fuzzy import fuzzy
+        return fuzzy(self, name, limit)
+
+
 class Card(NameMixin, models.Model):
+    objects = CardQuerySet.as_manager()
+
     identifier = models.CharField(max_length=255, unique=True)
     name = models.CharField(max_length=255)
     text = models.TextField(blank=True, default="")
@@ -28,20 +151,79 @@ class Card(NameMixin, models.Model):
     life = models.CharField(max_length=8, null=True, blank=True)
     rarity = models.CharField(max_length=2, null=True, blank=True)
 
+    # Integer copies of the stats above, kept in sync by `save` and the importer, for filtering and
+    # sorting in SQL. See `parse_stat`.
+    attack_value = models.SmallIntegerField(null=True, blank=True)
+    defense_value = models.SmallIntegerField(null=True, blank=True)
+    resource_value = models.SmallIntegerField(null=True, blank=True)
+    cost_value = models.SmallIntegerField(null=True, blank=True)
+    intellect_value = models.SmallIntegerField(null=True, blank=True)
+    life_value = models.SmallIntegerField(null=True, blank=True)
+
+    # `display_name` of the card, kept in sync by `save` and the importer so that printing it needs
+    # no parsing.
+    display_name = models.CharField(max_length=255, blank=True, default="")
+    # `name_key` of the display name, to look cards up by the names in deck lists. See `fab_cards.utils.decks`.
+    name_key = models.CharField(max_length=255, blank=True, default="", db_index=True)
+
+    # Content hash of the API record this card was last imported from, see `import_cards`.
+    fingerprint = models.CharField(max_length=40, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['cost_value', 'resource_value'], name='fab_cards_card_cost_idx'),
+            models.Index(fields=['resource_value', 'cost_value'], name='fab_cards_card_resource_idx'),
+            models.Index(fields=['attack_value', 'defense_value'], name='fab_cards_card_attack_idx'),
+            models.Index(fields=['life_value', 'intellect_value'], name='fab_cards_card_hero_idx'),
+        ]
+
     @property
     def needs_disambig(self):
-        return self.identifier.split('-')[-1] in ('red', 'yellow', 'blue') and self.resource
+        return self.identifier.split('-')[-1] in PITCH_COLORS and self.resource
 
     @property
     def color_bar(self):
-        if self.resource:
-            return ('red', 'yellow', 'blue')[int(self.resource)-1]
-        return False
+        return pitch_color(self.resource_value if self.resource_value is not None else parse_stat(self.resource))
+
+    def update_stat_values(self):
+        for stat in STAT_FIELDS:
+            setattr(self, stat + '_value', parse_stat(getattr(self, stat)))
+
+    def save(self, *args, **kwargs):
+        self.update_stat_values()
+        self.display_name = display_name(self.identifier, self.name, self.resource)
+        self.name_key = name_key(self.display_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            update_fields.update(stat + '_value' for stat in STAT_FIELDS if stat in update_fields)
+            if update_fields.intersection(('identifier', 'name', 'resource')):
+                update_fields.update(('display_name', 'name_key'))
+            kwargs['update_fields'] = update_fields
+        super(Card, self).save(*args, **kwargs)
 
     def __str__(self):
-        if self.needs_disambig:
-            return f"{self.name} ({self.color_bar})"
-        return self.name
+        return self.display_name or display_name(self.identifier, self.name, self.resource)
+
+
+class CardKeyword(models.Model):
+    """
+    One keyword of a card, normalized with `normalize_keyword`. `Card.keywords` keeps the original
+    space-separated string.
+    """
+    card = models.ForeignKey('Card',
+                             on_delete=models.CASCADE,
+                             related_name='card_keywords')
+    keyword = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = [('card', 'keyword')]
+        indexes = [
+            models.Index(fields=['keyword', 'card'], name='fab_cards_keyword_card_idx'),
+        ]
+
+    def __str__(self):
+        return self.keyword
 
 
 class Set(NameMixin, models.Model):
@@ -50,11 +232,61 @@ class Set(NameMixin, models.Model):
 
 
 class PrintingQuerySet(models.QuerySet):
-    def random(self, num):
+    # Rounds of id guessing before `random` falls back to loading every matching id, and the most
+    # ids guessed per round (one query each).
+    RANDOM_ROUNDS = 5
+    RANDOM_CANDIDATES = 500
+
+    def random(self, num, rng=None):
+        """
+        Returns a queryset of `num` distinct printings chosen uniformly at random from this one.
+
+        Candidate ids are drawn between the smallest and largest matching id, and kept if a matching
+        row exists; each round oversamples by the hit rate seen so far. Only if the matching ids are
+        too sparse to find this way are they all loaded. Pass a seeded `random.Random` as `rng` for
+        reproducible samples. Raises `ValueError` if there are fewer than `num` printings.
+        """
         num = int(num)
-        printing_ids = set(self.values_list('id', flat=True))
-        random_ids = random.sample(printing_ids, num)
-        return self.filter(id__in=random_ids)
+        rng = rng or random
+        if num <= 0:
+            return self.none()
+        # Two ordered lookups rather than one MIN/MAX aggregate, which SQLite can only answer from
+        # the primary key index one at a time.
+        ids = self.order_by().values_list('id', flat=True)
+        low = ids.order_by('id').first()
+        if low is None:
+            raise ValueError("Sample larger than population")
+        high = ids.order_by('-id').first()
+
+        tried = set()
+        chosen = []
+        for _ in range(self.RANDOM_ROUNDS):
+            need = num - len(chosen)
+            untried = high - low + 1 - len(tried)
+            if not need or not untried:
+                break
+            hit_rate = (len(chosen) + 1.0) / (len(tried) + 1.0)
+            draws = min(untried, self.RANDOM_CANDIDATES, int(math.ceil(need * 1.5 / hit_rate)) + 4)
+            candidates = []
+            for _ in range(draws):
+                candidate = rng.randrange(low, high + 1)
+                if candidate not in tried:
+                    tried.add(candidate)
+                    candidates.append(candidate)
+            found = set(self.filter(id__in=candidates).values_list('id', flat=True))
+            chosen.extend([candidate for candidate in candidates if candidate in found][:need])
+
+        if len(chosen) < num:
+            remaining = sorted(set(self.values_list('id', flat=True)).difference(chosen))
+            chosen.extend(rng.sample(remaining, num - len(chosen)))
+        return self.filter(id__in=chosen)
+
+    def for_display(self):
+        """
+        Joins each printing's card and set, which `str(printing)` reads, so that rendering a list of
+        printings takes one query however long it is.
+        """
+        return self.select_related('card', 'set')
 
 
 @python_2_unicode_compatible
@@ -75,6 +307,63 @@ class Printing(models.Model):
 
     language = models.CharField(max_length=2, default="en")
 
+    fingerprint = models.CharField(max_length=40, blank=True, default="")
+
     def __str__(self):
         return '{} ({})'.format(self.card, self.set.code)
 
+
+class CardSearchEntry(models.Model):
+    """
+    A card's row in the SQLite full-text index, an FTS5 table created by the migrations rather than
+    by Django, which searches join to rank cards. See `fab_cards.utils.search`.
+    """
+    card = models.OneToOneField(Card, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid',
+                                related_name='search_entry')
+    name = models.TextField()
+    text = models.TextField()
+    # FTS5's hidden rank column, only meaningful in a query matching the table.
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'fab_cards_card_fts'
+
+
+class StagedCard(models.Model):
+    """
+    A normalized API record loaded by a staged import, waiting to be compared with the live tables
+    and applied. See `import_cards`.
+    """
+    identifier = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=40)
+    printings = models.PositiveIntegerField(default=0)
+    record = models.TextField()
+
+    def __str__(self):
+        return self.identifier
+
+
+class CatalogVersion(models.Model):
+    """
+    A single row counting how many imports have changed the catalog, so that caches of it can tell
+    when they are stale. See `fab_cards.utils.cache`.
+    """
+    version = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        """
+        Increments the catalog version and returns the new one.
+        """
+        if not cls.objects.filter(pk=1).update(version=models.F('version') + 1, updated=timezone.now()):
+            cls.objects.create(pk=1, version=1)
+        return cls.current()
+
+    def __str__(self):
+        return str(self.version)
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by `ImportReport` when an instrumented import starts and finishes, with the report as
+# `report`. Receivers of `import_finished` can forward `report.as_dict()` to a metrics system.
+import_started = Signal()
+import_finished = Signal()
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from fab_cards import views
+
+app_name = 'fab_cards'
+
+urlpatterns = [
+    path('cards/', views.CardView.as_view(), name='card-list'),
+    path('cards/<str:key>/', views.CardView.as_view(), name='card-detail'),
+    path('printings/', views.PrintingView.as_view(), name='printing-list'),
+    path('printings/<str:key>/', views.PrintingView.as_view(), name='printing-detail'),
+    path('sets/', views.SetView.as_view(), name='set-list'),
+    path('sets/<str:key>/', views.SetView.as_view(), name='set-detail'),
+]
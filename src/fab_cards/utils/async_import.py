@@ -0,0 +1,130 @@
+"""
+An `asyncio` version of the importer, for refreshing the catalog from inside an ASGI service without
+blocking its event loop. It needs `httpx` (`pip install django-fab-cards[async]`).
+
+Pages are fetched concurrently with an `httpx.AsyncClient`. Each page is normalized with the same
+`CatalogNormalizer` as the sync importer, and staged through `sync_to_async` while the next pages
+are still being fetched. The staged cards are then applied with `apply_staged`, in the same short
+transaction as a staged sync import.
+"""
+import asyncio
+from collections import deque
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from fab_cards.utils.bulk import BATCH_SIZE
+from fab_cards.utils.fetch import BACKOFF, MAX_RETRIES, MAX_WORKERS, PER_PAGE, TIMEOUT, PageFetcher
+from fab_cards.utils.import_cards import API_URL, apply_staged, clear_staged, stage_batch
+from fab_cards.utils.normalize import CatalogNormalizer
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class AsyncPageFetcher(object):
+    """
+    Fetches every page of a paginated FABDB endpoint, like `PageFetcher`, with at most
+    `concurrency` requests in flight.
+    """
+
+    def __init__(self, url, per_page=PER_PAGE, concurrency=MAX_WORKERS, retries=MAX_RETRIES, backoff=BACKOFF,
+                 timeout=TIMEOUT, client=None):
+        if httpx is None:
+            raise ImportError("The async importer requires httpx: pip install django-fab-cards[async]")
+        self.url = url
+        self.per_page = per_page
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.owns_client = client is None
+        self.client = client or httpx.AsyncClient(limits=httpx.Limits(max_connections=self.concurrency))
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def aclose(self):
+        if self.owns_client:
+            await self.client.aclose()
+
+    async def fetch_page(self, page):
+        """
+        Returns the decoded JSON of a single page, retrying transient failures with exponential backoff.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    r = await self.client.get(self.url, params={'per_page': self.per_page, 'page': page},
+                                              timeout=self.timeout)
+                r.raise_for_status()
+                return r.json()
+            except httpx.HTTPError as exc:
+                if attempt >= self.retries or not PageFetcher.should_retry(exc):
+                    raise
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    async def iter_pages(self):
+        """
+        Yields the decoded JSON of every page, in page order, requesting at most twice
+        `concurrency` pages ahead of the consumer.
+        """
+        first = await self.fetch_page(1)
+        yield first
+        last_page = first['meta']['last_page']
+        pages = iter(range(2, last_page + 1))
+        pending = deque(asyncio.ensure_future(self.fetch_page(page)) for page in islice(pages, self.concurrency * 2))
+        try:
+            while pending:
+                page_data = await pending.popleft()
+                for page in islice(pages, 1):
+                    pending.append(asyncio.ensure_future(self.fetch_page(page)))
+                yield page_data
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+async def aiter_data(url=API_URL, **kwargs):
+    """
+    Yields the record of every card in the FABDB API, in API order. Any `kwargs` are passed to
+    `AsyncPageFetcher`.
+    """
+    fetcher = AsyncPageFetcher(url, **kwargs)
+    try:
+        async for page_data in fetcher.iter_pages():
+            for card_data in page_data['data']:
+                yield card_data
+    finally:
+        await fetcher.aclose()
+
+
+async def async_import_cards(url=API_URL, batch_size=BATCH_SIZE, **kwargs):
+    """
+    Imports every card from the FABDB API and returns the `ImportStats`, writing the same rows as
+    `import_cards`. Any `kwargs` are passed to `AsyncPageFetcher`.
+
+    Records are staged `batch_size` at a time, each batch written while later pages are fetched.
+    Like other staged imports, it must not run concurrently with another staged import.
+    """
+    normalizer = CatalogNormalizer()
+    await sync_to_async(clear_staged)()
+    fetcher = AsyncPageFetcher(url, **kwargs)
+    writing = None
+    batch = []
+    try:
+        async for page_data in fetcher.iter_pages():
+            batch.extend(normalizer.feed(page_data['data']))
+            if len(batch) >= batch_size:
+                if writing:
+                    await writing
+                writing = asyncio.ensure_future(sync_to_async(stage_batch)(batch))
+                batch = []
+    finally:
+        if writing:
+            await writing
+        await fetcher.aclose()
+    await sync_to_async(stage_batch)(batch)
+    return await sync_to_async(apply_staged)(normalizer.identifiers(), normalizer.dropped(), batch_size)
@@ -0,0 +1,208 @@
+from collections import Counter, OrderedDict, defaultdict
+
+from django.db import connection
+
+from fab_cards.models import Card, CardKeyword, Printing, Set
+from fab_cards.utils.search import INDEXED_FIELDS
+
+BATCH_SIZE = 500
+
+
+class ImportStats(OrderedDict):
+    """
+    Maps each model's name to a `Counter` of how many of its rows were `inserted`, `updated`,
+    `deleted` or left `unchanged` by an import. `search_ids` holds the ids of the cards whose
+    full-text index entries the import made stale.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(ImportStats, self).__init__(*args, **kwargs)
+        self.search_ids = set()
+
+    def add(self, model, action, count=1):
+        name = model._meta.object_name
+        if name not in self:
+            self[name] = Counter()
+        self[name][action] += count
+
+    def changed(self, model=None):
+        """
+        Whether any rows, or any rows of `model`, were inserted, updated or deleted.
+        """
+        counters = [self.get(model._meta.object_name, {})] if model else self.values()
+        return any(counter.get(action) for counter in counters for action in ('inserted', 'updated', 'deleted'))
+
+    def as_dict(self):
+        return {name: dict(counter) for name, counter in self.items()}
+
+
+def supports_upsert():
+    """
+    Whether `bulk_create(update_conflicts=True)` can be used. The feature flag only exists from
+    Django 4.1 onwards.
+    """
+    return getattr(connection.features, 'supports_update_conflicts_with_target', False)
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BulkWriter(object):
+    """
+    Writes card records to the database with a constant number of queries per batch.
+
+    Existing rows are loaded once per model, keyed by their natural key (`identifier` for cards,
+    `sku` for printings and `code` for sets), and diffed against the records in memory. Only new and
+    changed rows are then written, with `bulk_create` and `bulk_update` in batches of `batch_size`.
+
+    By default the whole table is loaded in one query. With `scoped`, only the rows being written
+    are loaded, which is cheaper when writing a small part of the catalog.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, stats=None, scoped=False):
+        self.batch_size = batch_size
+        self.stats = ImportStats() if stats is None else stats
+        self.scoped = scoped
+
+    def write(self, card_rows, printing_rows, keyword_rows=None):
+        """
+        `card_rows` maps identifiers to `Card` field values. `printing_rows` maps SKUs to a tuple of
+        `(identifier, set_code, set_name, field_values)`. `keyword_rows` maps identifiers to the set
+        of their card's normalized keywords; cards missing from it keep their keywords.
+        """
+        if not card_rows and not printing_rows:
+            return self.stats
+        set_ids = self.write_sets((row[1], row[2]) for row in printing_rows.values())
+        card_ids = self.upsert(Card, 'identifier', card_rows, indexed=INDEXED_FIELDS)
+        if keyword_rows:
+            self.write_keywords({card_ids[identifier]: keywords for identifier, keywords in keyword_rows.items()})
+        rows = OrderedDict()
+        for sku, (identifier, set_code, set_name, values) in printing_rows.items():
+            values = dict(values, card_id=card_ids[identifier], set_id=set_ids[set_code.lower()])
+            rows[sku] = values
+        self.upsert(Printing, 'sku', rows, return_ids=False)
+        return self.stats
+
+    def write_sets(self, sets):
+        """
+        Creates any missing sets, matching codes case-insensitively like `ModelCache`. Existing sets
+        are never renamed. Returns a dict of lowercased set code to id.
+        """
+        existing = {code.lower(): pk for code, pk in Set.objects.values_list('code', 'id')}
+        seen = set()
+        new = OrderedDict()
+        for code, name in sets:
+            seen.add(code.lower())
+            if code.lower() not in existing:
+                new.setdefault(code.lower(), Set(code=code, name=name))
+        self.stats.add(Set, 'unchanged', len(seen) - len(new))
+        if new:
+            Set.objects.bulk_create(new.values(), batch_size=self.batch_size)
+            existing.update((code.lower(), pk) for code, pk in Set.objects.values_list('code', 'id'))
+            self.stats.add(Set, 'inserted', len(new))
+        return existing
+
+    def write_keywords(self, keywords_by_card):
+        """
+        Makes the `CardKeyword` rows of each card id in `keywords_by_card` match its set of keywords,
+        inserting and deleting only the differences.
+        """
+        if self.scoped:
+            existing_rows = []
+            for batch in chunks(list(keywords_by_card), self.batch_size):
+                existing_rows.extend(
+                    CardKeyword.objects.filter(card_id__in=batch).values_list('id', 'card_id', 'keyword'))
+        else:
+            existing_rows = CardKeyword.objects.values_list('id', 'card_id', 'keyword')
+
+        existing = defaultdict(set)
+        stale = []
+        for pk, card_id, keyword in existing_rows:
+            if card_id not in keywords_by_card:
+                continue
+            if keyword in keywords_by_card[card_id]:
+                existing[card_id].add(keyword)
+            else:
+                stale.append(pk)
+        new = [
+            CardKeyword(card_id=card_id, keyword=keyword)
+            for card_id, keywords in keywords_by_card.items()
+            for keyword in sorted(keywords) if keyword not in existing[card_id]
+        ]
+
+        for batch in chunks(stale, self.batch_size):
+            CardKeyword.objects.filter(id__in=batch).delete()
+        if new:
+            CardKeyword.objects.bulk_create(new, batch_size=self.batch_size)
+        self.stats.add(CardKeyword, 'inserted', len(new))
+        self.stats.add(CardKeyword, 'deleted', len(stale))
+
+    def upsert(self, model, key, rows, return_ids=True, indexed=()):
+        """
+        Inserts or updates one `model` row per item of `rows`, a dict of natural key to field
+        values. Fields missing from a row's values keep their current value.
+
+        Returns a dict of natural key to primary key, unless `return_ids` is false. The ids of the
+        rows inserted, or whose `indexed` fields changed, are added to `stats.search_ids`.
+        """
+        if self.scoped:
+            existing = model.objects.in_bulk(list(rows), field_name=key) if rows else {}
+        else:
+            existing = model.objects.in_bulk(field_name=key)
+        fields = {name: model._meta.get_field(name) for row in rows.values() for name in row}
+        new = []
+        changed = []
+        changed_fields = set()
+        reindexed = []
+        for value, values in rows.items():
+            obj = existing.get(value)
+            if obj is None:
+                new.append(model(**dict(values, **{key: value})))
+                reindexed.append(value)
+                continue
+            dirty = [name for name, field_value in values.items()
+                     if getattr(obj, name) != fields[name].to_python(field_value)]
+            for name in dirty:
+                setattr(obj, name, values[name])
+            if dirty:
+                changed.append(obj)
+                changed_fields.update(dirty)
+            if set(dirty).intersection(indexed):
+                reindexed.append(value)
+
+        self.stats.add(model, 'inserted', len(new))
+        self.stats.add(model, 'updated', len(changed))
+        self.stats.add(model, 'unchanged', len(rows) - len(new) - len(changed))
+
+        if changed and supports_upsert():
+            # One INSERT ... ON CONFLICT per batch covers both the new and the changed rows.
+            update_fields = sorted(fields[name].name for name in changed_fields)
+            upserts = new + [self.copy(model, obj) for obj in changed]
+            model.objects.bulk_create(upserts, batch_size=self.batch_size, update_conflicts=True,
+                                      unique_fields=[key], update_fields=update_fields)
+        else:
+            if new:
+                model.objects.bulk_create(new, batch_size=self.batch_size)
+            if changed:
+                model.objects.bulk_update(changed, sorted(fields[name].name for name in changed_fields),
+                                          batch_size=self.batch_size)
+
+        if not return_ids and not indexed:
+            return None
+        ids = {value: obj.pk for value, obj in existing.items()}
+        missing = [getattr(obj, key) for obj in new if obj.pk is None]
+        for batch in chunks(missing, self.batch_size):
+            ids.update(model.objects.filter(**{key + '__in': batch}).values_list(key, 'id'))
+        ids.update((getattr(obj, key), obj.pk) for obj in new if obj.pk is not None)
+        self.stats.search_ids.update(ids[value] for value in reindexed)
+        return ids if return_ids else None
+
+    @staticmethod
+    def copy(model, obj):
+        """
+        Returns an unsaved copy of `obj` without its primary key, for use as an upsert row.
+        """
+        return model(**{field.attname: getattr(obj, field.attname)
+                        for field in model._meta.concrete_fields if not field.primary_key})
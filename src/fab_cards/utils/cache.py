@@ -0,0 +1,175 @@
+"""
+A read-through, process-wide cache of cards, printings and sets.
+
+The catalog only changes when `import_cards` runs, which bumps `CatalogVersion` in the same
+transaction. Each process keeps a bounded LRU of the objects it has looked up, optionally backed by
+a shared Django cache (`FAB_CARDS_CACHE_ALIAS`) whose keys include the catalog version. When the
+import commits, the new version is published to the shared cache; adding
+`fab_cards.middleware.CatalogVersionMiddleware` checks it at the start of every request and drops
+the local entries of any older version. Lookups also check it themselves once it is
+`FAB_CARDS_CACHE_RECHECK` seconds old, so processes that don't serve requests, or serve them
+without the middleware, see a new import within that time.
+
+Settings:
+
+- `FAB_CARDS_CACHE_SIZE`: the most objects each process keeps (default 10000).
+- `FAB_CARDS_CACHE_ALIAS`: a `CACHES` alias to share objects and the catalog version between
+  processes (default `None`: each process caches on its own and reads the version from the database).
+- `FAB_CARDS_CACHE_TIMEOUT`: how long objects are kept in the shared cache (default one day).
+- `FAB_CARDS_CACHE_RECHECK`: how many seconds lookups trust the catalog version before checking it
+  again (default 60; `None` to only check it in the middleware).
+
+Cached objects are shared between callers and must not be modified.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from fab_cards.models import CatalogVersion, Card, Printing, Set
+
+CACHE_SIZE = 10000
+CACHE_TIMEOUT = 60 * 60 * 24
+CACHE_RECHECK = 60
+VERSION_KEY = 'fab_cards:catalog_version'
+
+
+class CatalogCache(object):
+    """
+    Looks up cards by `identifier`, printings by `sku` and sets by `code`, going to the database
+    only on a miss. Printings come with their card and set, see `PrintingQuerySet.for_display`.
+    Missing objects raise the model's `DoesNotExist` and are not cached.
+    """
+
+    def __init__(self, max_size=None, cache_alias=None, timeout=None, recheck=None):
+        self.max_size = getattr(settings, 'FAB_CARDS_CACHE_SIZE', CACHE_SIZE) if max_size is None else max_size
+        if cache_alias is None:
+            cache_alias = getattr(settings, 'FAB_CARDS_CACHE_ALIAS', None)
+        self.shared = caches[cache_alias] if cache_alias else None
+        self.timeout = getattr(settings, 'FAB_CARDS_CACHE_TIMEOUT', CACHE_TIMEOUT) if timeout is None else timeout
+        self.recheck = getattr(settings, 'FAB_CARDS_CACHE_RECHECK', CACHE_RECHECK) if recheck is None else recheck
+        self.version = None
+        self.checked = None
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def card(self, identifier):
+        return self.get('card', identifier, lambda: Card.objects.get(identifier=identifier))
+
+    def printing(self, sku):
+        return self.get('printing', sku, lambda: Printing.objects.for_display().get(sku=sku))
+
+    def set(self, code):
+        return self.get('set', code.lower(), lambda: Set.objects.get(code__iexact=code))
+
+    def get(self, kind, key, load):
+        self.ensure_version()
+        local_key = (kind, key)
+        with self._lock:
+            if local_key in self._items:
+                self._items.move_to_end(local_key)
+                self.hits += 1
+                return self._items[local_key]
+        self.misses += 1
+
+        obj = None
+        shared_key = 'fab_cards:{}:{}:{}'.format(self.version, kind, key)
+        if self.shared is not None:
+            obj = self.shared.get(shared_key)
+        if obj is None:
+            obj = load()
+            if self.shared is not None:
+                self.shared.set(shared_key, obj, self.timeout)
+
+        with self._lock:
+            self._items[local_key] = obj
+            self._items.move_to_end(local_key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return obj
+
+    def current_version(self):
+        """
+        Returns the catalog version, from the shared cache if there is one.
+        """
+        if self.shared is None:
+            return CatalogVersion.current()
+        version = self.shared.get(VERSION_KEY)
+        if version is None:
+            version = CatalogVersion.current()
+            self.shared.add(VERSION_KEY, version, None)
+        return version
+
+    def publish_version(self, version):
+        """
+        Records a newly committed catalog version, and forgets everything cached for older ones.
+        """
+        if self.shared is not None:
+            self.shared.set(VERSION_KEY, version, None)
+        self.set_version(version)
+
+    def check_version(self):
+        """
+        Forgets every cached object if the catalog has changed since they were loaded.
+        """
+        self.set_version(self.current_version())
+
+    def ensure_version(self):
+        """
+        Checks the catalog version if it never was, or not for the last `recheck` seconds.
+        """
+        checked = self.checked
+        if checked is None or (self.recheck is not None and time.monotonic() - checked >= self.recheck):
+            self.check_version()
+
+    def set_version(self, version):
+        with self._lock:
+            if version != self.version:
+                self._items.clear()
+                self.version = version
+            self.checked = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.version = None
+            self.checked = None
+
+    def __len__(self):
+        return len(self._items)
+
+
+_catalog_cache = None
+_catalog_cache_lock = threading.Lock()
+
+
+def get_catalog_cache():
+    """
+    Returns this process's `CatalogCache`, configured from settings.
+    """
+    global _catalog_cache
+    if _catalog_cache is None:
+        with _catalog_cache_lock:
+            if _catalog_cache is None:
+                _catalog_cache = CatalogCache()
+    return _catalog_cache
+
+
+def reset_catalog_cache():
+    global _catalog_cache
+    _catalog_cache = None
+
+
+def bump_catalog_version(using='default'):
+    """
+    Increments the catalog version within the current transaction, and publishes it to the catalog
+    cache once the transaction commits.
+    """
+    version = CatalogVersion.bump()
+    transaction.on_commit(lambda: get_catalog_cache().publish_version(version), using=using)
+    return version
@@ -0,0 +1,171 @@
+"""
+An immutable, compact in-memory copy of the catalog for read-heavy code such as rules engines and
+deck validators.
+
+Records are namedtuples rather than model instances, so they carry no `_state` or instance dict.
+Foreign keys are plain integer ids, and strings repeated across rows (card names, shared by each
+pitch of a card, set codes, rarities, finishes, languages and keywords) are interned so that each
+distinct value is stored once. Build a catalog with `CompactCatalog.from_db`, and share it between
+forked workers by building or `load`ing it before forking. Calling `gc.freeze()` after that keeps
+the garbage collector from touching its pages, so they stay shared copy-on-write.
+"""
+import pickle
+import sys
+from collections import defaultdict, namedtuple
+
+from fab_cards.models import STAT_FIELDS, Card, CardKeyword, Printing, Set, display_name
+
+CompactSet = namedtuple('CompactSet', ['id', 'code', 'name'])
+
+CARD_FIELDS = ('id', 'identifier', 'name', 'text', 'rarity', 'keywords') + STAT_FIELDS
+
+
+class CompactCard(namedtuple('CompactCard', CARD_FIELDS)):
+    """
+    A card, whose stats are the integer `<stat>_value`s of `Card` (see `parse_stat`). The display
+    name is worked out when needed rather than stored.
+    """
+    __slots__ = ()
+
+    @property
+    def display_name(self):
+        return display_name(self.identifier, self.name, self.resource)
+
+
+CompactPrinting = namedtuple('CompactPrinting', ['id', 'card_id', 'set_id', 'sku', 'rarity', 'finish',
+                                                 'printing_id', 'image_url', 'language'])
+
+
+def intern(value):
+    return sys.intern(value) if value is not None else None
+
+
+class CompactCatalog(object):
+    """
+    Every set, card and printing, indexed by id, `Card.identifier`, `Card.name` and `Printing.sku`.
+
+    Pickling keeps only the records; the indexes are rebuilt, and strings re-interned, on load.
+    """
+
+    def __init__(self, sets, cards, printings):
+        self.sets = tuple(sets)
+        self.cards = tuple(cards)
+        self.printings = tuple(printings)
+        self._build_indexes()
+
+    @classmethod
+    def from_db(cls, chunk_size=2000):
+        """
+        Builds a catalog from the database in four queries, without creating model instances.
+        """
+        sets = [CompactSet(pk, intern(code), name)
+                for pk, code, name in Set.objects.order_by('id').values_list('id', 'code', 'name')]
+
+        keywords = defaultdict(list)
+        rows = CardKeyword.objects.order_by('card_id', 'keyword').values_list('card_id', 'keyword')
+        for card_id, keyword in rows.iterator(chunk_size=chunk_size):
+            keywords[card_id].append(intern(keyword))
+
+        card_fields = ['id', 'identifier', 'name', 'text', 'rarity']
+        card_fields.extend(stat + '_value' for stat in STAT_FIELDS)
+        cards = []
+        for row in Card.objects.order_by('id').values_list(*card_fields).iterator(chunk_size=chunk_size):
+            pk, identifier, name, text, rarity = row[:5]
+            cards.append(CompactCard(pk, identifier, intern(name), text, intern(rarity), tuple(keywords.get(pk, ())),
+                                     *row[5:]))
+
+        rows = Printing.objects.order_by('id').values_list(*CompactPrinting._fields)
+        printings = [CompactPrinting(pk, card_id, set_id, sku, intern(rarity), intern(finish), printing_id,
+                                     image_url, intern(language))
+                     for pk, card_id, set_id, sku, rarity, finish, printing_id, image_url, language
+                     in rows.iterator(chunk_size=chunk_size)]
+        return cls(sets, cards, printings)
+
+    def _build_indexes(self):
+        self.sets_by_id = {record.id: record for record in self.sets}
+        self.sets_by_code = {record.code.lower(): record for record in self.sets}
+        self.cards_by_id = {record.id: record for record in self.cards}
+        self.cards_by_identifier = {record.identifier: record for record in self.cards}
+        self.printings_by_sku = {record.sku: record for record in self.printings}
+
+        by_name = defaultdict(list)
+        for record in self.cards:
+            by_name[record.name.lower()].append(record)
+        self.cards_by_name = {name: tuple(records) for name, records in by_name.items()}
+
+        by_card = defaultdict(list)
+        for record in self.printings:
+            by_card[record.card_id].append(record)
+        self.printings_by_card = {card_id: tuple(records) for card_id, records in by_card.items()}
+
+    def card(self, identifier):
+        """
+        Returns the card with `identifier`. Raises `KeyError` if there is none.
+        """
+        return self.cards_by_identifier[identifier]
+
+    def cards_named(self, name):
+        """
+        Returns every card called `name`, matched case-insensitively, e.g. each pitch of a card.
+        """
+        return self.cards_by_name.get(name.lower(), ())
+
+    def printing(self, sku):
+        """
+        Returns the printing with `sku`. Raises `KeyError` if there is none.
+        """
+        return self.printings_by_sku[sku]
+
+    def set(self, code):
+        """
+        Returns the set with `code`, matched case-insensitively. Raises `KeyError` if there is none.
+        """
+        return self.sets_by_code[code.lower()]
+
+    def printings_of(self, card):
+        """
+        Returns the printings of a `CompactCard`.
+        """
+        return self.printings_by_card.get(card.id, ())
+
+    def card_of(self, printing):
+        return self.cards_by_id[printing.card_id]
+
+    def set_of(self, printing):
+        return self.sets_by_id[printing.set_id]
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __getstate__(self):
+        return {'sets': [tuple(record) for record in self.sets],
+                'cards': [tuple(record) for record in self.cards],
+                'printings': [tuple(record) for record in self.printings]}
+
+    def __setstate__(self, state):
+        cards = []
+        for row in state['cards']:
+            row = list(row)
+            row[2] = intern(row[2])
+            row[4] = intern(row[4])
+            row[5] = tuple(intern(keyword) for keyword in row[5])
+            cards.append(CompactCard(*row))
+        self.__init__(
+            (CompactSet(pk, intern(code), name) for pk, code, name in state['sets']),
+            cards,
+            (CompactPrinting(pk, card_id, set_id, sku, intern(rarity), intern(finish), printing_id, image_url,
+                             intern(language))
+             for pk, card_id, set_id, sku, rarity, finish, printing_id, image_url, language in state['printings']),
+        )
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            catalog = pickle.load(f)
+        if not isinstance(catalog, cls):
+            raise ValueError("{} does not contain a {}".format(path, cls.__name__))
+        return catalog
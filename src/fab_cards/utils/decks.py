@@ -0,0 +1,187 @@
+"""
+Parses and validates the deck lists players paste, such as FABDB's text export:
+
+    Hero: Dorinthea Ironsong
+    Weapons: Dawnblade
+    Equipment: Braveforge Bracers, Helm of Isen's Peak
+
+    (3) Warrior's Valor (red)
+    3x Snatch (Red)
+    Sharpen Steel (b) x2
+
+Cards printed in several colors are named with their color, as in `Card.display_name`. Names are
+matched on the indexed `Card.name_key`, so case, accents and punctuation don't matter, and a whole
+list is resolved with one query. Names that match no card get suggestions from the in-memory
+trigram index of `fab_cards.utils.fuzzy`, which costs a second query when the index is (re)built.
+
+Other `Key: value` lines, such as `Class: Warrior`, are ignored.
+"""
+import re
+from collections import OrderedDict, namedtuple
+
+from fab_cards.models import Card, name_key
+from fab_cards.utils.fuzzy import get_trigram_index
+
+DeckEntry = namedtuple('DeckEntry', ['count', 'name', 'section', 'line'])
+
+DeckFormat = namedtuple('DeckFormat', ['name', 'min_cards', 'max_cards', 'max_copies', 'young_hero'])
+
+# `min_cards` and `max_cards` count every card but the hero, `max_copies` limits the copies of each
+# card (a name in one color), and `young_hero` whether the hero must be young or adult.
+FORMATS = {
+    'classic': DeckFormat('Classic Constructed', 60, 80, 3, False),
+    'blitz': DeckFormat('Blitz', 40, 52, 2, True),
+}
+
+SUGGESTIONS = 3
+
+SECTIONS = {'hero': 'hero', 'weapon': 'equipment', 'weapons': 'equipment', 'equipment': 'equipment'}
+COUNT_PREFIX = re.compile(r'^\(?(\d+)\)?\s*x?\s+(.+)$', re.IGNORECASE)
+COUNT_SUFFIX = re.compile(r'^(.+?)\s+x\s*(\d+)$', re.IGNORECASE)
+PITCH_SUFFIX = re.compile(r'\s*\(([ryb123])\)$', re.IGNORECASE)
+PITCH_ALIASES = {'r': 'red', 'y': 'yellow', 'b': 'blue', '1': 'red', '2': 'yellow', '3': 'blue'}
+
+
+def parse_entry(text, section, line):
+    text = text.strip()
+    count = 1
+    match = COUNT_PREFIX.match(text)
+    if match:
+        count, text = int(match.group(1)), match.group(2)
+    else:
+        match = COUNT_SUFFIX.match(text)
+        if match:
+            text, count = match.group(1), int(match.group(2))
+    text = PITCH_SUFFIX.sub(lambda match: ' ({})'.format(PITCH_ALIASES[match.group(1).lower()]), text.strip())
+    return DeckEntry(count, text, section, line)
+
+
+def parse_deck(text):
+    """
+    Returns the `DeckEntry` of every card named in a deck list, in order.
+    """
+    entries = []
+    for line, row in enumerate(text.splitlines(), 1):
+        row = row.strip()
+        if not row or row.startswith(('#', '//')):
+            continue
+        key, colon, value = row.partition(':')
+        if colon and not COUNT_PREFIX.match(row):
+            section = SECTIONS.get(key.strip().lower())
+            if section:
+                entries.extend(parse_entry(name, section, line) for name in value.split(',') if name.strip())
+            continue
+        entries.append(parse_entry(row, 'deck', line))
+    return entries
+
+
+def is_hero(card):
+    return card.life_value is not None and card.intellect_value is not None
+
+
+def is_young(card):
+    return 'young' in (card.keywords or '').lower().split()
+
+
+def suggest(names, limit=SUGGESTIONS):
+    """
+    Returns a dict mapping each of `names` to the display names of up to `limit` cards with similar
+    names, from the process's `TrigramIndex`.
+    """
+    if not names:
+        return {}
+    index = get_trigram_index()
+    return {name: [display_name for _, _, display_name in index.search(name, limit)] for name in names}
+
+
+class Deck(object):
+    """
+    A deck list resolved to cards: its `heroes` (a valid deck has exactly one, its `hero`), the
+    count of every other card in `cards`, and any names matching no card in `unknown`, mapped to
+    suggestions. `errors` lists every way it breaks the rules of its format.
+    """
+
+    def __init__(self, format):
+        self.format = format
+        self.heroes = []
+        self.cards = OrderedDict()
+        self.unknown = OrderedDict()
+        self.errors = []
+
+    @property
+    def hero(self):
+        return self.heroes[0] if len(self.heroes) == 1 else None
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    def __len__(self):
+        return sum(self.cards.values())
+
+
+def resolve_deck(entries, format):
+    """
+    Returns the `Deck` of `entries`, without checking it against the rules. Cards listed under
+    `Hero:`, and heroes listed anywhere but with the equipment, are taken as heroes.
+    """
+    keys = {name_key(entry.name) for entry in entries}
+    cards = {card.name_key: card for card in Card.objects.filter(name_key__in=keys).order_by('-id')}
+
+    deck = Deck(format)
+    for entry in entries:
+        card = cards.get(name_key(entry.name))
+        if card is None:
+            deck.unknown[entry.name] = []
+        elif entry.section == 'hero' or (entry.section == 'deck' and is_hero(card)):
+            if card not in deck.heroes:
+                deck.heroes.append(card)
+        else:
+            deck.cards[card] = deck.cards.get(card, 0) + entry.count
+    return deck
+
+
+def check_deck(deck):
+    """
+    Adds to `deck.errors` every way the deck breaks the rules of its format.
+    """
+    format = deck.format
+    for name, suggestions in deck.unknown.items():
+        if suggestions:
+            deck.errors.append('Unknown card "{}"; did you mean {}?'.format(name, ' or '.join(suggestions)))
+        else:
+            deck.errors.append('Unknown card "{}".'.format(name))
+
+    for card in deck.heroes:
+        if not is_hero(card):
+            deck.errors.append('{} is not a hero.'.format(card))
+    if not deck.heroes:
+        deck.errors.append('The deck has no hero.')
+    elif len(deck.heroes) > 1:
+        deck.errors.append('A deck has one hero, not {}.'.format(len(deck.heroes)))
+    elif is_hero(deck.hero) and format.young_hero is not None and is_young(deck.hero) != format.young_hero:
+        deck.errors.append('{} decks need {} hero, not {}.'.format(
+            format.name, 'a young' if format.young_hero else 'an adult', deck.hero))
+
+    if len(deck) < format.min_cards:
+        deck.errors.append('{} decks have at least {} cards, not {}.'.format(format.name, format.min_cards, len(deck)))
+    elif format.max_cards is not None and len(deck) > format.max_cards:
+        deck.errors.append('{} decks have at most {} cards, not {}.'.format(format.name, format.max_cards, len(deck)))
+    for card, count in deck.cards.items():
+        if count > format.max_copies:
+            deck.errors.append('{} decks have at most {} copies of {}, not {}.'.format(
+                format.name, format.max_copies, card, count))
+
+
+def validate_deck(text, format='classic', suggestions=SUGGESTIONS):
+    """
+    Parses the deck list `text` and returns its `Deck`, checked against the rules of `format`, a
+    key of `FORMATS` or a `DeckFormat`. Unknown names come with up to `suggestions` suggestions.
+    """
+    if not isinstance(format, DeckFormat):
+        format = FORMATS[format]
+    deck = resolve_deck(parse_deck(text), format)
+    if deck.unknown and suggestions:
+        deck.unknown.update(suggest(list(deck.unknown), suggestions))
+    check_deck(deck)
+    return deck
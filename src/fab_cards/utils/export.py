@@ -0,0 +1,184 @@
+"""
+Exports the catalog to flat files for analytics: newline-delimited JSON, CSV and, if `pyarrow` is
+installed (`pip install django-fab-cards[parquet]`), Parquet.
+
+Each table is read with a single `values_list` query through `QuerySet.iterator`, which uses a
+server-side cursor on PostgreSQL and fetches `chunk_size` rows at a time elsewhere, and rows are
+written as they are read, so memory use does not grow with the catalog. The `printings_flat` table
+joins each printing to its card and set in the same query.
+"""
+import csv
+import gzip
+import io
+import os
+from collections import OrderedDict
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from fab_cards.models import Card, Printing, Set
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+CHUNK_SIZE = 2000
+FORMATS = ('ndjson', 'csv', 'parquet')
+
+CARD_COLUMNS = ('identifier', 'name', 'display_name', 'text', 'keywords', 'rarity', 'attack', 'defense',
+                'resource', 'cost', 'intellect', 'life')
+
+
+def model_columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+# The columns of `printings_flat`: a printing's own, then its card's and its set's.
+PRINTING_FLAT_COLUMNS = ['id', 'sku', 'rarity', 'finish', 'printing_id', 'image_url', 'language']
+PRINTING_FLAT_COLUMNS.extend('card__' + column for column in CARD_COLUMNS)
+PRINTING_FLAT_COLUMNS.extend(['set__code', 'set__name'])
+
+# The lookups exported for each table, in column order.
+TABLES = OrderedDict([
+    ('sets', (Set, model_columns(Set))),
+    ('cards', (Card, model_columns(Card))),
+    ('printings', (Printing, model_columns(Printing))),
+    ('printings_flat', (Printing, PRINTING_FLAT_COLUMNS)),
+])
+
+
+def column_name(lookup):
+    return lookup.replace('__', '_')
+
+
+def lookup_field(model, lookup):
+    """
+    Returns the model field that `lookup` (`"card__name"`, `"set_id"`...) reads.
+    """
+    *relations, name = lookup.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return next(field for field in model._meta.concrete_fields if name in (field.name, field.attname))
+
+
+def iter_table(table, chunk_size=CHUNK_SIZE):
+    """
+    Returns the column names of `table` and an iterator over its rows, as tuples in `id` order.
+    """
+    model, lookups = TABLES[table]
+    rows = model.objects.order_by('id').values_list(*lookups).iterator(chunk_size=chunk_size)
+    return [column_name(lookup) for lookup in lookups], rows
+
+
+def open_text(path, compress):
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return io.open(path, 'w', encoding='utf-8', newline='')
+
+
+def write_ndjson(f, columns, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    count = 0
+    for row in rows:
+        f.write(encoder.encode(dict(zip(columns, row))))
+        f.write('\n')
+        count += 1
+    return count
+
+
+def write_csv(f, columns, rows):
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def arrow_type(field):
+    if isinstance(field, models.ForeignKey):
+        field = field.target_field
+    if isinstance(field, (models.AutoField, models.IntegerField)):
+        return pyarrow.int64()
+    if isinstance(field, models.BooleanField):
+        return pyarrow.bool_()
+    if isinstance(field, models.DateTimeField):
+        return pyarrow.timestamp('us', tz='UTC')
+    return pyarrow.string()
+
+
+def require_pyarrow():
+    if pyarrow is None:
+        raise ImportError("Parquet exports require pyarrow: pip install django-fab-cards[parquet]")
+
+
+def write_parquet(path, table, chunk_size=CHUNK_SIZE, compress=False):
+    """
+    Writes `table` to a Parquet file at `path`, one row group per `chunk_size` rows.
+    """
+    require_pyarrow()
+    model, lookups = TABLES[table]
+    columns, rows = iter_table(table, chunk_size)
+    schema = pyarrow.schema([(column, arrow_type(lookup_field(model, lookup)))
+                             for column, lookup in zip(columns, lookups)])
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema, compression='gzip' if compress else 'snappy') as writer:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            arrays = [pyarrow.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+            count += len(chunk)
+    return count
+
+
+def export_table(table, path, format='ndjson', compress=False, chunk_size=CHUNK_SIZE):
+    """
+    Writes `table` to `path` in `format` and returns how many rows were written. Text formats are
+    gzipped if `compress`; Parquet files use gzip instead of snappy column compression.
+
+    The file is written next to `path` and only moved into place once it is complete.
+    """
+    tmp_path = path + '.tmp'
+    try:
+        if format == 'parquet':
+            count = write_parquet(tmp_path, table, chunk_size, compress)
+        else:
+            write = {'ndjson': write_ndjson, 'csv': write_csv}[format]
+            columns, rows = iter_table(table, chunk_size)
+            with open_text(tmp_path, compress) as f:
+                count = write(f, columns, rows)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return count
+
+
+def export_path(directory, table, format, compress=False):
+    path = os.path.join(directory, '{}.{}'.format(table, format))
+    if compress and format != 'parquet':
+        path += '.gz'
+    return path
+
+
+def export_catalog(directory, tables=None, formats=('ndjson',), compress=False, chunk_size=CHUNK_SIZE):
+    """
+    Exports each of `tables` (default: all of `TABLES`) to `directory` in each of `formats`, and
+    returns an ordered dict mapping the path of each file written to its number of rows.
+    """
+    if 'parquet' in formats:
+        require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    written = OrderedDict()
+    for table in tables or TABLES:
+        for format in formats:
+            path = export_path(directory, table, format, compress)
+            written[path] = export_table(table, path, format, compress, chunk_size)
+    return written
@@ -0,0 +1,138 @@
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from fab_cards.utils.http_cache import PageCache
+from fab_cards.utils.instrument import record_cache_hit, record_request
+
+PER_PAGE = 100
+MAX_WORKERS = 8
+MAX_RETRIES = 3
+BACKOFF = 0.5
+TIMEOUT = 30
+
+# Responses with these status codes are worth asking for again; anything else is a real error.
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class PageFetcher(object):
+    """
+    Fetches every page of a paginated FABDB endpoint.
+
+    The first page is requested on its own to learn `meta.last_page`. The remaining pages are then
+    requested concurrently by at most `workers` threads sharing one keep-alive session, and are
+    returned in page order.
+
+    Responses are kept in `cache`, a `PageCache`, which defaults to the one configured in settings;
+    pass `cache=False` to disable it. Pages served from the cache, because they were fetched
+    recently or the server answered `304 Not Modified`, are marked with `"not_modified": true`
+    and their numbers collected in `not_modified`.
+    """
+
+    def __init__(self, url, per_page=PER_PAGE, workers=MAX_WORKERS, retries=MAX_RETRIES, backoff=BACKOFF,
+                 timeout=TIMEOUT, session=None, cache=None):
+        self.url = url
+        self.per_page = per_page
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.owns_session = session is None
+        self.session = session or self.make_session()
+        self.cache = PageCache.from_settings() if cache is None else cache or None
+        self.not_modified = set()
+
+    def make_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        if self.owns_session:
+            self.session.close()
+
+    @staticmethod
+    def should_retry(exc):
+        """
+        Connection errors and timeouts have no response and are always retried; HTTP errors are only
+        retried for the transient statuses in `RETRY_STATUSES`.
+        """
+        response = getattr(exc, 'response', None)
+        if response is None:
+            return True
+        return response.status_code in RETRY_STATUSES
+
+    def fetch_page(self, page):
+        """
+        Returns the decoded JSON of a single page, retrying transient failures with exponential backoff.
+        """
+        params = {'per_page': self.per_page, 'page': page}
+        entry = self.cache.get(self.url, params) if self.cache else None
+        if entry is not None and self.cache.is_fresh(entry):
+            record_cache_hit()
+            return self.cached_page(page, entry)
+
+        attempt = 0
+        while True:
+            r = None
+            start = time.perf_counter()
+            try:
+                r = self.session.get(self.url, params=params, timeout=self.timeout,
+                                     headers=self.cache.headers(entry) if entry else None)
+                if r.status_code == 304 and entry is not None:
+                    self.cache.touch(self.url, params, entry)
+                    return self.cached_page(page, entry)
+                r.raise_for_status()
+                if self.cache:
+                    self.cache.put(self.url, params, r)
+                return r.json()
+            except requests.RequestException as exc:
+                if attempt >= self.retries or not self.should_retry(exc):
+                    raise
+            finally:
+                record_request(time.perf_counter() - start, r)
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    def cached_page(self, page, entry):
+        self.not_modified.add(page)
+        return dict(json.loads(entry['body']), not_modified=True)
+
+    def iter_pages(self):
+        """
+        Yields the decoded JSON of every page, in page order.
+
+        At most twice `workers` pages are requested ahead of the consumer, so a slow consumer (such
+        as one writing each page to the database) overlaps with the network without the fetched
+        pages piling up in memory.
+        """
+        first = self.fetch_page(1)
+        yield first
+        last_page = first['meta']['last_page']
+        if last_page <= 1:
+            return
+        pages = iter(range(2, last_page + 1))
+        with ThreadPoolExecutor(max_workers=min(self.workers, last_page - 1)) as executor:
+            pending = deque(executor.submit(self.fetch_page, page) for page in islice(pages, self.workers * 2))
+            try:
+                while pending:
+                    page_data = pending.popleft().result()
+                    for page in islice(pages, 1):
+                        pending.append(executor.submit(self.fetch_page, page))
+                    yield page_data
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def fetch_pages(self):
+        """
+        Returns a list of the decoded JSON of every page, in page order.
+        """
+        return list(self.iter_pages())
@@ -0,0 +1,231 @@
+"""
+Typo-tolerant lookup of cards by name, ranked by trigram similarity.
+
+On PostgreSQL with the `pg_trgm` extension, `Card.name_key` has a trigram GIN index, created by
+migration 0012, and `fuzzy` queries it. Elsewhere, each process keeps a `TrigramIndex` of the
+cards' names and identifiers in memory, built on first use and rebuilt whenever the catalog
+version changes (see `fab_cards.utils.cache`), so finding the best matches needs no query. Both
+score names as `pg_trgm` does: the number of trigrams two names share over the number of distinct
+trigrams in either.
+"""
+import math
+import threading
+from array import array
+
+from django.db import connections, transaction
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from fab_cards.models import Card, name_key
+from fab_cards.utils.cache import get_catalog_cache
+
+LIMIT = 10
+
+# The lowest similarity worth suggesting, as `pg_trgm.similarity_threshold`.
+THRESHOLD = 0.3
+
+# How many times `limit` candidates to look up per query when a filtered queryset is searched
+# without `pg_trgm`.
+OVERFETCH = 4
+
+_trgm_available = {}
+
+
+def fuzzy_backend(using):
+    """
+    Returns `'postgresql'` if the database `using` has `pg_trgm`, or `None` (use a `TrigramIndex`).
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    if using not in _trgm_available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trgm_available[using] = cursor.fetchone() is not None
+    return 'postgresql' if _trgm_available[using] else None
+
+
+def trigrams(key):
+    """
+    Returns the set of trigrams of a `name_key`, with each word padded as `pg_trgm` pads it.
+    """
+    grams = set()
+    for word in key.split():
+        word = '  {} '.format(word)
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def iter_bits(mask):
+    """
+    Yields the position of every bit set in the non-negative integer `mask`, lowest first.
+    """
+    bits = bin(mask)[:1:-1]
+    position = bits.find('1')
+    while position >= 0:
+        yield position
+        position = bits.find('1', position + 1)
+
+
+class TrigramIndex(object):
+    """
+    An inverted index from trigrams to the cards whose `name_key` or identifier contains them.
+
+    The postings of a trigram are kept as a bitmask over the indexed names, or as an array of
+    positions when that is smaller, and names are also grouped into bitmasks by their number of
+    trigrams. A lookup adds up the bitmasks of the query's trigrams with a bit-sliced counter, which
+    takes a few big-integer operations per trigram. Together with the groups, that gives the names
+    of each possible similarity, best first, so only the names returned are ever looked at.
+    """
+
+    def __init__(self, cards, version=None):
+        """
+        Indexes `cards`, an iterable of `(id, name_key, identifier, display_name)` tuples.
+        """
+        self.version = version
+        self.ids = array('I')
+        self.names = []
+        postings = {}
+        sizes = {}
+        for card_id, key, identifier, display_name in cards:
+            for indexed in {key, name_key(identifier)}:
+                grams = trigrams(indexed)
+                if not grams:
+                    continue
+                doc = len(self.ids)
+                self.ids.append(card_id)
+                self.names.append(display_name)
+                sizes.setdefault(len(grams), array('I')).append(doc)
+                for gram in grams:
+                    postings.setdefault(gram, array('I')).append(doc)
+        # A position takes 32 bits, a bitmask one bit per indexed name.
+        dense = len(self.ids) // 32
+        self.postings = {gram: self.mask(docs) if len(docs) > dense else docs for gram, docs in postings.items()}
+        self.sizes = {size: self.mask(docs) for size, docs in sizes.items()}
+
+    @classmethod
+    def from_db(cls, using='default', version=None):
+        cards = Card.objects.using(using).order_by('id').values_list('id', 'name_key', 'identifier', 'display_name')
+        return cls(cards.iterator(), version)
+
+    def mask(self, docs):
+        bits = bytearray(len(self.ids) // 8 + 1)
+        for doc in docs:
+            bits[doc >> 3] |= 1 << (doc & 7)
+        return int.from_bytes(bits, 'little')
+
+    def search(self, name, limit=LIMIT, threshold=THRESHOLD):
+        """
+        Returns up to `limit` `(similarity, card id, display name)` tuples of the cards most similar
+        to `name`, best first.
+        """
+        grams = trigrams(name_key(name))
+        if not grams or limit < 1:
+            return []
+
+        # Bit `doc` of `planes[i]` is bit `i` of the number of trigrams name `doc` shares with the query.
+        planes = []
+        for gram in grams:
+            carry = self.postings.get(gram, 0)
+            if not isinstance(carry, int):
+                carry = self.mask(carry)
+            for i, plane in enumerate(planes):
+                if not carry:
+                    break
+                planes[i], carry = plane ^ carry, plane & carry
+            if carry:
+                planes.append(carry)
+
+        # The names sharing each number of trigrams with the query. Names sharing fewer than
+        # `threshold * len(grams)` can't be similar enough, whatever their size.
+        shared_masks = {}
+        everything = (1 << len(self.ids)) - 1
+        for shared in range(max(1, math.ceil(threshold * len(grams))), min(len(grams), (1 << len(planes)) - 1) + 1):
+            mask = everything
+            for i, plane in enumerate(planes):
+                mask &= plane if shared >> i & 1 else ~plane
+            if mask:
+                shared_masks[shared] = mask
+
+        groups = sorted(((shared / (len(grams) + size - shared), shared, size)
+                         for shared in shared_masks for size in self.sizes if size >= shared), reverse=True)
+        matches = {}
+        previous = None
+        for similarity, shared, size in groups:
+            if similarity < threshold or (len(matches) >= limit and similarity < previous):
+                break
+            for doc in iter_bits(shared_masks[shared] & self.sizes[size]):
+                matches.setdefault(self.ids[doc], (similarity, self.names[doc]))
+            previous = similarity
+        best = sorted(matches.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        return [(similarity, card_id, display_name) for card_id, (similarity, display_name) in best]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_trigram_index(using='default'):
+    """
+    Returns this process's `TrigramIndex` of the cards in the database `using`, rebuilding it if
+    the catalog changed since it was built. The catalog version is checked as `CatalogCache` lookups
+    check it.
+    """
+    cache = get_catalog_cache()
+    cache.ensure_version()
+    index = _indexes.get(using)
+    if index is None or index.version != cache.version:
+        with _indexes_lock:
+            index = _indexes.get(using)
+            if index is None or index.version != cache.version:
+                index = _indexes[using] = TrigramIndex.from_db(using, cache.version)
+    return index
+
+
+def reset_trigram_indexes():
+    _indexes.clear()
+
+
+def fuzzy(queryset, name, limit=LIMIT, threshold=THRESHOLD):
+    """
+    Returns a list of up to `limit` cards of a `Card` queryset whose names are most similar to
+    `name`, best first, each annotated with its `similarity` (from 0 to 1).
+
+    Without `pg_trgm`, the best matches in the whole catalog are looked up in the queryset, a few
+    times `limit` of them at a time, until enough are found in it or none are left.
+    """
+    key = name_key(name)
+    if fuzzy_backend(queryset.db) == 'postgresql':
+        table = queryset.model._meta.db_table
+        with transaction.atomic(using=queryset.db):
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute('SET LOCAL pg_trgm.similarity_threshold = %s', [threshold])
+            # `%` is pg_trgm's similarity operator, which can use the trigram index.
+            cards = list(queryset.filter(
+                RawSQL('{}.name_key %% %s'.format(table), [key], BooleanField()),
+            ).annotate(
+                similarity=RawSQL('similarity({}.name_key, %s)'.format(table), [key], FloatField()),
+            ).order_by('-similarity', 'name')[:limit])
+            # Rolling back the savepoint of this read-only block undoes the SET LOCAL, which would
+            # otherwise last until the end of the caller's transaction.
+            transaction.set_rollback(True, using=queryset.db)
+        return cards
+
+    index = get_trigram_index(queryset.db)
+    filtered = queryset.query.has_filters()
+    fetch = limit * OVERFETCH if filtered else limit
+    while True:
+        matches = index.search(name, fetch, threshold)
+        cards = queryset.in_bulk([card_id for _, card_id, _ in matches])
+        if not filtered or len(cards) >= limit or len(matches) < fetch:
+            break
+        fetch *= OVERFETCH
+    results = []
+    for similarity, card_id, _ in matches:
+        if card_id in cards:
+            cards[card_id].similarity = similarity
+            results.append(cards[card_id])
+    return results[:limit]
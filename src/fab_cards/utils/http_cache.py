@@ -0,0 +1,119 @@
+"""
+An on-disk cache of API page responses, used by `PageFetcher`.
+
+Each response is stored as a JSON file named after a hash of its URL and query parameters, with its
+`ETag` and `Last-Modified` headers. Within `ttl` seconds of being fetched or revalidated, a page is
+served straight from the cache. After that it is revalidated with a conditional request, and a
+`304 Not Modified` response serves it from the cache again.
+
+An `imported` marker file records that every cached page has since been written to the database by
+an import that committed. Storing a new page removes it. While it exists, `import_cards` can take
+the records on unchanged pages to match their cards without fingerprinting them.
+
+Settings:
+
+- `FAB_CARDS_HTTP_CACHE_DIR`: where to keep responses (default `None`: no cache).
+- `FAB_CARDS_HTTP_CACHE_TTL`: seconds a response is used without revalidating it (default 3600).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+CACHE_TTL = 60 * 60
+IMPORTED_MARKER = 'imported'
+
+
+class PageCache(object):
+
+    def __init__(self, directory, ttl=CACHE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Returns the cache configured in settings, or `None` if there is none.
+        """
+        directory = getattr(settings, 'FAB_CARDS_HTTP_CACHE_DIR', None)
+        if not directory:
+            return None
+        return cls(directory, getattr(settings, 'FAB_CARDS_HTTP_CACHE_TTL', CACHE_TTL))
+
+    def path(self, url, params):
+        key = json.dumps([url, sorted((params or {}).items())])
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url, params):
+        """
+        Returns the cached entry for a request, a dict of `body`, `etag`, `last_modified` and
+        `fetched` (a timestamp), or `None`.
+        """
+        try:
+            with open(self.path(url, params), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched'] < self.ttl
+
+    def headers(self, entry):
+        """
+        Returns the headers that make a request conditional on `entry` having changed.
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, params, response):
+        """
+        Stores a successful `response`, unless it can never be revalidated or reused.
+        """
+        entry = {
+            'body': response.text,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched': time.time(),
+        }
+        if entry['etag'] or entry['last_modified'] or self.ttl > 0:
+            self.set_imported(False)
+            self.write(url, params, entry)
+        return entry
+
+    def touch(self, url, params, entry):
+        """
+        Marks `entry` as revalidated now.
+        """
+        entry['fetched'] = time.time()
+        self.write(url, params, entry)
+
+    def is_imported(self):
+        """
+        Whether every cached page has been imported by an import that committed since it was stored.
+        """
+        return os.path.exists(os.path.join(self.directory, IMPORTED_MARKER))
+
+    def set_imported(self, imported):
+        path = os.path.join(self.directory, IMPORTED_MARKER)
+        if imported:
+            open(path, 'w').close()
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def write(self, url, params, entry):
+        path = self.path(url, params)
+        tmp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
@@ -1,30 +1,188 @@
+import hashlib
 import io
 import json
-import re
+import mmap
+import os
 import zipfile
+from collections import OrderedDict
 from contextlib import closing
 
-import requests
-from django.db import transaction
+from django.db import models, transaction
+from django.utils import timezone
 
-from fab_cards.models import Card, Printing, Set
+from fab_cards.models import (STAT_FIELDS, Card, CardKeyword, CardSearchEntry, Printing, Set, StagedCard,
+                              display_name, name_key, normalize_keyword, parse_stat)
+from fab_cards.utils.bulk import BATCH_SIZE, BulkWriter, ImportStats, chunks
+from fab_cards.utils.cache import bump_catalog_version
+from fab_cards.utils.fetch import PageFetcher
+from fab_cards.utils.http_cache import PageCache
+from fab_cards.utils.instrument import phase, record_stats, timed
+from fab_cards.utils.normalize import CatalogNormalizer, normalize_catalog
+from fab_cards.utils.search import search_backend, update_search_index
 
 API_URL = "https://fabdb.net/api/cards"
 
+SNAPSHOT_FORMAT = "fab-cards-snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MANIFEST = "manifest.json"
+SNAPSHOT_CARDS = "cards.ndjson"
 
-def fetch_data():
-    card_data = []
-    page = 1
-    while True:
-        r = requests.get(API_URL + "?per_page=100&page=" + str(page))
-        r.raise_for_status()
-        page_data = r.json()
-        card_data.extend(page_data['data'])
-        if page_data['meta']['current_page'] == page_data['meta']['last_page']:
-            break
-        page += 1
 
-    return card_data
+def iter_data(url=API_URL, unchanged=None, **kwargs):
+    """
+    Yields the record of every card in the FABDB API, in API order, as its page arrives.
+
+    If `unchanged` is a set, the identifiers on each page served from the HTTP cache, or reported
+    `304 Not Modified`, are added to it before the page's records are yielded. An identifier that
+    also appears on a changed page is never left in it, whichever page comes first. Any `kwargs`
+    (`per_page`, `workers`, `retries`, `backoff`, `timeout`, `session`, `cache`) are passed to
+    `PageFetcher`.
+    """
+    changed = set()
+    with closing(PageFetcher(url, **kwargs)) as fetcher:
+        for page_data in fetcher.iter_pages():
+            if unchanged is not None:
+                identifiers = {card_data['identifier'] for card_data in page_data['data']}
+                if page_data.get('not_modified'):
+                    unchanged.update(identifiers - changed)
+                else:
+                    changed.update(identifiers)
+                    unchanged.difference_update(identifiers)
+            for card_data in page_data['data']:
+                yield card_data
+
+
+def fetch_data(url=API_URL, unchanged=None, **kwargs):
+    """
+    Returns the records of every card in the FABDB API, in API order. See `iter_data`.
+    """
+    return list(iter_data(url, unchanged, **kwargs))
+
+
+def read_ndjson(path):
+    """
+    Yields the records of a newline-delimited JSON dump of the API, one record per line.
+    """
+    with io.open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class SnapshotWriter(object):
+    """
+    Writes API records to a snapshot: a zip file holding the records as deflated newline-delimited
+    JSON (`cards.ndjson`) and a `manifest.json` describing the format version, source and size.
+
+    Records are compressed as they are written. The snapshot is assembled next to `path` and only
+    moved into place once it is complete, so a failed run never leaves a truncated snapshot behind.
+    """
+
+    def __init__(self, path, source=API_URL):
+        self.path = path
+        self.source = source
+        self.count = 0
+
+    def __enter__(self):
+        self.tmp_path = self.path + '.tmp'
+        self.zip_file = zipfile.ZipFile(self.tmp_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self.cards = self.zip_file.open(SNAPSHOT_CARDS, 'w', force_zip64=True)
+        return self
+
+    def write(self, card_data):
+        self.cards.write(json.dumps(card_data, separators=(',', ':')).encode('utf-8') + b'\n')
+        self.count += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cards.close()
+        if exc_type is None:
+            manifest = {
+                'format': SNAPSHOT_FORMAT,
+                'version': SNAPSHOT_VERSION,
+                'source': self.source,
+                'created': timezone.now().isoformat(),
+                'cards': self.count,
+            }
+            self.zip_file.writestr(SNAPSHOT_MANIFEST, json.dumps(manifest, indent=2))
+        self.zip_file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
+
+
+def write_snapshot(records, path, source=API_URL):
+    """
+    Writes `records` to a snapshot at `path` and returns how many were written.
+    """
+    with SnapshotWriter(path, source) as writer:
+        for card_data in records:
+            writer.write(card_data)
+    return writer.count
+
+
+def tee_snapshot(records, writer):
+    for card_data in records:
+        writer.write(card_data)
+        yield card_data
+
+
+class MappedFile(io.RawIOBase):
+    """
+    A read-only, seekable file object over an `mmap`, which `zipfile` cannot use directly before
+    Python 3.13. Reads are served straight from the mapping.
+    """
+
+    def __init__(self, mapped):
+        self.mapped = mapped
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self.mapped.seek(offset, whence)
+        return self.mapped.tell()
+
+    def tell(self):
+        return self.mapped.tell()
+
+    def read(self, size=-1):
+        return self.mapped.read(size if size is not None and size >= 0 else None)
+
+    def readinto(self, buffer):
+        data = self.mapped.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def read_snapshot(path):
+    """
+    Yields the records of the snapshot at `path`.
+
+    The file is memory-mapped rather than read, and records are decompressed one line at a time, so
+    memory use does not grow with the size of the snapshot.
+    """
+    with io.open(path, 'rb') as f, closing(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)) as mapped:
+        with zipfile.ZipFile(MappedFile(mapped)) as zip_file:
+            manifest = json.loads(zip_file.read(SNAPSHOT_MANIFEST).decode('utf-8'))
+            if manifest.get('format') != SNAPSHOT_FORMAT or manifest.get('version') != SNAPSHOT_VERSION:
+                raise ValueError("{} is not a version {} card snapshot.".format(path, SNAPSHOT_VERSION))
+            with zip_file.open(SNAPSHOT_CARDS) as cards:
+                for line in io.TextIOWrapper(cards, encoding='utf-8'):
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def read_file(path):
+    """
+    Yields the records of a snapshot or of a newline-delimited JSON dump, whichever `path` is.
+    """
+    if zipfile.is_zipfile(path):
+        return read_snapshot(path)
+    return read_ndjson(path)
 
 
 class ModelCache(dict):
@@ -46,103 +204,420 @@ class ModelCache(dict):
         return result, created
 
 
-def parse_data(all_data):
-    # Load supertypes, types, and subtypes into memory
-    cache = ModelCache()
-    # Load relevant sets into memory
-    cache[Set] = {obj.code.lower(): obj for obj in Set.objects.all()}
-
-    blacklisted_identifiers = [
-        'crazy-brew-blue', # Duplicate of 'crazy-brew'
-        'cracked-bauble-yellow', # Duplicate of 'cracked-bauble'
-        'flock-of-the-featherwalkers', # Not a real card
-        'flock-of-the-featherwalkers-red', # Not a real card
-    ]
-
-    # We apparently need to pre-process this in order to remove duplicated identifiers.
-    name_to_identifier = {}
-    correct_identifiers = []
-    for card_data in all_data:
-        name = card_data['name'].lower().strip()
-        if card_data['identifier'] in blacklisted_identifiers:
-            continue
-        if name not in name_to_identifier:
-            name_to_identifier[name] = []
-        name_to_identifier[name].append(card_data['identifier'])
-        correct_identifiers.append(card_data['identifier'])
-    for name, identifiers in name_to_identifier.items():
-        has_pitch = False
-        has_non_pitch = False
-        non_pitch_identifiers = []
-        for identifier in identifiers:
-            if re.search(r'-(?:red|yellow|blue)$', identifier):
-                has_pitch = True
-            else:
-                has_non_pitch = True
-                non_pitch_identifiers.append(identifier)
-        if has_pitch and has_non_pitch:
-            for identifier in non_pitch_identifiers:
-                blacklisted_identifiers.append(identifier)
+def card_defaults(card_data):
+    """
+    Returns the `Card` field values, other than `identifier`, described by an API record.
+    """
+    defaults = {'name': card_data['name'].strip()}
+    if 'text' in card_data and card_data['text']:
+        defaults['text'] = card_data['text']
+    else:
+        defaults['text'] = ''
+    if 'keywords' in card_data:
+        defaults['keywords'] = ' '.join(card_data['keywords'])
+    if 'rarity' in card_data:
+        defaults['rarity'] = card_data['rarity']
+    if 'stats' in card_data:
+        defaults.update(card_data['stats'])
+        for stat in STAT_FIELDS:
+            if stat in card_data['stats']:
+                defaults[stat + '_value'] = parse_stat(card_data['stats'][stat])
+    defaults['display_name'] = display_name(card_data['identifier'], defaults['name'],
+                                            (card_data.get('stats') or {}).get('resource'))
+    defaults['name_key'] = name_key(defaults['display_name'])
+    return defaults
 
-    # Remove bad cards
-    for card in Card.objects.all():
-        if card.identifier not in correct_identifiers:
-            card.delete()
 
-    # Update cards
-    for card_data in all_data:
-        if card_data['identifier'] in blacklisted_identifiers:
-            cards = Card.objects.filter(identifier=card_data['identifier'])
-            if cards:
-                cards.delete()
-            continue
-
-        # Get or create the card
-        defaults = {'name': card_data['name'].strip()}
-        if 'text' in card_data and card_data['text']:
-            defaults['text'] = card_data['text']
+def card_keywords(card_data):
+    """
+    Returns the set of normalized keywords of an API record.
+    """
+    return {normalize_keyword(keyword) for keyword in card_data['keywords'] if keyword.strip()}
+
+
+def printing_defaults(printing):
+    """
+    Returns the `Printing` field values, other than `sku`, `card` and `set`, described by an API record.
+    """
+    return {
+        'rarity': printing['rarity'],
+        'finish': printing['sku']['finish'],
+        'printing_id': printing['id'],
+        'image_url': printing['image'],
+        'language': printing['language'],
+    }
+
+
+def fingerprint(values):
+    """
+    Returns a stable SHA-1 hex digest of JSON-serializable `values`.
+    """
+    payload = json.dumps(values, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def printing_fingerprint(identifier, printing):
+    set_data = printing['sku']['set']
+    return fingerprint([identifier, printing['sku']['sku'], set_data['id'], set_data['name'],
+                        printing_defaults(printing)])
+
+
+def card_fingerprint(card_data):
+    """
+    Returns the fingerprint of everything `parse_data` stores from an API record, including its
+    printings. Two records with the same fingerprint produce the same rows.
+    """
+    identifier = card_data['identifier']
+    keywords = sorted(card_keywords(card_data)) if 'keywords' in card_data else None
+    return fingerprint([identifier, card_defaults(card_data), keywords,
+                        [printing_fingerprint(identifier, printing) for printing in card_data['printings']]])
+
+
+def changed_records(records, stats=None, scoped=False, unchanged=()):
+    """
+    Returns the `records` whose fingerprint differs from the one stored on their card, counting the
+    others as unchanged in `stats`. Records whose identifier is in `unchanged`, from pages the API
+    reported unchanged since they were imported, are taken to match a stored card without being
+    fingerprinted.
+
+    By default every stored fingerprint is loaded in one query. With `scoped`, only those of
+    `records` are.
+    """
+    if scoped:
+        stored = {}
+        identifiers = [card_data['identifier'] for card_data in records]
+        for batch in chunks(identifiers, BATCH_SIZE):
+            stored.update(Card.objects.filter(identifier__in=batch).values_list('identifier', 'fingerprint'))
+    else:
+        stored = dict(Card.objects.values_list('identifier', 'fingerprint'))
+    changed = []
+    for card_data in records:
+        identifier = card_data['identifier']
+        trusted = identifier in unchanged and stored.get(identifier)
+        if trusted or stored.get(identifier) == card_fingerprint(card_data):
+            if stats is not None:
+                stats.add(Card, 'unchanged')
+                stats.add(Printing, 'unchanged', len(card_data['printings']))
         else:
-            defaults['text'] = ''
+            changed.append(card_data)
+    return changed
+
+
+def bulk_write(records, batch_size=BATCH_SIZE, stats=None, scoped=False):
+    """
+    Writes `records` with a `BulkWriter`, using a constant number of queries per batch of rows.
+    Later records win when an identifier or SKU appears more than once.
+    """
+    card_rows = OrderedDict()
+    printing_rows = OrderedDict()
+    keyword_rows = {}
+    for card_data in records:
+        identifier = card_data['identifier']
+        card_rows[identifier] = dict(card_defaults(card_data), fingerprint=card_fingerprint(card_data))
         if 'keywords' in card_data:
-            defaults['keywords'] = ' '.join(card_data['keywords'])
-        if 'rarity' in card_data:
-            defaults['rarity'] = card_data['rarity']
-        if 'stats' in card_data:
-            defaults.update(card_data['stats'])
-        card, card_created = Card.objects.update_or_create(
-            identifier=card_data['identifier'],
-            defaults=defaults,
-        )
-
-
-        # Create the printings
+            keyword_rows[identifier] = card_keywords(card_data)
         for printing in card_data['printings']:
+            set_data = printing['sku']['set']
+            values = dict(printing_defaults(printing), fingerprint=printing_fingerprint(identifier, printing))
+            printing_rows[printing['sku']['sku']] = (identifier, set_data['id'], set_data['name'], values)
+    return BulkWriter(batch_size, stats, scoped=scoped).write(card_rows, printing_rows, keyword_rows)
 
-            # Create the set
-            set_code = printing['sku']['set']['id']
-            set_name = printing['sku']['set']['name']
-            card_set, set_created = cache.get_or_create(Set, 'code', set_code, name=set_name)
-
-            printing_sku = printing['sku']['sku']
-            printing_kwargs = {
-                'card': card,
-                'set': card_set,
-                'rarity': printing['rarity'],
-                'finish': printing['sku']['finish'],
-                'printing_id': printing['id'],
-                'image_url': printing['image'],
-                'language': printing['language'],
-            }
-            Printing.objects.update_or_create(
-                sku=printing_sku,
-                defaults=printing_kwargs,
+
+def prune_cards(identifiers, batch_size=BATCH_SIZE):
+    """
+    Deletes every card whose identifier is not in `identifiers`, along with its keywords, printings
+    and search index entry, and returns a tuple of `(cards_deleted, printings_deleted)`.
+
+    Stale cards are found from their `(identifier, id)` pairs and deleted by id, a batch at a time,
+    with one query per table. The rows are deleted directly rather than through Django's deletion
+    collector, so no stale card is ever loaded.
+    """
+    stale = [pk for identifier, pk in Card.objects.values_list('identifier', 'id') if identifier not in identifiers]
+    using = Card.objects.db
+    indexed = search_backend(using) == 'sqlite'
+    cards_deleted = printings_deleted = 0
+    for batch in chunks(stale, batch_size):
+        CardKeyword.objects.filter(card_id__in=batch)._raw_delete(using)
+        printings_deleted += Printing.objects.filter(card_id__in=batch)._raw_delete(using)
+        if indexed:
+            CardSearchEntry.objects.filter(card_id__in=batch)._raw_delete(using)
+        cards_deleted += Card.objects.filter(id__in=batch)._raw_delete(using)
+    return cards_deleted, printings_deleted
+
+
+def parse_data(all_data, bulk=False, batch_size=BATCH_SIZE, changed_only=False, unchanged=()):
+    """
+    Updates the database to match `all_data`, a list of API records, and returns the `ImportStats`.
+
+    By default each card and printing is written with its own `update_or_create`, so every existing
+    row counts as updated. With `bulk`, rows are diffed in memory and written in batches of
+    `batch_size` instead. With `changed_only`, records whose fingerprint matches the stored one, or
+    whose identifier is in `unchanged` (see `changed_records`), are skipped before either kind of
+    write.
+    """
+    stats = ImportStats()
+    with phase('normalize'):
+        catalog = normalize_catalog(all_data)
+
+    # Remove bad cards
+    with phase('prune'):
+        cards_deleted, printings_deleted = prune_cards(catalog.identifiers, batch_size)
+    stats.add(Card, 'deleted', cards_deleted)
+    stats.add(Printing, 'deleted', printings_deleted)
+
+    records = catalog.records
+    if changed_only:
+        with phase('diff'):
+            records = changed_records(records, stats, unchanged=unchanged)
+
+    if bulk:
+        with phase('write'):
+            return bulk_write(records, batch_size, stats, scoped=changed_only)
+
+    # Update cards
+    keywords_by_card = {}
+    with phase('write'):
+        # Load supertypes, types, and subtypes into memory
+        cache = ModelCache()
+        # Load relevant sets into memory
+        cache[Set] = {obj.code.lower(): obj for obj in Set.objects.all()}
+
+        for card_data in records:
+            # Get or create the card
+            card, card_created = Card.objects.update_or_create(
+                identifier=card_data['identifier'],
+                defaults=dict(card_defaults(card_data), fingerprint=card_fingerprint(card_data)),
             )
+            stats.add(Card, 'inserted' if card_created else 'updated')
+            stats.search_ids.add(card.id)
+            if 'keywords' in card_data:
+                keywords_by_card[card.id] = card_keywords(card_data)
+
+            # Create the printings
+            for printing in card_data['printings']:
+
+                # Create the set
+                set_code = printing['sku']['set']['id']
+                set_name = printing['sku']['set']['name']
+                card_set, set_created = cache.get_or_create(Set, 'code', set_code, name=set_name)
+                if set_created:
+                    stats.add(Set, 'inserted')
+
+                printing_sku = printing['sku']['sku']
+                printing_kwargs = dict(printing_defaults(printing), card=card, set=card_set,
+                                       fingerprint=printing_fingerprint(card.identifier, printing))
+                printing_obj, printing_created = Printing.objects.update_or_create(
+                    sku=printing_sku,
+                    defaults=printing_kwargs,
+                )
+                stats.add(Printing, 'inserted' if printing_created else 'updated')
+
+        BulkWriter(batch_size, stats, scoped=changed_only).write_keywords(keywords_by_card)
+    return stats
+
+
+def stream_data(records, batch_size=BATCH_SIZE, changed_only=False, unchanged=()):
+    """
+    Updates the database to match `records`, an iterable of API records, and returns the
+    `ImportStats`.
+
+    Unlike `parse_data`, records are normalized and bulk-written `batch_size` at a time as they are
+    consumed, so only one batch of records is ever held in memory. Whether a plain identifier is
+    shadowed by a pitch variant can only be known once every record has been seen, so stale and
+    shadowed cards are pruned at the end instead of up front. `unchanged` may grow as `records` are
+    consumed, as with `iter_data`.
+    """
+    stats = ImportStats()
+    normalizer = CatalogNormalizer()
+    batch = []
+    for card_data in timed(normalizer.feed(records), 'normalize'):
+        if not normalizer.is_shadowed(card_data):
+            batch.append(card_data)
+        if len(batch) >= batch_size:
+            write_batch(batch, batch_size, stats, changed_only, unchanged)
+            batch = []
+    write_batch(batch, batch_size, stats, changed_only, unchanged)
+
+    with phase('prune'):
+        cards_deleted, printings_deleted = prune_cards(normalizer.identifiers(), batch_size)
+    stats.add(Card, 'deleted', cards_deleted)
+    stats.add(Printing, 'deleted', printings_deleted)
+    return stats
+
+
+def write_batch(records, batch_size, stats, changed_only, unchanged=()):
+    if changed_only:
+        with phase('diff'):
+            records = changed_records(records, stats, scoped=True, unchanged=unchanged)
+    with phase('write'):
+        bulk_write(records, batch_size, stats, scoped=True)
+
 
+def staged_row(card_data):
+    return dict(fingerprint=card_fingerprint(card_data), printings=len(card_data['printings']),
+                record=json.dumps(card_data, separators=(',', ':')))
 
-@transaction.atomic
-def import_cards():
-    all_data = fetch_data()
-    parse_data(all_data)
+
+def clear_staged():
+    StagedCard.objects.all().delete()
+
+
+def stage_records(records, batch_size=BATCH_SIZE):
+    """
+    Replaces the contents of the `StagedCard` table with `records`, which must have unique
+    identifiers, a batch at a time.
+    """
+    clear_staged()
+    for batch in chunks(records, batch_size):
+        StagedCard.objects.bulk_create([StagedCard(identifier=card_data['identifier'], **staged_row(card_data))
+                                        for card_data in batch])
+
+
+def stage_batch(records):
+    """
+    Adds `records` to the `StagedCard` table. A record whose identifier is already staged replaces
+    it in place, so staged cards keep the order in which they first appeared.
+    """
+    rows = OrderedDict((card_data['identifier'], staged_row(card_data)) for card_data in records)
+    existing = StagedCard.objects.in_bulk(list(rows), field_name='identifier') if rows else {}
+    changed = []
+    for identifier, values in rows.items():
+        if identifier in existing:
+            obj = existing[identifier]
+            for name, value in values.items():
+                setattr(obj, name, value)
+            changed.append(obj)
+    if changed:
+        StagedCard.objects.bulk_update(changed, ['fingerprint', 'printings', 'record'])
+    StagedCard.objects.bulk_create([StagedCard(identifier=identifier, **values)
+                                    for identifier, values in rows.items() if identifier not in existing])
+
+
+def staged_import(records, batch_size=BATCH_SIZE, unchanged=()):
+    """
+    Updates the database to match `records`, an iterable of API records, and returns the
+    `ImportStats`, holding a transaction only while the changes are written.
+
+    Records are normalized and loaded into the `StagedCard` table outside any transaction, each with
+    its fingerprint, and then applied with `apply_staged`. Records whose identifier is in
+    `unchanged` and whose card is stored are counted as unchanged without being staged. Staged
+    imports must not run concurrently, as they share the staging table.
+    """
+    stats = ImportStats()
+    with phase('normalize'):
+        catalog = normalize_catalog(records)
+    records = catalog.records
+    if unchanged:
+        with phase('diff'):
+            records = changed_records(records, stats, scoped=True, unchanged=unchanged)
+    with phase('stage'):
+        stage_records(records, batch_size)
+    return apply_staged(catalog.identifiers, batch_size=batch_size, stats=stats)
+
+
+def apply_staged(identifiers, dropped=(), batch_size=BATCH_SIZE, stats=None):
+    """
+    Applies the staged cards to the live tables, and returns the `ImportStats`, adding to `stats`
+    if given.
+
+    Staged cards in `dropped` are discarded first. One query then finds the staged cards whose
+    fingerprint differs from the live one. Only those cards are written, and the cards not in
+    `identifiers` pruned, in one short transaction, which also refreshes the search index entries
+    of just those cards. The staging table is emptied afterwards.
+    """
+    stats = ImportStats() if stats is None else stats
+    with phase('diff'):
+        for batch in chunks(sorted(dropped), batch_size):
+            StagedCard.objects.filter(identifier__in=batch).delete()
+        unchanged = models.Exists(Card.objects.filter(identifier=models.OuterRef('identifier'),
+                                                      fingerprint=models.OuterRef('fingerprint')))
+        totals = StagedCard.objects.filter(unchanged).aggregate(cards=models.Count('id'),
+                                                                printings=models.Sum('printings'))
+        stats.add(Card, 'unchanged', totals['cards'])
+        stats.add(Printing, 'unchanged', totals['printings'] or 0)
+        changed = [json.loads(record) for record in
+                   StagedCard.objects.filter(~unchanged).order_by('id').values_list('record', flat=True)]
+
+    with transaction.atomic():
+        with phase('prune'):
+            cards_deleted, printings_deleted = prune_cards(identifiers, batch_size)
+        stats.add(Card, 'deleted', cards_deleted)
+        stats.add(Printing, 'deleted', printings_deleted)
+        with phase('write'):
+            bulk_write(changed, batch_size, stats, scoped=True)
+        finish_import(stats)
+
+    with phase('stage'):
+        clear_staged()
+    return stats
+
+
+def finish_import(stats):
+    """
+    Refreshes the search index entries of the cards whose name or text the import wrote, and bumps
+    the catalog version if the import changed anything.
+    """
+    with phase('finish'):
+        update_search_index(stats.search_ids)
+        if stats.changed():
+            bump_catalog_version()
+
+
+def import_cards(bulk=False, batch_size=BATCH_SIZE, changed_only=False, stream=False, path=None, snapshot=None,
+                 staged=False):
+    """
+    Imports every card from the FABDB API, or from the snapshot or newline-delimited JSON dump at
+    `path`. If `snapshot` is given, the imported records are also saved there as a snapshot.
+
+    By default the whole catalog is read first and then written by `parse_data` in one transaction.
+    With `stream`, records are written in batches as they arrive, all in one transaction (see
+    `stream_data`). With `staged`, only the changes are written in a transaction, after the
+    catalog has been read and compared (see `staged_import`); `bulk`, `changed_only` and `stream`
+    are then ignored.
+
+    With an HTTP cache (see `fab_cards.utils.http_cache`), `changed_only` and `staged` imports from
+    the API don't fingerprint the records on pages that are unchanged since the last import that
+    committed.
+
+    If anything changed, the catalog version is bumped so that catalog caches reload once the
+    import commits, see `fab_cards.utils.cache`. Run it inside an `ImportReport` to instrument it.
+    """
+    cache = PageCache.from_settings()
+    unchanged = set()
+    fetch_kwargs = {}
+    if cache is not None:
+        if not path and (changed_only or staged) and cache.is_imported():
+            fetch_kwargs['unchanged'] = unchanged
+        # Until this import commits, the cached pages may not match the database.
+        cache.set_imported(False)
+
+    if stream and not staged:
+        with transaction.atomic():
+            records = timed(read_file(path) if path else iter_data(**fetch_kwargs), 'fetch')
+            if snapshot:
+                with SnapshotWriter(snapshot) as writer:
+                    stats = stream_data(timed(tee_snapshot(records, writer), 'snapshot'), batch_size=batch_size,
+                                        changed_only=changed_only, unchanged=unchanged)
+            else:
+                stats = stream_data(records, batch_size=batch_size, changed_only=changed_only, unchanged=unchanged)
+            finish_import(stats)
+    else:
+        with phase('fetch'):
+            all_data = list(read_file(path)) if path else fetch_data(**fetch_kwargs)
+        if snapshot:
+            with phase('snapshot'):
+                write_snapshot(all_data, snapshot)
+        if staged:
+            stats = staged_import(all_data, batch_size=batch_size, unchanged=unchanged)
+        else:
+            with transaction.atomic():
+                stats = parse_data(all_data, bulk=bulk, batch_size=batch_size, changed_only=changed_only,
+                                   unchanged=unchanged)
+                finish_import(stats)
+    if cache is not None and not path:
+        transaction.on_commit(lambda: cache.set_imported(True))
+    record_stats(stats)
+    return stats
 
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+"""
+Instrumentation for `import_cards`.
+
+While an `ImportReport` is active (`with ImportReport() as report: import_cards()`), the importer
+records how long each phase took and how many database queries it made. It also records every HTTP
+request made to the API, and the rows written per model. Phase times are exclusive: time spent in a
+phase nested inside another, such as fetching a page while streaming, only counts towards the
+inner one.
+
+With no report active, `phase` and `timed` do nothing.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+from django.db import connection
+
+from fab_cards.signals import import_finished, import_started
+
+# Upper bounds, in seconds, of the HTTP latency histogram buckets.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_active = None
+
+
+class ImportReport(object):
+    """
+    Collects the instrumentation of the imports run while it is active, and sends the
+    `import_started` and `import_finished` signals.
+    """
+
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.queries = 0
+        self.seconds = None
+        self.stats = {}
+        latency = [('<={}s'.format(bound), 0) for bound in LATENCY_BUCKETS]
+        latency.append(('>{}s'.format(LATENCY_BUCKETS[-1]), 0))
+        self.http = {
+            'requests': 0,
+            'errors': 0,
+            'not_modified': 0,
+            'cached': 0,
+            'bytes': 0,
+            'seconds': 0.0,
+            'latency': OrderedDict(latency),
+        }
+        self._stack = []
+        self._mark = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError("Another import report is already active.")
+        _active = self
+        self._wrapper = connection.execute_wrapper(self._count_query)
+        self._wrapper.__enter__()
+        self._start = time.perf_counter()
+        import_started.send(sender=self.__class__, report=self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active
+        self.seconds = time.perf_counter() - self._start
+        self._wrapper.__exit__(exc_type, exc_value, traceback)
+        _active = None
+        if exc_type is None:
+            import_finished.send(sender=self.__class__, report=self)
+
+    def _charge(self):
+        now = time.perf_counter()
+        if self._stack:
+            self.phases[self._stack[-1]]['seconds'] += now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def phase(self, name):
+        self._charge()
+        self.phases.setdefault(name, {'seconds': 0.0, 'queries': 0})
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._charge()
+            self._stack.pop()
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        if self._stack:
+            self.phases[self._stack[-1]]['queries'] += 1
+        return execute(sql, params, many, context)
+
+    def record_request(self, seconds, response):
+        """
+        Records one HTTP request that took `seconds`. `response` is `None` if none was received.
+        """
+        with self._lock:
+            self.http['requests'] += 1
+            self.http['seconds'] += seconds
+            if response is None or response.status_code >= 400:
+                self.http['errors'] += 1
+            elif response.status_code == 304:
+                self.http['not_modified'] += 1
+            if response is not None:
+                self.http['bytes'] += len(response.content)
+            for bound, label in zip(LATENCY_BUCKETS, self.http['latency']):
+                if seconds <= bound:
+                    self.http['latency'][label] += 1
+                    break
+            else:
+                self.http['latency']['>{}s'.format(LATENCY_BUCKETS[-1])] += 1
+
+    def record_cache_hit(self):
+        """
+        Records a page served from the HTTP cache without a request.
+        """
+        with self._lock:
+            self.http['cached'] += 1
+
+    def as_dict(self):
+        return {
+            'seconds': self.seconds,
+            'queries': self.queries,
+            'phases': OrderedDict((name, dict(values)) for name, values in self.phases.items()),
+            'http': dict(self.http, latency=dict(self.http['latency'])),
+            'rows': self.stats,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+def active_report():
+    return _active
+
+
+def phase(name):
+    """
+    Returns a context manager charging its body to phase `name` of the active report, if any.
+    """
+    if _active is None:
+        return nullcontext()
+    return _active.phase(name)
+
+
+def timed(iterable, name):
+    """
+    Yields the items of `iterable`, charging the time taken to produce each one to phase `name`.
+    """
+    report = _active
+    if report is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with report.phase(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def record_request(seconds, response):
+    if _active is not None:
+        _active.record_request(seconds, response)
+
+
+def record_cache_hit():
+    if _active is not None:
+        _active.record_cache_hit()
+
+
+def record_stats(stats):
+    if _active is not None:
+        _active.stats = stats.as_dict()
@@ -0,0 +1,86 @@
+import re
+from collections import OrderedDict, namedtuple
+
+BLACKLISTED_IDENTIFIERS = frozenset([
+    'crazy-brew-blue',  # Duplicate of 'crazy-brew'
+    'cracked-bauble-yellow',  # Duplicate of 'cracked-bauble'
+    'flock-of-the-featherwalkers',  # Not a real card
+    'flock-of-the-featherwalkers-red',  # Not a real card
+])
+
+PITCH_SUFFIX = re.compile(r'-(?:red|yellow|blue)$')
+
+NormalizedCatalog = namedtuple('NormalizedCatalog', ['records', 'identifiers', 'dropped'])
+
+
+class CatalogNormalizer(object):
+    """
+    Tracks which identifiers in a stream of API records are canonical.
+
+    FABDB serves some cards under both a plain identifier and pitch-suffixed ones (`-red`,
+    `-yellow`, `-blue`). Whenever a name has any pitch-suffixed identifier, its plain identifiers are
+    dropped, as are the identifiers in `blacklist`. All bookkeeping is in sets and dicts, so
+    normalizing is linear in the number of records.
+    """
+
+    def __init__(self, blacklist=BLACKLISTED_IDENTIFIERS):
+        self.blacklist = frozenset(blacklist)
+        self.seen = set()
+        self.pitched_names = set()
+        self.plain_identifiers = {}
+
+    def feed(self, records):
+        """
+        Yields each of `records` that is not blacklisted, indexing it along the way.
+        """
+        for card_data in records:
+            identifier = card_data['identifier']
+            if identifier in self.blacklist:
+                continue
+            name = card_data['name'].lower().strip()
+            self.seen.add(identifier)
+            if PITCH_SUFFIX.search(identifier):
+                self.pitched_names.add(name)
+            else:
+                self.plain_identifiers.setdefault(name, set()).add(identifier)
+            yield card_data
+
+    def is_shadowed(self, card_data):
+        """
+        Whether `card_data` is already known to be shadowed by a pitch variant. A plain record can
+        still become shadowed by a pitch variant that has not been fed yet.
+        """
+        if PITCH_SUFFIX.search(card_data['identifier']):
+            return False
+        return card_data['name'].lower().strip() in self.pitched_names
+
+    def shadowed(self):
+        """
+        Returns the plain identifiers that are superseded by a pitch-suffixed identifier of the same name.
+        """
+        return {
+            identifier
+            for name in self.pitched_names.intersection(self.plain_identifiers)
+            for identifier in self.plain_identifiers[name]
+        }
+
+    def dropped(self):
+        return self.blacklist | self.shadowed()
+
+    def identifiers(self):
+        return self.seen - self.shadowed()
+
+
+def normalize_catalog(records, blacklist=BLACKLISTED_IDENTIFIERS):
+    """
+    Returns a `NormalizedCatalog` of the canonical `records` (one per identifier, in order of first
+    appearance, with later records winning), the set of canonical `identifiers`, and the set of
+    `dropped` identifiers that must not be kept in the database.
+    """
+    normalizer = CatalogNormalizer(blacklist)
+    by_identifier = OrderedDict()
+    for card_data in normalizer.feed(records):
+        by_identifier[card_data['identifier']] = card_data
+    dropped = normalizer.dropped()
+    canonical = [card_data for identifier, card_data in by_identifier.items() if identifier not in dropped]
+    return NormalizedCatalog(canonical, normalizer.identifiers(), dropped)
@@ -0,0 +1,80 @@
+import random
+from array import array
+from collections import Counter
+
+from fab_cards.models import Printing
+from fab_cards.utils.random import WeightedSampler
+
+
+class PackGenerator(object):
+    """
+    Generates booster packs of printings from a single set.
+
+    `template` is a list of slots, one per card in a pack. Each slot is either a rarity code, such
+    as `'C'`, or a dictionary of rarity codes to weights, such as `{'R': 21, 'S': 4, 'M': 1}`.
+
+    The ids of the set's printings are loaded once, into one compact array per rarity; generating
+    packs afterwards never queries the database. Within a pack, slots of the same rarity hold
+    distinct printings whenever the set has enough of them. Pass a seeded `random.Random` as `rng`
+    for reproducible packs.
+    """
+
+    def __init__(self, set_code, template, rng=None, queryset=None):
+        self.set_code = set_code
+        self.rng = rng or random.Random()
+        if queryset is None:
+            queryset = Printing.objects.all()
+
+        self.pools = {}
+        printings = queryset.filter(set__code__iexact=set_code).order_by('id').values_list('rarity', 'id')
+        for rarity, pk in printings.iterator():
+            if rarity not in self.pools:
+                self.pools[rarity] = array('q')
+            self.pools[rarity].append(pk)
+
+        self.slots = [self.make_slot(slot) for slot in template]
+
+    def make_slot(self, slot):
+        if isinstance(slot, dict):
+            weights = {rarity: weight for rarity, weight in slot.items() if rarity in self.pools}
+            if not any(weight > 0 for weight in weights.values()):
+                raise ValueError("Set {} has no printings of rarities {}.".format(self.set_code, sorted(slot)))
+            return WeightedSampler(weights, rng=self.rng)
+        if slot not in self.pools:
+            raise ValueError("Set {} has no printings of rarity {}.".format(self.set_code, slot))
+        return slot
+
+    def generate(self):
+        """
+        Returns one pack, as a list of printing ids in slot order.
+        """
+        rarities = [slot.draw() if isinstance(slot, WeightedSampler) else slot for slot in self.slots]
+        picks = {}
+        for rarity, count in Counter(rarities).items():
+            pool = self.pools[rarity]
+            if count <= len(pool):
+                picks[rarity] = iter(self.rng.sample(pool, count))
+            else:
+                picks[rarity] = iter([self.rng.choice(pool) for _ in range(count)])
+        return [next(picks[rarity]) for rarity in rarities]
+
+    def generate_many(self, count):
+        """
+        Returns a list of `count` packs.
+        """
+        return [self.generate() for _ in range(count)]
+
+    def generate_draft(self, players, packs_per_player):
+        """
+        Returns the packs for a draft or sealed event: one list of `packs_per_player` packs per player.
+        """
+        return [self.generate_many(packs_per_player) for _ in range(players)]
+
+    @staticmethod
+    def printings(packs):
+        """
+        Returns a dictionary of id to `Printing`, with its card and set, for every printing in
+        `packs`, using a single query.
+        """
+        ids = {pk for pack in packs for pk in pack}
+        return Printing.objects.for_display().in_bulk(ids)
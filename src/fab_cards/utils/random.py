@@ -1,16 +1,74 @@
+import heapq
 import random
+from operator import itemgetter
 
 
-def weighted_choice(choices):
+class WeightedSampler(object):
+    """
+    Draws elements from a weighted sample, using Vose's alias method.
+
+    `choices` is a dictionary with labels (buckets) as keys and weights (probabilities) as values.
+    Building the sampler is O(n); every draw afterwards is O(1). Pass a seeded `random.Random` as
+    `rng` for reproducible draws.
+    """
+
+    def __init__(self, choices, rng=None):
+        self.rng = rng or random
+        items = [(bucket, weight) for bucket, weight in choices.items() if weight > 0]
+        if not items:
+            raise ValueError("At least one weight must be positive.")
+        self.buckets = [bucket for bucket, weight in items]
+        self.weights = [weight for bucket, weight in items]
+
+        n = len(items)
+        total = float(sum(self.weights))
+        scaled = [weight * n / total for weight in self.weights]
+        self.probabilities = [1.0] * n
+        self.aliases = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+        # Whatever is left over is 1 up to rounding error, and keeps its default probability of 1.
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def draw(self):
+        """
+        Return a single element.
+        """
+        i = self.rng.randrange(len(self.buckets))
+        if self.rng.random() < self.probabilities[i]:
+            return self.buckets[i]
+        return self.buckets[self.aliases[i]]
+
+    def sample(self, k, replace=True):
+        """
+        Return a list of `k` elements.
+
+        With `replace`, each element is an independent draw. Without it, the elements are distinct,
+        each chosen with probability proportional to its weight among those not yet chosen; this
+        costs O(n log k) per call.
+        """
+        if replace:
+            return [self.draw() for _ in range(k)]
+        if k > len(self.buckets):
+            raise ValueError("Sample larger than population")
+        # Efraimidis and Spirakis: the k largest keys u ** (1 / weight) form a weighted sample.
+        keys = ((self.rng.random() ** (1.0 / weight), bucket) for bucket, weight in zip(self.buckets, self.weights))
+        return [bucket for key, bucket in heapq.nlargest(k, keys, key=itemgetter(0))]
+
+
+def weighted_choice(choices, rng=None):
     """
     Return a single element from a weighted sample.
 
     `choices` is a dictionary with labels (buckets) as keys and weights (probabilities) as values.
+    To draw repeatedly from the same weights, build a `WeightedSampler` once instead.
     """
-    total = sum(choices.values())
-    r = random.uniform(0, total)
-    items = sorted(choices.items(), key=lambda x: x[1])
-    for bucket, weight in items:
-        r -= weight
-        if r <= 0:
-            return bucket
+    return WeightedSampler(choices, rng).draw()
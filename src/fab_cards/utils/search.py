@@ -0,0 +1,124 @@
+"""
+Full-text search over card names and rules text.
+
+On PostgreSQL, `fab_cards_card.search_vector` is a `tsvector` column with a GIN index. On SQLite,
+`fab_cards_card_fts` is an FTS5 table holding a copy of each card's name and text under the card's
+id, which searches join to as `CardSearchEntry`. Both are created by migration 0007. After an
+import, `update_search_index` refreshes the entries of the cards whose name or text it wrote, and
+`rebuild_search_index` rewrites the whole index. Other databases, or SQLite builds without FTS5,
+fall back to `icontains` lookups.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'fab_cards_card_fts'
+
+# The card fields indexed; an import refreshes a card's entry when one of them changes.
+INDEXED_FIELDS = ('name', 'text')
+
+# Ids per statement when refreshing part of the index, below SQLite's limit on query parameters.
+BATCH_SIZE = 500
+
+# Names count ten times as much as rules text when ranking; on SQLite, migration 0007 sets the
+# same weights as the FTS5 table's rank function.
+POSTGRES_VECTOR = ("setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+                   "setweight(to_tsvector('simple', coalesce(text, '')), 'B')")
+
+_fts_available = {}
+
+
+def search_backend(using):
+    """
+    Returns `'postgresql'`, `'sqlite'` or `None` (no full-text index) for the database `using`.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite':
+        if using not in _fts_available:
+            with connection.cursor() as cursor:
+                _fts_available[using] = FTS_TABLE in connection.introspection.table_names(cursor)
+        if _fts_available[using]:
+            return 'sqlite'
+    return None
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search(queryset, query):
+    """
+    Filters a `Card` queryset down to the cards whose name or text contains every word of `query`,
+    treating each word as a prefix. Where a full-text index exists, cards are annotated with a
+    `rank` (higher is better) and ordered by it.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    backend = search_backend(queryset.db)
+    table = queryset.model._meta.db_table
+
+    if backend == 'postgresql':
+        tsquery = ' & '.join(term + ':*' for term in terms)
+        return queryset.filter(
+            RawSQL("{}.search_vector @@ to_tsquery('simple', %s)".format(table), [tsquery], BooleanField()),
+        ).annotate(
+            rank=RawSQL("ts_rank({}.search_vector, to_tsquery('simple', %s))".format(table), [tsquery], FloatField()),
+        ).order_by('-rank', 'name')
+
+    if backend == 'sqlite':
+        match = ' '.join('"{}"*'.format(term) for term in terms)
+        # Joins each card to its `CardSearchEntry`.
+        return queryset.filter(
+            search_entry__isnull=False,
+        ).filter(
+            RawSQL('{} MATCH %s'.format(FTS_TABLE), [match], BooleanField()),
+        ).annotate(
+            rank=-F('search_entry__rank'),
+        ).order_by('-rank', 'name')
+
+    for term in terms:
+        queryset = queryset.filter(Q(name__icontains=term) | Q(text__icontains=term))
+    return queryset.order_by('name')
+
+
+def rebuild_search_index(using='default'):
+    """
+    Brings the whole full-text index up to date with the card table.
+    """
+    backend = search_backend(using)
+    if backend is None:
+        return
+    with connections[using].cursor() as cursor:
+        if backend == 'postgresql':
+            cursor.execute('UPDATE fab_cards_card SET search_vector = {}'.format(POSTGRES_VECTOR))
+        else:
+            cursor.execute('DELETE FROM {}'.format(FTS_TABLE))
+            cursor.execute('INSERT INTO {}(rowid, name, text) SELECT id, name, text FROM fab_cards_card'.format(
+                FTS_TABLE))
+
+
+def update_search_index(ids, using='default'):
+    """
+    Refreshes the full-text index entries of the cards with the given `ids`, including cards that
+    were deleted, with two statements per batch of ids on SQLite and one on PostgreSQL.
+    """
+    backend = search_backend(using)
+    ids = sorted(ids)
+    if backend is None or not ids:
+        return
+    with connections[using].cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            if backend == 'postgresql':
+                cursor.execute('UPDATE fab_cards_card SET search_vector = {} WHERE id IN ({})'.format(
+                    POSTGRES_VECTOR, placeholders), batch)
+            else:
+                cursor.execute('DELETE FROM {} WHERE rowid IN ({})'.format(FTS_TABLE, placeholders), batch)
+                cursor.execute('INSERT INTO {}(rowid, name, text) SELECT id, name, text FROM fab_cards_card '
+                               'WHERE id IN ({})'.format(FTS_TABLE, placeholders), batch)
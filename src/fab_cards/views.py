@@ -0,0 +1,160 @@
+"""
+A read-only JSON API for cards, printings and sets. Include `fab_cards.urls` to serve it:
+
+    path('api/', include('fab_cards.urls')),
+
+Lists are ordered by `id` and paginated with a cursor: each page links to the `next` one with
+`?after=<last id>`, so any page costs one indexed range query, however deep it is. `?limit=` sets
+the page size (at most `MAX_LIMIT`) and `?fields=a,b` selects fields; `id` is always included.
+Rows are read with `values()`, without creating model instances.
+
+Every response carries a strong `ETag` derived from the catalog version, which `import_cards` bumps
+whenever it changes the catalog, so clients and CDNs can revalidate. Conditional requests for an
+unchanged catalog get `304 Not Modified` without querying it.
+
+Settings:
+
+- `FAB_CARDS_API_MAX_AGE`: seconds clients may reuse a response without revalidating it (default 0).
+"""
+import hashlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
+
+from fab_cards.models import Card, Printing, Set
+from fab_cards.utils.cache import get_catalog_cache
+
+PAGE_SIZE = 100
+MAX_LIMIT = 1000
+
+
+def catalog_etag(request, *args, **kwargs):
+    """
+    Returns the ETag of a response: the same request gets the same response until the catalog changes.
+    """
+    key = '{}:{}'.format(get_catalog_cache().current_version(), request.get_full_path())
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class BadRequest(ValueError):
+    pass
+
+
+@method_decorator(condition(etag_func=catalog_etag), name='dispatch')
+class CatalogView(View):
+    """
+    Lists the rows of `model` at `/`, and returns the one whose `lookup_field` is `key` at `/<key>/`.
+
+    `fields` maps each field of the output to the lookup it is read from, and `filters` maps query
+    parameters to the lookups they filter lists on.
+    """
+    model = None
+    fields = OrderedDict()
+    filters = {}
+    lookup_field = None
+    http_method_names = ['get', 'head', 'options']
+
+    def get(self, request, key=None):
+        try:
+            if key is None:
+                data = self.list(request)
+            else:
+                data = self.detail(request, key)
+        except BadRequest as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        except self.model.DoesNotExist:
+            return JsonResponse({'error': 'Not found.'}, status=404)
+        response = JsonResponse(data)
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'FAB_CARDS_API_MAX_AGE', 0))
+        return response
+
+    def get_fields(self, request):
+        """
+        Returns the names of the selected fields.
+        """
+        if not request.GET.get('fields'):
+            return list(self.fields)
+        names = list(OrderedDict.fromkeys(['id'] + request.GET['fields'].split(',')))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise BadRequest('Unknown fields: {}.'.format(', '.join(unknown)))
+        return names
+
+    def get_rows(self, queryset, names):
+        """
+        Returns the rows of `queryset` as dicts of the fields in `names`.
+        """
+        lookups = [self.fields[name] for name in names]
+        rows = queryset.values(*lookups)
+        if lookups == names:
+            return list(rows)
+        # Related fields can't be renamed in the query, as their names clash with the foreign keys.
+        return [{name: row[lookup] for name, lookup in zip(names, lookups)} for row in rows]
+
+    def int_param(self, request, name, default):
+        try:
+            return int(request.GET.get(name, default))
+        except ValueError:
+            raise BadRequest('{} must be an integer.'.format(name))
+
+    def list(self, request):
+        after = self.int_param(request, 'after', 0)
+        limit = min(max(1, self.int_param(request, 'limit', PAGE_SIZE)), MAX_LIMIT)
+        queryset = self.model.objects.filter(id__gt=after)
+        for param, lookup in self.filters.items():
+            if param in request.GET:
+                queryset = queryset.filter(**{lookup: request.GET[param]})
+        # One extra row tells whether there is a next page.
+        rows = self.get_rows(queryset.order_by('id')[:limit + 1], self.get_fields(request))
+
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            query = request.GET.copy()
+            query['after'] = rows[-1]['id']
+            next_url = '{}?{}'.format(request.path, query.urlencode())
+        return {'data': rows, 'next': next_url}
+
+    def detail(self, request, key):
+        rows = self.get_rows(self.model.objects.filter(**{self.lookup_field: key})[:1], self.get_fields(request))
+        if not rows:
+            raise self.model.DoesNotExist
+        return {'data': rows[0]}
+
+
+class CardView(CatalogView):
+    model = Card
+    fields = OrderedDict((name, name) for name in (
+        'id', 'identifier', 'name', 'display_name', 'text', 'keywords', 'rarity',
+        'attack', 'defense', 'resource', 'cost', 'intellect', 'life',
+    ))
+    filters = {'name': 'name'}
+    lookup_field = 'identifier'
+
+
+class PrintingView(CatalogView):
+    model = Printing
+    fields = OrderedDict([
+        ('id', 'id'),
+        ('sku', 'sku'),
+        ('card', 'card__identifier'),
+        ('set', 'set__code'),
+        ('rarity', 'rarity'),
+        ('finish', 'finish'),
+        ('printing_id', 'printing_id'),
+        ('image_url', 'image_url'),
+        ('language', 'language'),
+    ])
+    filters = {'card': 'card__identifier', 'set': 'set__code__iexact'}
+    lookup_field = 'sku'
+
+
+class SetView(CatalogView):
+    model = Set
+    fields = OrderedDict((name, name) for name in ('id', 'code', 'name'))
+    lookup_field = 'code__iexact'
@@ -0,0 +1,67 @@
+from django.test import TestCase
+
+from fab_cards.models import Card, Printing, Set, display_name
+from fab_cards.utils.compact import CompactCatalog
+from fab_cards.utils.import_cards import parse_data
+from tests.utils.catalog import make_card, make_catalog
+
+
+class DisplayNameTests(TestCase):
+
+    def test_import_stores_display_name(self):
+        parse_data([
+            make_card('snatch-red', name='Snatch', stats={'resource': '1'}),
+            make_card('snatch-blue', name='Snatch', stats={'resource': 3}),
+            make_card('dawnblade', stats={}),
+        ], bulk=True)
+        names = dict(Card.objects.values_list('identifier', 'display_name'))
+        self.assertEqual(names, {'snatch-red': 'Snatch (red)', 'snatch-blue': 'Snatch (blue)',
+                                 'dawnblade': 'Dawnblade'})
+
+    def test_save_updates_display_name(self):
+        card = Card.objects.create(identifier='snatch-red', name='Snatch', resource='1')
+        self.assertEqual(card.display_name, 'Snatch (red)')
+        card.name = 'Snatched'
+        card.save(update_fields=['name'])
+        card.refresh_from_db()
+        self.assertEqual(card.display_name, 'Snatched (red)')
+        self.assertEqual(str(card), 'Snatched (red)')
+
+    def test_str_without_display_name(self):
+        self.assertEqual(str(Card(identifier='snatch-yellow', name='Snatch', resource='2')), 'Snatch (yellow)')
+        self.assertEqual(str(Card(identifier='snatch', name='Snatch')), 'Snatch')
+
+    def test_uncolored_resource(self):
+        self.assertEqual(display_name('foo-red', 'Foo', 'X'), 'Foo')
+        self.assertEqual(display_name('foo-red', 'Foo', 4), 'Foo')
+        self.assertEqual(display_name('foo-red', 'Foo', None), 'Foo')
+
+        parse_data([make_card('lunging-press-blue', name='Lunging Press', stats={'resource': 'X'})], bulk=True)
+        card = Card.objects.get()
+        self.assertEqual((card.display_name, card.name_key), ('Lunging Press', 'lunging press'))
+        self.assertEqual(CompactCatalog.from_db().card('lunging-press-blue').display_name, 'Lunging Press')
+
+    def test_str_matches_display_name(self):
+        parse_data(make_catalog(40), bulk=True)
+        for card in Card.objects.all():
+            card_without = Card(identifier=card.identifier, name=card.name, resource=card.resource)
+            self.assertEqual(str(card), str(card_without))
+
+
+class PrintingDisplayTests(TestCase):
+
+    def test_render_in_one_query(self):
+        parse_data(make_catalog(1000), bulk=True)
+        self.assertEqual(Printing.objects.count(), 1000)
+        # Cards and sets are joined in, so rendering any number of printings takes one query.
+        with self.assertNumQueries(1):
+            rendered = [str(printing) for printing in Printing.objects.for_display()]
+        self.assertEqual(len(rendered), 1000)
+        self.assertIn('Synthetic Card 1 (red) (ARC)', rendered)
+
+    def test_for_display_chains(self):
+        parse_data(make_catalog(20), bulk=True)
+        wtr = Set.objects.get(code='WTR')
+        with self.assertNumQueries(1):
+            rendered = [str(printing) for printing in Printing.objects.filter(set=wtr).for_display()]
+        self.assertEqual(len(rendered), Printing.objects.filter(set=wtr).count())
@@ -0,0 +1,60 @@
+import copy
+
+from django.test import TestCase
+
+from fab_cards.models import Card, CardKeyword
+from fab_cards.utils.import_cards import parse_data
+from tests.utils.catalog import make_card
+
+
+class KeywordTests(TestCase):
+
+    CARDS = [
+        make_card('snatch-red', name='Snatch', keywords=['Generic', 'Action', 'Attack']),
+        make_card('head-jab-red', name='Head Jab', keywords=['Ninja', 'Action', 'Attack', 'Go Again']),
+        make_card('flic-flak-red', name='Flic Flak', keywords=['Ninja', 'Action', 'Go Again']),
+        make_card('dawnblade', keywords=['Warrior', 'Weapon', 'Sword']),
+    ]
+
+    def setUp(self):
+        parse_data(self.CARDS, bulk=True)
+
+    def identifiers(self, queryset):
+        return set(queryset.values_list('identifier', flat=True))
+
+    def test_with_all_keywords(self):
+        self.assertEqual(self.identifiers(Card.objects.with_keywords('go again')),
+                         {'head-jab-red', 'flic-flak-red'})
+        self.assertEqual(self.identifiers(Card.objects.with_keywords('Attack', 'NINJA')), {'head-jab-red'})
+        self.assertEqual(self.identifiers(Card.objects.with_keywords('ninja', 'sword')), set())
+
+    def test_with_any_keyword(self):
+        self.assertEqual(self.identifiers(Card.objects.with_keywords('generic', 'warrior', match_any=True)),
+                         {'snatch-red', 'dawnblade'})
+
+    def test_whole_keywords_only(self):
+        self.assertEqual(self.identifiers(Card.objects.with_keywords('go')), set())
+        self.assertEqual(self.identifiers(Card.objects.with_keywords('again')), set())
+
+    def test_chains_with_other_filters(self):
+        self.assertEqual(self.identifiers(Card.objects.filter(name='Flic Flak').with_keywords('action')),
+                         {'flic-flak-red'})
+        self.assertEqual(Card.objects.with_keywords().count(), 4)
+
+    def test_string_field_is_kept(self):
+        self.assertEqual(Card.objects.get(identifier='dawnblade').keywords, 'Warrior Weapon Sword')
+
+    def test_reimport_replaces_keywords(self):
+        cards = copy.deepcopy(self.CARDS)
+        cards[1]['keywords'] = ['Ninja', 'Action', 'Attack']
+        for bulk in (True, False):
+            parse_data(cards, bulk=bulk)
+            self.assertEqual(self.identifiers(Card.objects.with_keywords('go again')), {'flic-flak-red'})
+            self.assertEqual(CardKeyword.objects.count(), 12)
+
+    def test_changed_only_rewrites_changed_keywords(self):
+        cards = copy.deepcopy(self.CARDS)
+        cards[3]['keywords'].append('Legendary')
+        stats = parse_data(cards, bulk=True, changed_only=True)
+        self.assertEqual(stats['CardKeyword']['inserted'], 1)
+        self.assertEqual(self.identifiers(Card.objects.with_keywords('legendary')), {'dawnblade'})
@@ -0,0 +1,54 @@
+import random
+
+from django.test import TestCase
+
+from fab_cards.models import Card, Printing, Set
+
+
+class PrintingRandomTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        card = Card.objects.create(identifier='snatch-red', name='Snatch')
+        wtr = Set.objects.create(name='Welcome to Rathe', code='WTR')
+        arc = Set.objects.create(name='Arcane Rising', code='ARC')
+        Printing.objects.bulk_create([
+            Printing(card=card, set=arc if i % 10 == 0 else wtr, sku='SKU{}'.format(i)) for i in range(300)
+        ])
+        # Leave gaps in the id range.
+        Printing.objects.filter(sku__in=['SKU{}'.format(i) for i in range(50, 150)]).delete()
+
+    def test_distinct_sample(self):
+        sample = list(Printing.objects.random(15).values_list('id', flat=True))
+        self.assertEqual(len(sample), 15)
+        self.assertEqual(len(set(sample)), 15)
+
+    def test_seeded_rng_is_reproducible(self):
+        first = list(Printing.objects.random(20, rng=random.Random(7)).values_list('id', flat=True))
+        second = list(Printing.objects.random(20, rng=random.Random(7)).values_list('id', flat=True))
+        self.assertEqual(first, second)
+
+    def test_respects_filters(self):
+        arc = Printing.objects.filter(set__code='ARC')
+        sample = arc.random(10, rng=random.Random(1))
+        self.assertEqual(sample.count(), 10)
+        self.assertFalse(sample.exclude(set__code='ARC').exists())
+
+    def test_does_not_load_every_id(self):
+        # The lowest and highest ids, one round of candidates, then the sample itself.
+        with self.assertNumQueries(4):
+            ids = list(Printing.objects.random(5, rng=random.Random(3)).values_list('id', flat=True))
+        self.assertEqual(len(ids), 5)
+
+    def test_whole_population(self):
+        arc = Printing.objects.filter(set__code='ARC')
+        self.assertEqual(set(arc.random(arc.count())), set(arc))
+
+    def test_sample_larger_than_population(self):
+        with self.assertRaises(ValueError):
+            Printing.objects.filter(set__code='ARC').random(1000)
+        with self.assertRaises(ValueError):
+            Printing.objects.none().random(1)
+
+    def test_zero(self):
+        self.assertFalse(Printing.objects.random(0).exists())
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+from fab_cards.models import Card
+from fab_cards.utils.import_cards import import_cards, parse_data, write_snapshot
+from fab_cards.utils.search import rebuild_search_index, search_backend, update_search_index
+from tests.utils.catalog import make_card
+
+
+class SearchTests(TestCase):
+
+    CARDS = [
+        make_card('snatch-red', name='Snatch', text='If Snatch hits, draw a card.'),
+        make_card('sink-below-red', name='Sink Below', text='You may put a card from your hand on the bottom '
+                                                            'of your deck. If you do, draw a card.'),
+        make_card('enlightened-strike-red', name='Enlightened Strike',
+                  text='Choose 1: Draw a card; +2 attack; or go again.'),
+        make_card('dawnblade', text='If Dawnblade hits, it gains +1 attack until end of turn.'),
+    ]
+
+    def setUp(self):
+        parse_data(self.CARDS, bulk=True)
+        rebuild_search_index()
+
+    def identifiers(self, queryset):
+        return [card.identifier for card in queryset]
+
+    def test_uses_index(self):
+        self.assertEqual(search_backend('default'), 'sqlite')
+
+    def test_name_and_text(self):
+        self.assertEqual(set(self.identifiers(Card.objects.search('draw'))),
+                         {'snatch-red', 'sink-below-red', 'enlightened-strike-red'})
+        self.assertEqual(self.identifiers(Card.objects.search('Bottom of your DECK')), ['sink-below-red'])
+
+    def test_prefix_match(self):
+        self.assertEqual(self.identifiers(Card.objects.search('enlight str')), ['enlightened-strike-red'])
+        self.assertEqual(self.identifiers(Card.objects.search('dawn')), ['dawnblade'])
+
+    def test_name_ranks_first(self):
+        # "Snatch" appears in the name and text of one card; "hits" only in text.
+        self.assertEqual(self.identifiers(Card.objects.search('snatch hits')), ['snatch-red'])
+        self.assertEqual(self.identifiers(Card.objects.search('dawnblade'))[0], 'dawnblade')
+        results = Card.objects.search('attack')
+        self.assertEqual(set(self.identifiers(results)), {'enlightened-strike-red', 'dawnblade'})
+        self.assertTrue(all(card.rank > 0 for card in results))
+
+    def test_empty_query(self):
+        self.assertEqual(list(Card.objects.search('')), [])
+        self.assertEqual(list(Card.objects.search('  ;; ')), [])
+
+    def test_update_search_index(self):
+        snatch = Card.objects.get(identifier='snatch-red')
+        Card.objects.filter(id=snatch.id).update(text='Pummel them.')
+        Card.objects.filter(identifier='dawnblade').update(text='Pummel them too.')
+        with self.assertNumQueries(2):
+            update_search_index([snatch.id])
+        self.assertEqual(self.identifiers(Card.objects.search('pummel')), ['snatch-red'])
+
+        Card.objects.filter(id=snatch.id).delete()
+        update_search_index([snatch.id])
+        self.assertEqual(self.identifiers(Card.objects.search('pummel')), [])
+
+    def test_chains_with_other_filters(self):
+        self.assertEqual(self.identifiers(Card.objects.filter(rarity='C').search('draw').filter(name='Snatch')),
+                         ['snatch-red'])
+
+
+class SearchIndexImportTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'cards.zip')
+
+    def test_import_refreshes_index(self):
+        write_snapshot([make_card('snatch-red', name='Snatch')], self.path)
+        import_cards(bulk=True, path=self.path)
+        self.assertEqual(Card.objects.search('snatch').count(), 1)
+
+        write_snapshot([make_card('snatch-red', name='Snatch', text='Go again'),
+                        make_card('pummel-red', name='Pummel')], self.path)
+        import_cards(bulk=True, path=self.path)
+        self.assertEqual(Card.objects.search('pummel').count(), 1)
+        self.assertEqual(Card.objects.search('again').count(), 1)
+
+        write_snapshot([make_card('pummel-red', name='Pummel')], self.path)
+        import_cards(bulk=True, path=self.path)
+        self.assertEqual(Card.objects.search('snatch').count(), 0)
+
+    def test_import_refreshes_changed_cards_only(self):
+        cards = [make_card('snatch-red', name='Snatch'), make_card('pummel-red', name='Pummel'),
+                 make_card('dawnblade')]
+        stats = parse_data(cards, bulk=True)
+        update_search_index(stats.search_ids)
+        self.assertEqual(stats.search_ids, set(Card.objects.values_list('id', flat=True)))
+
+        pummel = Card.objects.get(identifier='pummel-red')
+        stats = parse_data([make_card('snatch-red', name='Snatch', rarity='R'),
+                            make_card('pummel-red', name='Pummel', text='Go again')], bulk=True)
+        # A new rarity leaves the index as it was, and pruning removes the deleted card's entry.
+        self.assertEqual(stats.search_ids, {pummel.id})
+        update_search_index(stats.search_ids)
+        self.assertEqual(Card.objects.search('again').get(), pummel)
+        self.assertEqual(Card.objects.search('dawnblade').count(), 0)
+        self.assertEqual(Card.objects.search('snatch').count(), 1)
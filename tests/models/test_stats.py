@@ -0,0 +1,74 @@
+from django.test import TestCase
+
+from fab_cards.models import VARIABLE_STAT, Card, parse_stat
+from fab_cards.utils.import_cards import parse_data
+from tests.utils.catalog import make_card
+
+
+class StatValueTests(TestCase):
+
+    def test_parse_stat(self):
+        self.assertEqual(parse_stat('3'), 3)
+        self.assertEqual(parse_stat(' 0 '), 0)
+        self.assertEqual(parse_stat(2), 2)
+        self.assertEqual(parse_stat('X'), VARIABLE_STAT)
+        self.assertEqual(parse_stat('*'), VARIABLE_STAT)
+        self.assertIsNone(parse_stat(''))
+        self.assertIsNone(parse_stat(None))
+
+    def test_save_populates_values(self):
+        card = Card.objects.create(identifier='snatch-red', name='Snatch', cost='0', resource='1', attack='4')
+        card.refresh_from_db()
+        self.assertEqual((card.cost_value, card.resource_value, card.attack_value), (0, 1, 4))
+        self.assertIsNone(card.defense_value)
+
+        card.attack = 'X'
+        card.save(update_fields=['attack'])
+        card.refresh_from_db()
+        self.assertEqual(card.attack_value, VARIABLE_STAT)
+
+    def test_import_populates_values(self):
+        cards = [
+            make_card('snatch-red', name='Snatch',
+                      stats={'cost': '0', 'resource': '1', 'attack': '4', 'defense': '2'}),
+            make_card('snatch-blue', name='Snatch',
+                      stats={'cost': '0', 'resource': '3', 'attack': '2', 'defense': '2'}),
+            make_card('dawnblade', stats={'attack': '3'}),
+            make_card('kano', stats={'intellect': '4', 'life': '15'}),
+            make_card('lunging-press-blue', stats={'cost': 'X', 'resource': 3}),
+        ]
+        for bulk in (False, True):
+            Card.objects.all().delete()
+            parse_data(cards, bulk=bulk)
+            self.assertEqual(Card.objects.get(identifier='kano').life_value, 15)
+            self.assertEqual(Card.objects.get(identifier='lunging-press-blue').cost_value, VARIABLE_STAT)
+            self.assertEqual(
+                set(Card.objects.filter(cost_value__gte=0, cost_value__lte=2, resource_value=3)
+                    .values_list('identifier', flat=True)),
+                {'snatch-blue'})
+            self.assertEqual(Card.objects.filter(attack_value__gte=3).count(), 2)
+
+    def test_stat_range(self):
+        Card.objects.create(identifier='snatch-red', name='Snatch', cost='0', resource='1', attack='4')
+        Card.objects.create(identifier='lunging-press-blue', name='Lunging Press', cost='X', resource='3')
+        Card.objects.create(identifier='command-and-conquer-red', name='Command and Conquer', cost='2', resource='1')
+        Card.objects.create(identifier='dawnblade', name='Dawnblade', attack='3')
+
+        # A plain `__lte` lookup also matches the variable cost stored as `VARIABLE_STAT`.
+        self.assertEqual(Card.objects.filter(cost_value__lte=2).count(), 3)
+        self.assertEqual(set(Card.objects.stat_range('cost', maximum=2).values_list('identifier', flat=True)),
+                         {'snatch-red', 'command-and-conquer-red'})
+        self.assertEqual(list(Card.objects.stat_range('cost', 1, 2).values_list('identifier', flat=True)),
+                         ['command-and-conquer-red'])
+        self.assertEqual(Card.objects.stat_range('cost').count(), 2)
+        self.assertEqual(Card.objects.stat_range('attack', minimum=3).count(), 2)
+        with self.assertRaises(ValueError):
+            Card.objects.stat_range('power')
+
+    def test_color_bar(self):
+        self.assertEqual(Card(identifier='snatch-red', name='Snatch', resource_value=1).color_bar, 'red')
+        self.assertEqual(Card(identifier='snatch-blue', name='Snatch', resource='3').color_bar, 'blue')
+        self.assertFalse(Card(identifier='dawnblade', name='Dawnblade').color_bar)
+        self.assertFalse(Card(identifier='odd', name='Odd', resource='X').color_bar)
+        card = Card.objects.create(identifier='snatch-yellow', name='Snatch', resource='2')
+        self.assertEqual(str(card), 'Snatch (yellow)')
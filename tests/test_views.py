@@ -0,0 +1,79 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from fab_cards.models import Card, Printing
+from fab_cards.utils.cache import bump_catalog_version
+from fab_cards.utils.import_cards import parse_data
+from tests.utils.catalog import make_catalog
+
+
+class CatalogAPITests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = make_catalog(25)
+        parse_data(cls.catalog, bulk=True)
+
+    def get_json(self, url, status=200, **kwargs):
+        response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def test_pages_follow_the_cursor(self):
+        url = reverse('fab_cards:card-list') + '?limit=10'
+        identifiers = []
+        while url:
+            page = self.get_json(url)
+            self.assertLessEqual(len(page['data']), 10)
+            identifiers.extend(card['identifier'] for card in page['data'])
+            url = page['next']
+        self.assertEqual(identifiers, list(Card.objects.order_by('id').values_list('identifier', flat=True)))
+
+    def test_deep_pages_are_a_range_query(self):
+        last_id = Card.objects.order_by('id').values_list('id', flat=True)[19]
+        with self.assertNumQueries(2) as context:
+            page = self.get_json(reverse('fab_cards:card-list'), data={'after': last_id, 'limit': 10})
+        self.assertEqual(len(page['data']), 5)
+        self.assertIsNone(page['next'])
+        sql = context.captured_queries[-1]['sql']
+        self.assertIn('"id" > {}'.format(last_id), sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_field_selection(self):
+        page = self.get_json(reverse('fab_cards:printing-list'), data={'fields': 'sku,card,set', 'limit': 1})
+        printing = Printing.objects.select_related('card', 'set').order_by('id').first()
+        self.assertEqual(page['data'], [{'id': printing.id, 'sku': printing.sku, 'card': printing.card.identifier,
+                                         'set': printing.set.code}])
+
+        error = self.get_json(reverse('fab_cards:card-list'), status=400, data={'fields': 'name,secret'})
+        self.assertEqual(error, {'error': 'Unknown fields: secret.'})
+        self.get_json(reverse('fab_cards:card-list'), status=400, data={'after': 'x'})
+
+    def test_filters(self):
+        page = self.get_json(reverse('fab_cards:printing-list'), data={'set': 'wtr'})
+        self.assertEqual({printing['set'] for printing in page['data']}, {'WTR'})
+        self.assertEqual(len(page['data']), Printing.objects.filter(set__code='WTR').count())
+
+    def test_detail(self):
+        card = self.catalog[3]
+        data = self.get_json(reverse('fab_cards:card-detail', args=[card['identifier']]))['data']
+        self.assertEqual(data['name'], card['name'])
+        self.assertEqual(self.get_json(reverse('fab_cards:set-detail', args=['wtr']))['data']['code'], 'WTR')
+        self.get_json(reverse('fab_cards:card-detail', args=['missing']), status=404)
+
+    def test_etags_follow_the_catalog_version(self):
+        url = reverse('fab_cards:card-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertNotEqual(self.client.get(url, {'limit': 5})['ETag'], etag)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # What `import_cards` does after changing the catalog.
+        bump_catalog_version()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
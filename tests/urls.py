@@ -1,6 +1,9 @@
 """
 This URLconf exists because Django expects ROOT_URLCONF to exist.
 """
+from django.urls import include, path
 
 
-urlpatterns = []
+urlpatterns = [
+    path('api/', include('fab_cards.urls')),
+]
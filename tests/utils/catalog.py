@@ -0,0 +1,68 @@
+"""
+Builders for FABDB-shaped card records, for tests that should not depend on the live API.
+"""
+PITCHES = ('red', 'yellow', 'blue')
+
+
+def make_printing(sku, set_code='WTR', set_name='Welcome to Rathe', rarity='C', finish='regular', printing_id=None,
+                  language='en'):
+    return {
+        'id': printing_id,
+        'sku': {
+            'sku': sku,
+            'finish': finish,
+            'set': {'id': set_code, 'name': set_name},
+        },
+        'rarity': rarity,
+        'image': 'https://example.com/{}.png'.format(sku),
+        'language': language,
+    }
+
+
+def make_card(identifier, name=None, text='', keywords=None, stats=None, rarity='C', printings=None):
+    if name is None:
+        name = identifier.replace('-', ' ').title()
+    if printings is None:
+        printings = [make_printing(identifier.upper()[:32])]
+    return {
+        'identifier': identifier,
+        'name': name,
+        'text': text,
+        'keywords': keywords or [],
+        'stats': stats or {},
+        'rarity': rarity,
+        'printings': printings,
+    }
+
+
+def make_catalog(num_cards, sets=('WTR', 'ARC', 'CRU', 'MON')):
+    """
+    Returns a synthetic catalog of `num_cards` records in API order.
+
+    Every fourth name is a plain card; the rest come in red/yellow/blue pitch variants, so the
+    catalog exercises the same deduplication paths as the real data.
+    """
+    cards = []
+    index = 0
+    while len(cards) < num_cards:
+        name = 'Synthetic Card {}'.format(index)
+        slug = 'synthetic-card-{}'.format(index)
+        set_code = sets[index % len(sets)]
+        if index % 4 == 0:
+            variants = [(slug, None)]
+        else:
+            variants = [('{}-{}'.format(slug, pitch), str(resource)) for resource, pitch in enumerate(PITCHES, 1)]
+        for identifier, resource in variants:
+            stats = {'cost': str(index % 4), 'defense': '3'}
+            if resource:
+                stats['resource'] = resource
+            sku = '{}{:06d}{}'.format(set_code, len(cards), resource or '')
+            printing = make_printing(sku, set_code=set_code, set_name='Set {}'.format(set_code),
+                                     rarity='CRSML'[index % 5], printing_id=len(cards) + 1)
+            cards.append(make_card(identifier, name=name, text='Text of {}.'.format(name),
+                                   keywords=['action', 'go again'] if index % 2 else ['equipment'],
+                                   stats=stats, printings=[printing]))
+            if len(cards) == num_cards:
+                break
+        index += 1
+    return cards
@@ -0,0 +1,101 @@
+"""
+A local stand-in for the FABDB `/api/cards` endpoint.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query.get('page', ['1'])[0])
+        per_page = int(query.get('per_page', ['100'])[0])
+
+        with server.lock:
+            server.requests.append(page)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            failures = server.failures.get(page, 0)
+            if failures:
+                server.failures[page] = failures - 1
+        try:
+            if server.delay:
+                time.sleep(server.delay)
+            if failures:
+                self.send_error(server.failure_status)
+                return
+            body = json.dumps(server.page(page, per_page)).encode('utf-8')
+            etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+            if server.etags and self.headers.get('If-None-Match') == etag:
+                with server.lock:
+                    server.not_modified += 1
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            if server.etags:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+class StubAPIServer(ThreadingHTTPServer):
+    """
+    Serves `cards` as a paginated FABDB-style API on a free local port.
+
+    `delay` adds latency to every response, and `failures` maps page numbers to the number of times
+    that page should fail with `failure_status` before succeeding. With `etags`, responses carry an
+    `ETag` and conditional requests for unchanged pages get `304 Not Modified`.
+    """
+    daemon_threads = True
+
+    def __init__(self, cards, delay=0, failures=None, failure_status=503, etags=False):
+        super(StubAPIServer, self).__init__(('127.0.0.1', 0), StubAPIHandler)
+        self.cards = cards
+        self.delay = delay
+        self.failures = dict(failures or {})
+        self.failure_status = failure_status
+        self.etags = etags
+        self.lock = threading.Lock()
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.not_modified = 0
+        self.thread = None
+
+    @property
+    def url(self):
+        return 'http://{}:{}/api/cards'.format(*self.server_address)
+
+    def page(self, page, per_page):
+        last_page = max(1, -(-len(self.cards) // per_page))
+        start = (page - 1) * per_page
+        return {
+            'data': self.cards[start:start + per_page],
+            'meta': {'current_page': page, 'last_page': last_page, 'per_page': per_page, 'total': len(self.cards)},
+        }
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
@@ -0,0 +1,63 @@
+import copy
+from unittest import skipIf
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+
+from fab_cards.models import Card, CardKeyword, Printing, StagedCard
+from fab_cards.utils.async_import import httpx
+from fab_cards.utils.import_cards import fetch_data, staged_import
+
+from .catalog import make_card, make_catalog
+from .server import StubAPIServer
+
+if httpx is not None:
+    from fab_cards.utils.async_import import AsyncPageFetcher, async_import_cards
+
+
+def snapshot_tables():
+    return (
+        sorted(Card.objects.values_list('identifier', 'name', 'text', 'display_name', 'fingerprint')),
+        sorted(Printing.objects.values_list('sku', 'card__identifier', 'set__code', 'fingerprint')),
+        sorted(CardKeyword.objects.values_list('card__identifier', 'keyword')),
+    )
+
+
+@skipIf(httpx is None, "httpx is not installed")
+class AsyncImportTests(TestCase):
+
+    def setUp(self):
+        cards = make_catalog(95)
+        # A plain identifier shadowed by the pitch variants of the same name, and a card served
+        # twice, whose later copy wins.
+        changed = dict(copy.deepcopy(cards[10]), text='Served twice.')
+        self.cards = cards[:50] + [make_card('synthetic-card-1', name='Synthetic Card 1')] + cards[50:] + [changed]
+
+    async def test_matches_sync_import(self):
+        with StubAPIServer(self.cards) as server:
+            await sync_to_async(lambda: staged_import(fetch_data(server.url, per_page=10)))()
+            expected = await sync_to_async(snapshot_tables)()
+            await sync_to_async(lambda: Card.objects.all().delete())()
+
+            stats = await async_import_cards(server.url, batch_size=20, per_page=10, concurrency=3)
+        self.assertEqual(await sync_to_async(snapshot_tables)(), expected)
+        self.assertEqual(stats['Card']['inserted'], 95)
+        self.assertFalse(await sync_to_async(StagedCard.objects.exists)())
+        card = await sync_to_async(Card.objects.get)(identifier=self.cards[10]['identifier'])
+        self.assertEqual(card.text, 'Served twice.')
+
+    async def test_reimport_writes_nothing(self):
+        with StubAPIServer(self.cards) as server:
+            await async_import_cards(server.url, per_page=10)
+            stats = await async_import_cards(server.url, per_page=10)
+        self.assertFalse(stats.changed())
+        self.assertEqual(stats['Card']['unchanged'], 95)
+
+    async def test_concurrency_is_bounded(self):
+        with StubAPIServer(make_catalog(200), delay=0.02, failures={3: 1}) as server:
+            fetcher = AsyncPageFetcher(server.url, per_page=10, concurrency=4, backoff=0)
+            pages = [page async for page in fetcher.iter_pages()]
+            await fetcher.aclose()
+        self.assertEqual([page['meta']['current_page'] for page in pages], list(range(1, 21)))
+        self.assertLessEqual(server.max_in_flight, 4)
+        self.assertGreater(server.max_in_flight, 1)
@@ -0,0 +1,73 @@
+import copy
+
+from django.test import TestCase
+
+from fab_cards.models import Card, Printing, Set
+from fab_cards.utils.import_cards import parse_data
+
+from .catalog import make_card, make_catalog, make_printing
+
+
+def snapshot():
+    return (
+        sorted(Card.objects.values_list('identifier', 'name', 'text', 'keywords', 'cost', 'resource', 'rarity')),
+        sorted(Printing.objects.values_list('sku', 'card__identifier', 'set__code', 'rarity', 'printing_id')),
+        sorted(Set.objects.values_list('code', 'name')),
+    )
+
+
+class BulkImportTests(TestCase):
+
+    def test_matches_per_row_import(self):
+        cards = make_catalog(40)
+        cards.append(make_card('crazy-brew-blue'))
+        cards.append(make_card('crazy-brew'))
+
+        parse_data(cards)
+        expected = snapshot()
+        Card.objects.all().delete()
+        Set.objects.all().delete()
+
+        parse_data(cards, bulk=True)
+        self.assertEqual(snapshot(), expected)
+
+    def test_stats(self):
+        cards = make_catalog(20)
+        stats = parse_data(cards, bulk=True)
+        self.assertEqual(+stats['Card'], {'inserted': 20})
+        self.assertEqual(+stats['Printing'], {'inserted': 20})
+        self.assertEqual(stats['Set']['inserted'], 4)
+
+        changed = copy.deepcopy(cards)
+        changed[0]['text'] = 'New text.'
+        changed[1]['printings'][0]['rarity'] = 'F'
+        changed.append(make_card('brand-new', printings=[make_printing('NEW001')]))
+        stats = parse_data(changed, bulk=True)
+        # A changed printing also changes its card's fingerprint.
+        self.assertEqual(+stats['Card'], {'inserted': 1, 'updated': 2, 'unchanged': 18})
+        self.assertEqual(+stats['Printing'], {'inserted': 1, 'updated': 1, 'unchanged': 19})
+        self.assertEqual(Card.objects.get(identifier=cards[0]['identifier']).text, 'New text.')
+        self.assertEqual(Printing.objects.get(sku=cards[1]['printings'][0]['sku']['sku']).rarity, 'F')
+
+    def test_reimport_writes_nothing(self):
+        cards = make_catalog(50)
+        parse_data(cards, bulk=True)
+
+        # The stale-card scan, then loading sets, cards, keywords and printings.
+        with self.assertNumQueries(5):
+            stats = parse_data(cards, bulk=True)
+        self.assertEqual(+stats['Card'], {'unchanged': 50})
+
+    def test_query_count_grows_with_batches(self):
+        parse_data(make_catalog(10), bulk=True)
+        cards = make_catalog(100)
+        for card in cards[:10]:
+            card['text'] = 'Changed.'
+
+        # 5 queries to load, then per batch of 50: two card inserts, one card update, two lookups of the
+        # new card ids, three keyword inserts and two printing inserts.
+        with self.assertNumQueries(15):
+            parse_data(cards, bulk=True, batch_size=50)
+        with self.assertNumQueries(5):
+            parse_data(cards, bulk=True, batch_size=50)
+        self.assertEqual(Card.objects.count(), 100)
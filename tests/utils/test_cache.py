@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from fab_cards.middleware import CatalogVersionMiddleware
+from fab_cards.models import Card, CatalogVersion, Printing, Set
+from fab_cards.utils.cache import CatalogCache, get_catalog_cache, reset_catalog_cache
+from fab_cards.utils.import_cards import import_cards, parse_data, write_snapshot
+
+from .catalog import make_card, make_catalog
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'catalog': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'catalog'},
+}
+
+
+@override_settings(CACHES=CACHES)
+class CatalogCacheTests(TestCase):
+
+    def setUp(self):
+        parse_data(make_catalog(20), bulk=True)
+        self.addCleanup(reset_catalog_cache)
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def tearDown(self):
+        caches['catalog'].clear()
+
+    def test_hits_skip_database(self):
+        cache = CatalogCache()
+        with self.assertNumQueries(2):  # the catalog version, then the card
+            card = cache.card('synthetic-card-1-red')
+        self.assertEqual(card.name, 'Synthetic Card 1')
+        with self.assertNumQueries(0):
+            self.assertIs(cache.card('synthetic-card-1-red'), card)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_printing_and_set(self):
+        cache = CatalogCache()
+        printing = Printing.objects.for_display().first()
+        cache.check_version()
+        with self.assertNumQueries(2):
+            cached = cache.printing(printing.sku)
+            wtr = cache.set('wtr')
+        with self.assertNumQueries(0):
+            self.assertEqual(str(cached), str(printing))
+            self.assertIs(cache.set('WTR'), wtr)
+        self.assertEqual(wtr.code, 'WTR')
+
+    def test_missing(self):
+        cache = CatalogCache()
+        with self.assertRaises(Card.DoesNotExist):
+            cache.card('nope')
+        with self.assertRaises(Set.DoesNotExist):
+            cache.set('NOPE')
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = CatalogCache(max_size=2)
+        cache.card('synthetic-card-0')
+        cache.card('synthetic-card-1-red')
+        cache.card('synthetic-card-0')
+        cache.card('synthetic-card-1-yellow')
+        self.assertEqual(len(cache), 2)
+        with self.assertNumQueries(0):
+            cache.card('synthetic-card-0')
+            cache.card('synthetic-card-1-yellow')
+        with self.assertNumQueries(1):
+            cache.card('synthetic-card-1-red')
+
+    def test_shared_tier(self):
+        first = CatalogCache(cache_alias='catalog')
+        second = CatalogCache(cache_alias='catalog')
+        first.card('synthetic-card-0')
+        with self.assertNumQueries(0):
+            self.assertEqual(second.card('synthetic-card-0').identifier, 'synthetic-card-0')
+
+    def test_version_is_rechecked(self):
+        cache = CatalogCache(recheck=60)
+        with mock.patch('fab_cards.utils.cache.time.monotonic', return_value=1000.0) as monotonic:
+            self.assertEqual(cache.card('synthetic-card-0').name, 'Synthetic Card 0')
+            # Another process imports a change, without this one running the middleware.
+            Card.objects.filter(identifier='synthetic-card-0').update(name='Renamed')
+            CatalogVersion.bump()
+            monotonic.return_value = 1059.0
+            with self.assertNumQueries(0):
+                self.assertEqual(cache.card('synthetic-card-0').name, 'Synthetic Card 0')
+            monotonic.return_value = 1060.0
+            with self.assertNumQueries(2):  # the catalog version, then the card
+                self.assertEqual(cache.card('synthetic-card-0').name, 'Renamed')
+            with self.assertNumQueries(0):
+                cache.card('synthetic-card-0')
+
+    @override_settings(FAB_CARDS_CACHE_RECHECK=None)
+    def test_recheck_disabled(self):
+        cache = CatalogCache()
+        cache.card('synthetic-card-0')
+        CatalogVersion.bump()
+        with mock.patch('fab_cards.utils.cache.time.monotonic', return_value=10 ** 9):
+            with self.assertNumQueries(0):
+                cache.card('synthetic-card-0')
+
+    def import_file(self, cards):
+        path = os.path.join(self.tmpdir, 'cards.zip')
+        write_snapshot(cards, path)
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_cards(bulk=True, path=path)
+
+    def test_import_bumps_version(self):
+        cards = make_catalog(21)
+        self.import_file(cards)
+        self.assertEqual(CatalogVersion.current(), 1)
+
+        # An import that changes nothing leaves the version alone.
+        self.import_file(cards)
+        self.assertEqual(CatalogVersion.current(), 1)
+
+        cards[0] = dict(cards[0], name='Renamed')
+        self.import_file(cards)
+        self.assertEqual(CatalogVersion.current(), 2)
+
+    @override_settings(FAB_CARDS_CACHE_ALIAS='catalog')
+    def test_workers_reload_after_import(self):
+        reset_catalog_cache()
+        local = get_catalog_cache()
+        worker = CatalogCache()
+        middleware = CatalogVersionMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get('/')
+
+        self.assertEqual(local.card('synthetic-card-0').name, 'Synthetic Card 0')
+        self.assertEqual(worker.card('synthetic-card-0').name, 'Synthetic Card 0')
+
+        self.import_file([make_card('synthetic-card-0', name='Renamed')] + make_catalog(20)[1:])
+        # This process publishes the new version as the import commits; other workers find it in
+        # the shared cache on their next request.
+        self.assertEqual(local.version, CatalogVersion.current())
+        self.assertEqual(local.card('synthetic-card-0').name, 'Renamed')
+        self.assertEqual(worker.card('synthetic-card-0').name, 'Synthetic Card 0')
+        with self.assertNumQueries(0):
+            worker.check_version()
+        self.assertEqual(worker.card('synthetic-card-0').name, 'Renamed')
+
+        with self.assertNumQueries(0):
+            middleware(request)
+        self.assertEqual(get_catalog_cache().version, CatalogVersion.current())
@@ -0,0 +1,79 @@
+import os
+import pickle
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+from fab_cards.models import Card, Printing
+from fab_cards.utils.compact import CompactCatalog
+from fab_cards.utils.import_cards import parse_data
+
+from .catalog import make_card, make_catalog, make_printing
+
+
+class CompactCatalogTests(TestCase):
+
+    def setUp(self):
+        parse_data(make_catalog(40) + [
+            make_card('snatch-red', name='Snatch', keywords=['Generic', 'Action'],
+                      stats={'cost': '0', 'resource': '1'},
+                      printings=[make_printing('WTR163', set_code='WTR'), make_printing('U-WTR163', set_code='WTR')]),
+        ], bulk=True)
+
+    def test_from_db(self):
+        with self.assertNumQueries(4):
+            catalog = CompactCatalog.from_db()
+        self.assertEqual(len(catalog), Card.objects.count())
+        self.assertEqual(len(catalog.printings), Printing.objects.count())
+
+        card = catalog.card('snatch-red')
+        self.assertEqual((card.name, card.display_name, card.cost, card.resource, card.attack),
+                         ('Snatch', 'Snatch (red)', 0, 1, None))
+        self.assertEqual(card.keywords, ('action', 'generic'))
+        self.assertEqual([printing.sku for printing in catalog.printings_of(card)], ['WTR163', 'U-WTR163'])
+
+        printing = catalog.printing('U-WTR163')
+        self.assertIs(catalog.card_of(printing), card)
+        self.assertIs(catalog.set_of(printing), catalog.set('wtr'))
+        self.assertEqual(catalog.set('WTR').code, 'WTR')
+
+        self.assertEqual(len(catalog.cards_named('synthetic card 1')), 3)
+        self.assertEqual(catalog.cards_named('nope'), ())
+        with self.assertRaises(KeyError):
+            catalog.card('nope')
+
+    def test_records_are_immutable(self):
+        catalog = CompactCatalog.from_db()
+        with self.assertRaises(AttributeError):
+            catalog.card('snatch-red').name = 'Snatched'
+
+    def test_strings_are_interned(self):
+        catalog = CompactCatalog.from_db()
+        codes = {id(catalog.set_of(printing).code) for printing in catalog.printings}
+        self.assertEqual(len(codes), len(catalog.sets))
+        finishes = {id(printing.finish) for printing in catalog.printings}
+        self.assertEqual(len(finishes), len({printing.finish for printing in catalog.printings}))
+
+    def test_pickle_round_trip(self):
+        catalog = CompactCatalog.from_db()
+        copy = pickle.loads(pickle.dumps(catalog, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copy.cards, catalog.cards)
+        self.assertEqual(copy.printings, catalog.printings)
+        self.assertEqual(copy.card('snatch-red'), catalog.card('snatch-red'))
+        rarities = {id(card.rarity) for card in copy.cards}
+        self.assertEqual(len(rarities), len({card.rarity for card in copy.cards}))
+
+    def test_save_and_load(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'catalog.pickle')
+        CompactCatalog.from_db().save(path)
+        with self.assertNumQueries(0):
+            catalog = CompactCatalog.load(path)
+        self.assertEqual(catalog.printing('WTR163').sku, 'WTR163')
+
+        with open(path, 'wb') as f:
+            pickle.dump({'not': 'a catalog'}, f)
+        with self.assertRaises(ValueError):
+            CompactCatalog.load(path)
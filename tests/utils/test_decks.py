@@ -0,0 +1,118 @@
+from django.test import TestCase
+
+from fab_cards.models import Card, name_key
+from fab_cards.utils.cache import get_catalog_cache, reset_catalog_cache
+from fab_cards.utils.decks import parse_deck, validate_deck
+from fab_cards.utils.fuzzy import reset_trigram_indexes
+from fab_cards.utils.import_cards import parse_data
+
+from .catalog import make_card, make_catalog
+
+HEROES = [
+    make_card('dorinthea-ironsong', keywords=['warrior', 'hero'], stats={'life': '40', 'intellect': '4'}),
+    make_card('dorinthea', keywords=['warrior', 'hero', 'young'], stats={'life': '20', 'intellect': '4'}),
+    make_card('rhinar-reckless-rampage', keywords=['brute', 'hero'], stats={'life': '40', 'intellect': '4'}),
+]
+
+
+class ParseDeckTests(TestCase):
+
+    def test_formats(self):
+        entries = parse_deck("""
+            Deck build - via https://fabdb.net :
+            Class: Warrior
+            Hero: Dorinthea Ironsong
+            Weapons: Dawnblade
+            Equipment: Braveforge Bracers, Helm of Isen's Peak
+
+            # Attacks
+            (3) Warrior's Valor (red)
+            2x Snatch (Y)
+            Sharpen Steel x2
+            Glint the Quicksilver
+        """)
+        self.assertEqual([(entry.count, entry.name, entry.section) for entry in entries], [
+            (1, 'Dorinthea Ironsong', 'hero'),
+            (1, 'Dawnblade', 'equipment'),
+            (1, 'Braveforge Bracers', 'equipment'),
+            (1, "Helm of Isen's Peak", 'equipment'),
+            (3, "Warrior's Valor (red)", 'deck'),
+            (2, 'Snatch (yellow)', 'deck'),
+            (2, 'Sharpen Steel', 'deck'),
+            (1, 'Glint the Quicksilver', 'deck'),
+        ])
+        self.assertEqual(entries[4].line, 9)
+
+    def test_name_key(self):
+        self.assertEqual(name_key("Warrior's  Valor (Red)"), 'warriors valor red')
+        self.assertEqual(name_key('Éclat-de-Lune'), 'eclat de lune')
+
+
+class ValidateDeckTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        parse_data(make_catalog(100) + HEROES, bulk=True)
+
+    def setUp(self):
+        reset_trigram_indexes()
+        self.addCleanup(reset_trigram_indexes)
+        self.addCleanup(reset_catalog_cache)
+        # As `CatalogVersionMiddleware` does at the start of each request.
+        get_catalog_cache().check_version()
+
+    def deck_list(self, hero='Dorinthea Ironsong', copies=3, names=20):
+        cards = Card.objects.exclude(life__isnull=False).order_by('id')[:names]
+        return 'Hero: {}\n'.format(hero) + '\n'.join('({}) {}'.format(copies, card) for card in cards)
+
+    def test_valid_deck_takes_one_query(self):
+        text = self.deck_list()
+        with self.assertNumQueries(1):
+            deck = validate_deck(text)
+        self.assertEqual(deck.errors, [])
+        self.assertTrue(deck.is_valid)
+        self.assertEqual(deck.hero.identifier, 'dorinthea-ironsong')
+        self.assertEqual(len(deck), 60)
+
+    def test_names_are_normalized(self):
+        deck = validate_deck('SYNTHETIC  card 1 (r) x3\nsynthetic-card-0\nDorinthea Ironsong', suggestions=0)
+        self.assertEqual({card.identifier: count for card, count in deck.cards.items()},
+                         {'synthetic-card-1-red': 3, 'synthetic-card-0': 1})
+        self.assertEqual(deck.hero.identifier, 'dorinthea-ironsong')
+
+    def test_unknown_names_get_suggestions(self):
+        text = self.deck_list() + '\nSynthetic Crad 2 (blue)\nSynthetic Card 1\nNothing Like It'
+        with self.assertNumQueries(2):
+            deck = validate_deck(text)
+        self.assertEqual(list(deck.unknown), ['Synthetic Crad 2 (blue)', 'Synthetic Card 1', 'Nothing Like It'])
+        self.assertEqual(deck.unknown['Synthetic Crad 2 (blue)'][0], 'Synthetic Card 2 (blue)')
+        self.assertEqual(len(deck.unknown['Synthetic Card 1']), 3)
+        self.assertEqual(deck.unknown['Nothing Like It'], [])
+        self.assertIn('Unknown card "Synthetic Crad 2 (blue)"; did you mean Synthetic Card 2 (blue)', deck.errors[0])
+        self.assertEqual(deck.errors[2], 'Unknown card "Nothing Like It".')
+
+        # The suggestions' index is only built once per catalog version.
+        with self.assertNumQueries(1):
+            validate_deck(text)
+
+    def test_counts(self):
+        deck = validate_deck(self.deck_list(copies=4))
+        self.assertEqual(len(deck.errors), 20)
+        self.assertEqual(deck.errors[0], 'Classic Constructed decks have at most 3 copies of Synthetic Card 0, not 4.')
+
+        deck = validate_deck(self.deck_list(names=10))
+        self.assertEqual(deck.errors, ['Classic Constructed decks have at least 60 cards, not 30.'])
+
+    def test_heroes(self):
+        deck = validate_deck(self.deck_list(hero='Dorinthea'))
+        self.assertEqual(deck.errors, ['Classic Constructed decks need an adult hero, not Dorinthea.'])
+
+        deck = validate_deck(self.deck_list(hero='Synthetic Card 0'))
+        self.assertEqual(deck.errors, ['Synthetic Card 0 is not a hero.'])
+
+        deck = validate_deck(self.deck_list() + '\nRhinar, Reckless Rampage')
+        self.assertIsNone(deck.hero)
+        self.assertEqual(deck.errors, ['A deck has one hero, not 2.'])
+
+        deck = validate_deck(self.deck_list(hero='Dorinthea', copies=2), format='blitz')
+        self.assertEqual(deck.errors, [])
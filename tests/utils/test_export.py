@@ -0,0 +1,89 @@
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import skipIf
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from fab_cards.models import Card, Printing
+from fab_cards.utils import export
+from fab_cards.utils.export import export_catalog, export_table
+from fab_cards.utils.import_cards import parse_data
+
+from .catalog import make_catalog
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        parse_data(make_catalog(25), bulk=True)
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def read_ndjson(self, path, opener=io.open):
+        with opener(path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_ndjson(self):
+        written = export_catalog(self.tmpdir, tables=['cards', 'printings'])
+        self.assertEqual(written, {self.path('cards.ndjson'): 25, self.path('printings.ndjson'): 25})
+
+        rows = self.read_ndjson(self.path('cards.ndjson'))
+        card = Card.objects.order_by('id').first()
+        self.assertEqual(rows[0]['identifier'], card.identifier)
+        self.assertEqual(rows[0]['cost_value'], card.cost_value)
+        self.assertEqual(self.read_ndjson(self.path('printings.ndjson'))[0]['card_id'], card.id)
+
+    def test_flat_export_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(export_table('printings_flat', self.path('flat.ndjson'), chunk_size=10), 25)
+
+        rows = self.read_ndjson(self.path('flat.ndjson'))
+        printings = Printing.objects.select_related('card', 'set').order_by('id')
+        self.assertEqual([(row['sku'], row['card_display_name'], row['set_code']) for row in rows],
+                         [(p.sku, p.card.display_name, p.set.code) for p in printings])
+
+    def test_csv_gzip(self):
+        written = export_catalog(self.tmpdir, tables=['sets'], formats=['csv'], compress=True)
+        self.assertEqual(list(written), [self.path('sets.csv.gz')])
+        with gzip.open(self.path('sets.csv.gz'), 'rt', encoding='utf-8', newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['id', 'name', 'code'])
+        self.assertEqual(sorted(row[2] for row in rows[1:]), ['ARC', 'CRU', 'MON', 'WTR'])
+
+    def test_failed_export_leaves_no_file(self):
+        with self.assertRaises(KeyError):
+            export_table('cards', self.path('cards.xml'), format='xml')
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    @skipIf(export.pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        export_catalog(self.tmpdir, tables=['printings_flat'], formats=['parquet'], chunk_size=10)
+        table = export.pyarrow.parquet.read_table(self.path('printings_flat.parquet'))
+        self.assertEqual(table.num_rows, 25)
+        self.assertEqual(str(table.schema.field('id').type), 'int64')
+        self.assertEqual(table.column('card_identifier').to_pylist(),
+                         list(Printing.objects.order_by('id').values_list('card__identifier', flat=True)))
+
+    @skipIf(export.pyarrow is not None, "pyarrow is installed")
+    def test_parquet_requires_pyarrow(self):
+        with self.assertRaises(CommandError):
+            call_command('export_fab_cards', self.tmpdir, format=['parquet'], stdout=io.StringIO())
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_fab_cards', self.tmpdir, '--table', 'sets', '--table', 'printings_flat',
+                     '--format', 'csv', '--gzip', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), ['Wrote 4 rows to sets.csv.gz.',
+                                                       'Wrote 25 rows to printings_flat.csv.gz.'])
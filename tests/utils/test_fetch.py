@@ -0,0 +1,70 @@
+import requests
+from django.test import SimpleTestCase
+
+from fab_cards.utils.fetch import PageFetcher
+from fab_cards.utils.import_cards import fetch_data
+
+from .catalog import make_catalog
+from .server import StubAPIServer
+
+
+class FetchDataTests(SimpleTestCase):
+
+    def test_pages_are_returned_in_order(self):
+        cards = make_catalog(250)
+        with StubAPIServer(cards) as server:
+            fetched = fetch_data(server.url, per_page=10)
+
+        self.assertEqual([card['identifier'] for card in fetched], [card['identifier'] for card in cards])
+        self.assertEqual(sorted(server.requests), list(range(1, 26)))
+
+    def test_single_page(self):
+        cards = make_catalog(5)
+        with StubAPIServer(cards) as server:
+            fetched = fetch_data(server.url)
+
+        self.assertEqual(fetched, cards)
+        self.assertEqual(server.requests, [1])
+
+    def test_remaining_pages_are_fetched_concurrently(self):
+        cards = make_catalog(100)
+        with StubAPIServer(cards, delay=0.05) as server:
+            fetched = fetch_data(server.url, per_page=10, workers=4)
+
+        self.assertEqual(len(fetched), 100)
+        # The first page is always requested alone; the rest overlap, bounded by the pool size.
+        self.assertEqual(server.requests[0], 1)
+        self.assertGreater(server.max_in_flight, 1)
+        self.assertLessEqual(server.max_in_flight, 4)
+
+    def test_transient_failures_are_retried(self):
+        cards = make_catalog(30)
+        with StubAPIServer(cards, failures={1: 1, 3: 2}) as server:
+            fetched = fetch_data(server.url, per_page=10, backoff=0)
+
+        self.assertEqual(len(fetched), 30)
+        self.assertEqual(server.requests.count(1), 2)
+        self.assertEqual(server.requests.count(3), 3)
+
+    def test_retries_are_bounded(self):
+        with StubAPIServer(make_catalog(30), failures={2: 5}) as server:
+            with self.assertRaises(requests.HTTPError):
+                fetch_data(server.url, per_page=10, retries=2, backoff=0)
+
+        self.assertEqual(server.requests.count(2), 3)
+
+    def test_client_errors_are_not_retried(self):
+        with StubAPIServer(make_catalog(30), failures={2: 5}, failure_status=404) as server:
+            with self.assertRaises(requests.HTTPError):
+                fetch_data(server.url, per_page=10, backoff=0)
+
+        self.assertEqual(server.requests.count(2), 1)
+
+    def test_session_is_shared(self):
+        session = requests.Session()
+        with StubAPIServer(make_catalog(30)) as server:
+            fetcher = PageFetcher(server.url, per_page=10, session=session)
+            pages = fetcher.fetch_pages()
+
+        self.assertIs(fetcher.session, session)
+        self.assertEqual([page['meta']['current_page'] for page in pages], [1, 2, 3])
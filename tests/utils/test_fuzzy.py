@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from fab_cards.models import Card
+from fab_cards.utils.cache import bump_catalog_version, get_catalog_cache, reset_catalog_cache
+from fab_cards.utils.fuzzy import TrigramIndex, get_trigram_index, reset_trigram_indexes, trigrams
+from fab_cards.utils.import_cards import parse_data
+
+from .catalog import make_card, make_catalog
+
+
+class TrigramIndexTests(TestCase):
+
+    def test_trigrams_match_pg_trgm(self):
+        # SELECT show_trgm('snatch red')
+        self.assertEqual(trigrams('snatch red'), {'  s', ' sn', 'sna', 'nat', 'atc', 'tch', 'ch ',
+                                                  '  r', ' re', 'red', 'ed '})
+
+    def test_search(self):
+        index = TrigramIndex([
+            (1, 'snatch red', 'snatch-red', 'Snatch (red)'),
+            (2, 'snatch blue', 'snatch-blue', 'Snatch (blue)'),
+            (3, 'dawnblade', 'dawnblade', 'Dawnblade'),
+            (4, 'dawnblade resplendent', 'dawnblade-resplendent', 'Dawnblade, Resplendent'),
+        ])
+        matches = index.search('Snatch (Red)')
+        self.assertEqual([card_id for _, card_id, _ in matches], [1, 2])
+        self.assertEqual(matches[0][0], 1.0)
+        self.assertEqual([name for _, _, name in index.search('dawnbalde', limit=1)], ['Dawnblade'])
+        self.assertEqual(index.search('zzz'), [])
+        self.assertEqual(index.search('!!'), [])
+
+    def test_identifiers_are_indexed(self):
+        index = TrigramIndex([(1, 'spoils of war', 'spoils-of-war-wtr', 'Spoils of War')])
+        self.assertEqual(len(index), 2)
+        self.assertEqual([card_id for _, card_id, _ in index.search('spoils of war wtr')], [1])
+
+
+class FuzzyLookupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        parse_data(make_catalog(200) + [make_card('warriors-valor-red', name="Warrior's Valor",
+                                                  stats={'resource': '1'})], bulk=True)
+
+    def setUp(self):
+        reset_trigram_indexes()
+        self.addCleanup(reset_trigram_indexes)
+        self.addCleanup(reset_catalog_cache)
+        get_catalog_cache().check_version()
+
+    def test_fuzzy(self):
+        cards = Card.objects.fuzzy('warior valour', limit=3)
+        self.assertEqual(cards[0].identifier, 'warriors-valor-red')
+        self.assertGreater(cards[0].similarity, 0.3)
+
+        cards = Card.objects.fuzzy('Synthetic Crad 13 (yellow)', limit=5)
+        self.assertEqual(cards[0].identifier, 'synthetic-card-13-yellow')
+        self.assertEqual(len(cards), 5)
+        self.assertEqual(cards, sorted(cards, key=lambda card: -card.similarity))
+
+    def test_queryset_filters_apply(self):
+        get_trigram_index()
+        # Two rounds of candidates, 40 then 160 cards, without reading the ids of every blue card.
+        with self.assertNumQueries(2) as context:
+            cards = Card.objects.filter(resource_value=3).fuzzy('synthetic card 13', limit=10)
+        self.assertTrue(all('"fab_cards_card"."id" IN' in query['sql'] for query in context.captured_queries))
+        self.assertEqual(cards[0].identifier, 'synthetic-card-13-blue')
+        self.assertEqual(len(cards), 10)
+        self.assertTrue(all(card.resource_value == 3 for card in cards))
+        self.assertEqual(Card.objects.filter(resource_value=3, name='Nope').fuzzy('synthetic card 13'), [])
+
+    def test_rare_queryset_matches_are_found(self):
+        get_trigram_index()
+        # Worse matches than the first few rounds of candidates.
+        cards = Card.objects.filter(name='Synthetic Card 79').fuzzy('synthetic card 13', limit=2)
+        self.assertEqual([card.name for card in cards], ['Synthetic Card 79'] * 2)
+
+    def test_index_is_reused_until_the_catalog_changes(self):
+        Card.objects.fuzzy('snatch')
+        with self.assertNumQueries(1):
+            Card.objects.fuzzy('synthetic card 3')
+        index = get_trigram_index()
+
+        parse_data([make_card('snatch-red', name='Snatch', stats={'resource': '1'})], bulk=True)
+        self.assertFalse(Card.objects.fuzzy('snatch red'))
+        bump_catalog_version()
+        get_catalog_cache().check_version()
+        self.assertEqual(Card.objects.fuzzy('snatch red')[0].identifier, 'snatch-red')
+        self.assertIsNot(get_trigram_index(), index)
+
+    def test_index_is_rebuilt_after_the_version_recheck(self):
+        index = get_trigram_index()
+        parse_data([make_card('snatch-red', name='Snatch', stats={'resource': '1'})], bulk=True)
+        bump_catalog_version()
+        self.assertIs(get_trigram_index(), index)
+        recheck = get_catalog_cache().checked + get_catalog_cache().recheck
+        with mock.patch('fab_cards.utils.cache.time.monotonic', return_value=recheck):
+            self.assertEqual(Card.objects.fuzzy('snatch red')[0].identifier, 'snatch-red')
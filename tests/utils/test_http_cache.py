@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from fab_cards.utils.fetch import PageFetcher
+from fab_cards.utils.http_cache import PageCache
+from fab_cards.utils.import_cards import fetch_data
+from fab_cards.utils.instrument import ImportReport
+
+from .catalog import make_catalog
+from .server import StubAPIServer
+
+
+class PageCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.cards = make_catalog(30)
+
+    def fetch(self, server, ttl):
+        fetcher = PageFetcher(server.url, per_page=10, cache=PageCache(self.tmpdir, ttl=ttl))
+        try:
+            pages = list(fetcher.iter_pages())
+        finally:
+            fetcher.close()
+        return fetcher, pages
+
+    def test_fresh_pages_are_not_requested(self):
+        with StubAPIServer(self.cards, etags=True) as server:
+            self.fetch(server, ttl=60)
+            with ImportReport() as report:
+                fetcher, pages = self.fetch(server, ttl=60)
+
+        self.assertEqual(sorted(server.requests), [1, 2, 3])
+        self.assertEqual([card for page in pages for card in page['data']], self.cards)
+        self.assertEqual(fetcher.not_modified, {1, 2, 3})
+        self.assertEqual(report.http['cached'], 3)
+        self.assertEqual(report.http['requests'], 0)
+
+    def test_stale_pages_are_revalidated(self):
+        with StubAPIServer(self.cards, etags=True) as server:
+            self.fetch(server, ttl=0)
+            with ImportReport() as report:
+                fetcher, pages = self.fetch(server, ttl=0)
+
+        self.assertEqual(sorted(server.requests), [1, 1, 2, 2, 3, 3])
+        self.assertEqual(server.not_modified, 3)
+        self.assertEqual([card for page in pages for card in page['data']], self.cards)
+        self.assertTrue(all(page['not_modified'] for page in pages))
+        self.assertEqual(report.http['not_modified'], 3)
+        self.assertEqual(report.http['errors'], 0)
+
+    def test_changed_pages_are_refetched(self):
+        with StubAPIServer(self.cards, etags=True) as server:
+            self.fetch(server, ttl=0)
+            server.cards = self.cards[:10] + [dict(card, text='Changed.') for card in self.cards[10:]]
+            fetcher, pages = self.fetch(server, ttl=0)
+            self.assertEqual(fetcher.not_modified, {1})
+            self.assertEqual([card for page in pages for card in page['data']], server.cards)
+            self.assertNotIn('not_modified', pages[1])
+            # The refetched pages replace the cached ones.
+            fetcher, pages = self.fetch(server, ttl=60)
+        self.assertEqual([card for page in pages for card in page['data']], server.cards)
+
+    def test_responses_without_validators_expire(self):
+        with StubAPIServer(self.cards) as server:
+            self.fetch(server, ttl=0)
+            fetcher, pages = self.fetch(server, ttl=0)
+
+        self.assertEqual(len(server.requests), 6)
+        self.assertEqual(fetcher.not_modified, set())
+
+    def test_settings(self):
+        with StubAPIServer(self.cards, etags=True) as server:
+            with override_settings(FAB_CARDS_HTTP_CACHE_DIR=self.tmpdir, FAB_CARDS_HTTP_CACHE_TTL=60):
+                fetch_data(server.url, per_page=10)
+                fetched = fetch_data(server.url, per_page=10)
+                uncached = fetch_data(server.url, per_page=10, cache=False)
+            fetch_data(server.url, per_page=10)
+
+        self.assertEqual(fetched, self.cards)
+        self.assertEqual(uncached, self.cards)
+        self.assertEqual(len(server.requests), 9)
+        self.assertEqual(len(os.listdir(self.tmpdir)), 3)
+
+    def test_unreadable_entries_are_ignored(self):
+        cache = PageCache(self.tmpdir)
+        with open(cache.path('http://example.com', {'page': 1}), 'w') as f:
+            f.write('{')
+        self.assertIsNone(cache.get('http://example.com', {'page': 1}))
@@ -0,0 +1,159 @@
+import copy
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from fab_cards.models import Card, Printing
+from fab_cards.utils import import_cards as importer
+from fab_cards.utils.http_cache import PageCache
+from fab_cards.utils.import_cards import card_fingerprint, fetch_data, import_cards, iter_data, parse_data
+
+from .catalog import make_catalog
+from .server import StubAPIServer
+
+
+class ChangedOnlyImportTests(TestCase):
+
+    def setUp(self):
+        self.cards = make_catalog(40)
+
+    def test_fingerprints_are_stored(self):
+        parse_data(self.cards)
+        card = Card.objects.get(identifier=self.cards[0]['identifier'])
+        self.assertEqual(card.fingerprint, card_fingerprint(self.cards[0]))
+        self.assertFalse(Printing.objects.filter(fingerprint='').exists())
+
+    def test_fingerprints_match_between_write_paths(self):
+        parse_data(self.cards)
+        per_row = sorted(Printing.objects.values_list('sku', 'fingerprint', 'card__fingerprint'))
+        Card.objects.all().delete()
+
+        parse_data(self.cards, bulk=True)
+        self.assertEqual(sorted(Printing.objects.values_list('sku', 'fingerprint', 'card__fingerprint')), per_row)
+
+    def test_noop_sync_does_not_write(self):
+        parse_data(self.cards, bulk=True)
+
+        # The stale-card scan and the stored fingerprints; nothing is written.
+        with self.assertNumQueries(2):
+            stats = parse_data(self.cards, bulk=True, changed_only=True)
+        self.assertEqual(+stats['Card'], {'unchanged': 40})
+        self.assertEqual(+stats['Printing'], {'unchanged': 40})
+
+        # The per-row path also loads the sets up front.
+        with self.assertNumQueries(3):
+            parse_data(self.cards, changed_only=True)
+
+    def test_only_changed_records_are_written(self):
+        parse_data(self.cards, bulk=True)
+        changed = copy.deepcopy(self.cards)
+        changed[3]['text'] = 'Errata.'
+        changed[7]['printings'][0]['image'] = 'https://example.com/new.png'
+
+        stats = parse_data(changed, bulk=True, changed_only=True)
+        self.assertEqual(+stats['Card'], {'updated': 2, 'unchanged': 38})
+        self.assertEqual(+stats['Printing'], {'updated': 1, 'unchanged': 39})
+        self.assertEqual(Card.objects.get(identifier=changed[3]['identifier']).text, 'Errata.')
+        self.assertEqual(Card.objects.get(identifier=changed[7]['identifier']).fingerprint,
+                         card_fingerprint(changed[7]))
+
+        stats = parse_data(changed, changed_only=True)
+        self.assertEqual(+stats['Card'], {'unchanged': 40})
+
+    def test_management_command(self):
+        parse_data(self.cards, bulk=True)
+        out = StringIO()
+        with mock.patch('fab_cards.utils.import_cards.fetch_data', return_value=self.cards):
+            call_command('import_fab_cards', '--changed-only', stdout=out)
+        self.assertIn("Cards: 0 inserted, 0 updated, 40 unchanged.", out.getvalue())
+
+
+class NotModifiedImportTests(TestCase):
+
+    def setUp(self):
+        self.cards = make_catalog(30)
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.server = StubAPIServer(self.cards, etags=True)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        settings = override_settings(FAB_CARDS_HTTP_CACHE_DIR=self.tmpdir, FAB_CARDS_HTTP_CACHE_TTL=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def iter_data(self, unchanged=None):
+        return iter_data(self.server.url, unchanged, per_page=10)
+
+    def import_cards(self, **kwargs):
+        # As if the server were the FABDB API.
+        with mock.patch.object(importer, 'iter_data', self.iter_data), \
+                mock.patch.object(importer, 'fetch_data', lambda **kwargs: list(self.iter_data(**kwargs))), \
+                mock.patch.object(importer, 'card_fingerprint', wraps=importer.card_fingerprint) as fingerprint, \
+                self.captureOnCommitCallbacks(execute=True):
+            stats = import_cards(bulk=True, **kwargs)
+        return stats, fingerprint.call_count
+
+    def test_fetch_data_reports_unchanged_pages(self):
+        fetch_data(self.server.url, per_page=10)
+        changed = [dict(card, text='Changed.') for card in self.cards[10:20]]
+        self.server.cards = self.cards[:10] + changed + self.cards[20:]
+        unchanged = set()
+        fetch_data(self.server.url, unchanged, per_page=10)
+        self.assertEqual(unchanged, {card['identifier'] for card in self.cards[:10] + self.cards[20:]})
+
+    def test_unchanged_pages_are_not_fingerprinted(self):
+        for options in ({'changed_only': True}, {'staged': True}, {'changed_only': True, 'stream': True}):
+            Card.objects.all().delete()
+            self.server.cards = self.cards
+            self.import_cards(**options)
+            self.assertTrue(PageCache(self.tmpdir).is_imported())
+
+            stats, fingerprinted = self.import_cards(**options)
+            self.assertEqual(fingerprinted, 0)
+            self.assertEqual(+stats['Card'], {'unchanged': 30})
+
+            self.server.cards = self.cards[:10] + [dict(card, text='Changed.') for card in self.cards[10:]]
+            stats, fingerprinted = self.import_cards(**options)
+            self.assertEqual(+stats['Card'], {'updated': 20, 'unchanged': 10})
+            self.assertEqual(Card.objects.filter(text='Changed.').count(), 20)
+
+    def test_duplicates_on_changed_pages_are_fingerprinted(self):
+        for options in ({'changed_only': True}, {'staged': True}, {'changed_only': True, 'stream': True}):
+            Card.objects.all().delete()
+            # The card on the first page is served again on the third, and its later copy wins.
+            later = dict(copy.deepcopy(self.cards[5]), text='Later copy v1.')
+            self.server.cards = self.cards[:25] + [later] + self.cards[25:]
+            self.import_cards(**options)
+
+            self.server.cards = self.cards[:25] + [dict(later, text='Later copy v2.')] + self.cards[25:]
+            stats, _ = self.import_cards(**options)
+            self.assertEqual(+stats['Card'], {'updated': 1, 'unchanged': 29})
+            self.assertEqual(Card.objects.get(identifier=later['identifier']).text, 'Later copy v2.')
+
+    def test_pages_fetched_outside_an_import_are_fingerprinted(self):
+        self.import_cards(changed_only=True)
+        self.server.cards = [dict(card, text='Changed.') for card in self.cards]
+        # The cache now holds pages that were never imported.
+        fetch_data(self.server.url, per_page=10)
+        self.assertFalse(PageCache(self.tmpdir).is_imported())
+
+        stats, fingerprinted = self.import_cards(changed_only=True)
+        # Every record is fingerprinted to be compared, and again to be written.
+        self.assertEqual(fingerprinted, 60)
+        self.assertEqual(+stats['Card'], {'updated': 30})
+
+    def test_failed_imports_are_not_trusted(self):
+        self.import_cards(changed_only=True)
+        self.server.cards = [dict(card, text='Changed.') for card in self.cards]
+        with mock.patch.object(importer, 'bulk_write', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.import_cards(changed_only=True)
+
+        stats, fingerprinted = self.import_cards(changed_only=True)
+        # Every record is fingerprinted to be compared, and again to be written.
+        self.assertEqual(fingerprinted, 60)
+        self.assertEqual(+stats['Card'], {'updated': 30})
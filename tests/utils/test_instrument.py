@@ -0,0 +1,99 @@
+import json
+import os
+import pstats
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from fab_cards.signals import import_finished, import_started
+from fab_cards.utils.import_cards import fetch_data, import_cards, write_snapshot
+from fab_cards.utils.instrument import ImportReport, active_report, phase, timed
+
+from .catalog import make_catalog
+from .server import StubAPIServer
+
+
+class ImportReportTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'cards.zip')
+        write_snapshot(make_catalog(30), self.path)
+
+    def test_phases_and_rows(self):
+        with ImportReport() as report:
+            import_cards(bulk=True, path=self.path)
+        self.assertIsNone(active_report())
+
+        result = report.as_dict()
+        self.assertEqual(list(result['phases']), ['fetch', 'normalize', 'prune', 'write', 'finish'])
+        self.assertEqual(result['rows']['Card']['inserted'], 30)
+        self.assertEqual(result['rows']['Printing']['inserted'], 30)
+        # Only the savepoint around the import falls outside every phase.
+        self.assertEqual(sum(values['queries'] for values in result['phases'].values()), result['queries'] - 2)
+        self.assertEqual(result['phases']['fetch']['queries'], 0)
+        self.assertGreater(result['phases']['write']['queries'], 0)
+        self.assertLessEqual(sum(values['seconds'] for values in result['phases'].values()), result['seconds'])
+        json.loads(report.to_json())
+
+    def test_stream_phases(self):
+        with ImportReport() as report:
+            import_cards(stream=True, batch_size=10, path=self.path)
+        self.assertEqual(set(report.phases), {'fetch', 'normalize', 'write', 'prune', 'finish'})
+        self.assertEqual(report.stats['Card']['inserted'], 30)
+
+    def test_nested_phases_are_exclusive(self):
+        with ImportReport() as report:
+            with phase('outer'):
+                for _ in timed(iter(range(3)), 'inner'):
+                    pass
+        self.assertEqual(set(report.phases), {'outer', 'inner'})
+        self.assertLessEqual(report.phases['outer']['seconds'] + report.phases['inner']['seconds'],
+                             report.seconds)
+
+    def test_http(self):
+        with StubAPIServer(make_catalog(30), failures={2: 1}) as server:
+            with ImportReport() as report:
+                fetch_data(server.url, per_page=10, backoff=0)
+        self.assertEqual(report.http['requests'], 4)
+        self.assertEqual(report.http['errors'], 1)
+        self.assertGreater(report.http['bytes'], 0)
+        self.assertEqual(sum(report.http['latency'].values()), 4)
+
+    def test_signals(self):
+        received = []
+
+        def receiver(signal, sender, report, **kwargs):
+            received.append((signal, report))
+
+        import_started.connect(receiver)
+        import_finished.connect(receiver)
+        self.addCleanup(import_started.disconnect, receiver)
+        self.addCleanup(import_finished.disconnect, receiver)
+        with ImportReport() as report:
+            import_cards(path=self.path)
+        self.assertEqual(received, [(import_started, report), (import_finished, report)])
+
+    def test_one_active_report(self):
+        with ImportReport():
+            with self.assertRaises(RuntimeError):
+                ImportReport().__enter__()
+
+    def test_command_report_and_profile(self):
+        report_path = os.path.join(self.tmpdir, 'report.json')
+        profile_path = os.path.join(self.tmpdir, 'import.prof')
+        call_command('import_fab_cards', '--bulk', '--from-file', self.path, '--report', report_path,
+                     '--profile', profile_path, stdout=StringIO())
+        with open(report_path) as f:
+            result = json.load(f)
+        self.assertEqual(result['rows']['Card']['inserted'], 30)
+        self.assertIn('write', result['phases'])
+        self.assertTrue(pstats.Stats(profile_path).total_calls)
+
+        out = StringIO()
+        call_command('import_fab_cards', '--bulk', '--from-file', self.path, '--report', '-', stdout=out)
+        self.assertIn('"unchanged": 30', out.getvalue())
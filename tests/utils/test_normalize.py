@@ -0,0 +1,60 @@
+from django.test import SimpleTestCase
+
+from fab_cards.utils.normalize import CatalogNormalizer, normalize_catalog
+
+from .catalog import make_card, make_catalog
+
+
+class NormalizeCatalogTests(SimpleTestCase):
+
+    def identifiers(self, catalog):
+        return [card_data['identifier'] for card_data in catalog.records]
+
+    def test_plain_identifier_is_shadowed_by_pitch_variants(self):
+        catalog = normalize_catalog([
+            make_card('snatch', name='Snatch'),
+            make_card('snatch-red', name='Snatch'),
+            make_card('snatch-yellow', name=' snatch '),
+            make_card('dawnblade', name='Dawnblade'),
+        ])
+        self.assertEqual(self.identifiers(catalog), ['snatch-red', 'snatch-yellow', 'dawnblade'])
+        self.assertEqual(catalog.identifiers, {'snatch-red', 'snatch-yellow', 'dawnblade'})
+        self.assertIn('snatch', catalog.dropped)
+
+    def test_blacklist(self):
+        catalog = normalize_catalog([
+            make_card('crazy-brew'),
+            make_card('crazy-brew-blue', name='Crazy Brew'),
+            make_card('flock-of-the-featherwalkers-red'),
+        ])
+        self.assertEqual(self.identifiers(catalog), ['crazy-brew'])
+        self.assertEqual(catalog.identifiers, {'crazy-brew'})
+        self.assertTrue({'crazy-brew-blue', 'flock-of-the-featherwalkers-red'} <= catalog.dropped)
+
+    def test_custom_blacklist(self):
+        catalog = normalize_catalog([make_card('crazy-brew-blue'), make_card('enlightened-strike')],
+                                    blacklist={'enlightened-strike'})
+        self.assertEqual(self.identifiers(catalog), ['crazy-brew-blue'])
+        self.assertEqual(catalog.dropped, {'enlightened-strike'})
+
+    def test_later_records_win(self):
+        catalog = normalize_catalog([
+            make_card('head-jab-red', text='Old'),
+            make_card('dawnblade'),
+            make_card('head-jab-red', text='New'),
+        ])
+        self.assertEqual(self.identifiers(catalog), ['head-jab-red', 'dawnblade'])
+        self.assertEqual(catalog.records[0]['text'], 'New')
+
+    def test_synthetic_catalog(self):
+        cards = make_catalog(1000)
+        catalog = normalize_catalog(cards)
+        self.assertEqual(len(catalog.records), 1000)
+        self.assertEqual(catalog.identifiers, {card_data['identifier'] for card_data in cards})
+
+    def test_feed_is_lazy(self):
+        normalizer = CatalogNormalizer()
+        stream = normalizer.feed(iter([make_card('snatch'), make_card('snatch-red', name='Snatch')]))
+        self.assertEqual(normalizer.identifiers(), set())
+        self.assertEqual([card_data['identifier'] for card_data in stream], ['snatch', 'snatch-red'])
+        self.assertEqual(normalizer.identifiers(), {'snatch-red'})
@@ -0,0 +1,69 @@
+import random
+
+from django.test import TestCase
+
+from fab_cards.models import Card, Printing, Set
+from fab_cards.utils.packs import PackGenerator
+
+TEMPLATE = ['C'] * 11 + [{'R': 6, 'S': 3, 'M': 1}, 'T']
+
+
+class PackGeneratorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        card = Card.objects.create(identifier='snatch-red', name='Snatch')
+        wtr = Set.objects.create(name='Welcome to Rathe', code='WTR')
+        arc = Set.objects.create(name='Arcane Rising', code='ARC')
+        rarities = ['C'] * 60 + ['R'] * 20 + ['S'] * 10 + ['M'] * 5 + ['T'] * 3
+        printings = [Printing(card=card, set=wtr, sku='WTR{}'.format(i), rarity=rarity)
+                     for i, rarity in enumerate(rarities)]
+        printings.extend(Printing(card=card, set=arc, sku='ARC{}'.format(i), rarity='C') for i in range(20))
+        Printing.objects.bulk_create(printings)
+        cls.rarity = dict(Printing.objects.values_list('id', 'rarity'))
+        cls.wtr_ids = set(Printing.objects.filter(set=wtr).values_list('id', flat=True))
+
+    def test_pack_follows_template(self):
+        generator = PackGenerator('WTR', TEMPLATE, rng=random.Random(0))
+        for pack in generator.generate_many(50):
+            self.assertEqual(len(pack), 13)
+            self.assertTrue(set(pack) <= self.wtr_ids)
+            self.assertEqual([self.rarity[pk] for pk in pack[:11]], ['C'] * 11)
+            self.assertEqual(len(set(pack[:11])), 11)
+            self.assertIn(self.rarity[pack[11]], ('R', 'S', 'M'))
+            self.assertEqual(self.rarity[pack[12]], 'T')
+
+    def test_no_queries_per_pack(self):
+        generator = PackGenerator('wtr', TEMPLATE, rng=random.Random(0))
+        with self.assertNumQueries(0):
+            draft = generator.generate_draft(8, 3)
+        self.assertEqual([len(player) for player in draft], [3] * 8)
+
+    def test_seeded_rng_is_reproducible(self):
+        first = PackGenerator('WTR', TEMPLATE, rng=random.Random(5)).generate_draft(8, 3)
+        second = PackGenerator('WTR', TEMPLATE, rng=random.Random(5)).generate_draft(8, 3)
+        self.assertEqual(first, second)
+
+    def test_small_pool_repeats(self):
+        pack = PackGenerator('WTR', ['T'] * 5, rng=random.Random(0)).generate()
+        self.assertEqual(len(pack), 5)
+
+    def test_missing_rarity(self):
+        with self.assertRaises(ValueError):
+            PackGenerator('ARC', TEMPLATE)
+        generator = PackGenerator('ARC', ['C', {'C': 1, 'L': 5}], rng=random.Random(0))
+        self.assertEqual(len(generator.generate()), 2)
+
+    def test_printings(self):
+        packs = PackGenerator('WTR', TEMPLATE, rng=random.Random(0)).generate_many(2)
+        with self.assertNumQueries(1):
+            printings = PackGenerator.printings(packs)
+            self.assertEqual(printings[packs[0][0]].set.code, 'WTR')
+
+    def test_generate_many(self):
+        # Timed by the `packs` scenario of `benchmarks.suite`.
+        generator = PackGenerator('WTR', TEMPLATE, rng=random.Random(0))
+        with self.assertNumQueries(0):
+            packs = generator.generate_many(2000)
+        self.assertEqual(len(packs), 2000)
+        self.assertTrue(all(len(pack) == 13 for pack in packs))
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from fab_cards.models import Card, CardSearchEntry, Printing
+from fab_cards.utils.import_cards import parse_data, prune_cards
+from fab_cards.utils.search import rebuild_search_index, search_backend
+
+from .catalog import make_card, make_catalog, make_printing
+
+
+class PruneCardsTests(TestCase):
+
+    def setUp(self):
+        parse_data(make_catalog(30), bulk=True)
+        # Whether there is a search index to prune is only looked up once.
+        search_backend('default')
+
+    def test_prune(self):
+        keep = set(Card.objects.values_list('identifier', flat=True)[:10])
+        cards_deleted, printings_deleted = prune_cards(keep)
+
+        self.assertEqual((cards_deleted, printings_deleted), (20, 20))
+        self.assertEqual(set(Card.objects.values_list('identifier', flat=True)), keep)
+        self.assertEqual(Printing.objects.count(), 10)
+
+    def test_stale_cards_are_not_loaded(self):
+        keep = set(Card.objects.values_list('identifier', flat=True)[:10])
+        # One scan of identifiers, then one keyword, printing, search entry and card delete per batch.
+        with mock.patch.object(Card, 'from_db', wraps=Card.from_db) as from_db, self.assertNumQueries(9):
+            prune_cards(keep, batch_size=10)
+        self.assertEqual(from_db.call_count, 0)
+        self.assertEqual(Card.objects.count(), 10)
+
+    def test_search_entries_are_pruned(self):
+        rebuild_search_index()
+        keep = set(Card.objects.values_list('identifier', flat=True)[:10])
+        prune_cards(keep)
+        self.assertEqual(set(CardSearchEntry.objects.values_list('card_id', flat=True)),
+                         set(Card.objects.values_list('id', flat=True)))
+
+    def test_nothing_stale(self):
+        keep = set(Card.objects.values_list('identifier', flat=True))
+        with self.assertNumQueries(1):
+            self.assertEqual(prune_cards(keep), (0, 0))
+
+    def test_parse_data_reports_deletions(self):
+        cards = make_catalog(30)[5:]
+        cards.append(make_card('snatch', printings=[make_printing('SNATCH1'), make_printing('SNATCH2')]))
+        parse_data(cards)
+
+        stats = parse_data(cards[:-1] + [make_card('snatch-red', name='Snatch')], bulk=True)
+        self.assertEqual(stats['Card']['deleted'], 1)
+        self.assertEqual(stats['Printing']['deleted'], 2)
+        self.assertFalse(Card.objects.filter(identifier='snatch').exists())
@@ -0,0 +1,49 @@
+import random
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from fab_cards.utils.random import WeightedSampler, weighted_choice
+
+
+class WeightedSamplerTests(SimpleTestCase):
+
+    WEIGHTS = {'C': 70, 'R': 20, 'S': 7, 'M': 3, 'F': 0}
+
+    def test_draw_distribution(self):
+        sampler = WeightedSampler(self.WEIGHTS, rng=random.Random(0))
+        counts = Counter(sampler.draw() for _ in range(100000))
+        self.assertNotIn('F', counts)
+        for bucket, weight in self.WEIGHTS.items():
+            self.assertAlmostEqual(counts[bucket] / 100000.0, weight / 100.0, delta=0.01)
+
+    def test_seeded_draws_are_reproducible(self):
+        first = WeightedSampler(self.WEIGHTS, rng=random.Random(42)).sample(50)
+        second = WeightedSampler(self.WEIGHTS, rng=random.Random(42)).sample(50)
+        self.assertEqual(first, second)
+
+    def test_sample_with_replacement(self):
+        sample = WeightedSampler({'C': 1}).sample(5)
+        self.assertEqual(sample, ['C'] * 5)
+
+    def test_sample_without_replacement(self):
+        sampler = WeightedSampler(self.WEIGHTS, rng=random.Random(1))
+        for _ in range(100):
+            sample = sampler.sample(3, replace=False)
+            self.assertEqual(len(set(sample)), 3)
+            self.assertNotIn('F', sample)
+        with self.assertRaises(ValueError):
+            sampler.sample(5, replace=False)
+
+    def test_sample_without_replacement_is_weighted(self):
+        sampler = WeightedSampler({'heavy': 99, 'light': 1, 'other': 1}, rng=random.Random(2))
+        firsts = Counter(sampler.sample(1, replace=False)[0] for _ in range(2000))
+        self.assertGreater(firsts['heavy'], 1900)
+
+    def test_no_positive_weights(self):
+        with self.assertRaises(ValueError):
+            WeightedSampler({'C': 0})
+
+    def test_weighted_choice(self):
+        self.assertEqual(weighted_choice({'C': 0, 'R': 5}), 'R')
+        self.assertIn(weighted_choice(self.WEIGHTS, rng=random.Random(3)), self.WEIGHTS)
@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from fab_cards.models import Card, Printing
+from fab_cards.utils.import_cards import (SNAPSHOT_MANIFEST, SnapshotWriter, read_file, read_snapshot,
+                                          write_snapshot)
+
+from .catalog import make_catalog
+
+
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'cards.zip')
+
+    def test_round_trip(self):
+        cards = make_catalog(300)
+        self.assertEqual(write_snapshot(cards, self.path), 300)
+        self.assertEqual(list(read_snapshot(self.path)), cards)
+        self.assertEqual(list(read_file(self.path)), cards)
+
+        with zipfile.ZipFile(self.path) as zip_file:
+            manifest = json.loads(zip_file.read(SNAPSHOT_MANIFEST).decode('utf-8'))
+        self.assertEqual(manifest['version'], 1)
+        self.assertEqual(manifest['cards'], 300)
+
+    def test_snapshot_is_compressed(self):
+        cards = make_catalog(300)
+        write_snapshot(cards, self.path)
+        raw = sum(len(json.dumps(card_data)) for card_data in cards)
+        self.assertLess(os.path.getsize(self.path), raw / 4)
+
+    def test_failed_write_leaves_nothing_behind(self):
+        with self.assertRaises(RuntimeError):
+            with SnapshotWriter(self.path) as writer:
+                writer.write(make_catalog(1)[0])
+                raise RuntimeError
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_unknown_version(self):
+        with zipfile.ZipFile(self.path, 'w') as zip_file:
+            zip_file.writestr(SNAPSHOT_MANIFEST, json.dumps({'format': 'fab-cards-snapshot', 'version': 99}))
+        with self.assertRaises(ValueError):
+            list(read_snapshot(self.path))
+
+    def test_save_and_import_snapshot(self):
+        cards = make_catalog(20)
+        with mock.patch('fab_cards.utils.import_cards.fetch_data', return_value=cards):
+            call_command('import_fab_cards', '--bulk', '--save-snapshot', self.path, stdout=StringIO())
+        Card.objects.all().delete()
+
+        call_command('import_fab_cards', '--stream', '--from-file', self.path, stdout=StringIO())
+        self.assertEqual(Card.objects.count(), 20)
+        self.assertEqual(Printing.objects.count(), 20)
+
+    def test_stream_saves_snapshot(self):
+        source = os.path.join(self.tmpdir, 'source.zip')
+        write_snapshot(make_catalog(20), source)
+        call_command('import_fab_cards', '--stream', '--from-file', source, '--save-snapshot', self.path,
+                     stdout=StringIO())
+        self.assertEqual(list(read_snapshot(self.path)), list(read_snapshot(source)))
@@ -0,0 +1,101 @@
+import copy
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from fab_cards.models import Card, CardKeyword, Printing, StagedCard
+from fab_cards.utils import import_cards as importer
+from fab_cards.utils.import_cards import import_cards, parse_data, staged_import, write_snapshot
+
+from .catalog import make_catalog
+
+
+class StagedImportTests(TestCase):
+
+    def setUp(self):
+        self.cards = make_catalog(40)
+
+    def test_cold_import(self):
+        stats = staged_import(self.cards, batch_size=15)
+        self.assertEqual(+stats['Card'], {'inserted': 40})
+        self.assertEqual(+stats['Printing'], {'inserted': 40})
+        self.assertEqual(Card.objects.count(), 40)
+        self.assertTrue(CardKeyword.objects.exists())
+        self.assertFalse(StagedCard.objects.exists())
+
+    def rows(self):
+        return [dict(values, id=None) for values in Card.objects.order_by('identifier').values()]
+
+    def test_matches_parse_data(self):
+        staged_import(self.cards)
+        staged = self.rows()
+        Card.objects.all().delete()
+        parse_data(self.cards, bulk=True)
+        self.assertEqual(staged, self.rows())
+
+    def test_only_changes_are_written(self):
+        staged_import(self.cards)
+        cards = copy.deepcopy(self.cards)
+        cards[3]['text'] = 'Changed.'
+        del cards[5]
+
+        with mock.patch.object(importer, 'bulk_write', wraps=importer.bulk_write) as bulk_write:
+            stats = staged_import(cards)
+        self.assertEqual([card['identifier'] for card in bulk_write.call_args[0][0]], [cards[3]['identifier']])
+        self.assertEqual(+stats['Card'], {'unchanged': 38, 'updated': 1, 'deleted': 1})
+        self.assertEqual(Card.objects.get(identifier=cards[3]['identifier']).text, 'Changed.')
+        self.assertEqual(Card.objects.count(), 39)
+
+    def test_search_index_refreshes_changed_cards(self):
+        staged_import(self.cards)
+        cards = copy.deepcopy(self.cards)
+        cards[3]['text'] = 'Changed.'
+        del cards[5]
+
+        ids = {Card.objects.get(identifier=cards[3]['identifier']).id}
+
+        with mock.patch.object(importer, 'update_search_index', wraps=importer.update_search_index) as update:
+            staged_import(cards)
+        self.assertEqual(update.call_args[0][0], ids)
+        self.assertEqual(Card.objects.search('changed').get().identifier, cards[3]['identifier'])
+
+    def test_noop(self):
+        staged_import(self.cards)
+        stats = staged_import(self.cards)
+        self.assertFalse(stats.changed())
+        self.assertEqual(+stats['Printing'], {'unchanged': 40})
+
+    def test_command(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'cards.zip')
+        write_snapshot(self.cards, path)
+        out = StringIO()
+        call_command('import_fab_cards', '--staged', '--from-file', path, stdout=out)
+        self.assertIn("Cards: 40 inserted, 0 updated, 0 unchanged.", out.getvalue())
+
+
+class StagedTransactionTests(TransactionTestCase):
+
+    def test_only_writes_are_in_a_transaction(self):
+        seen = {}
+
+        def record(name, func):
+            def wrapper(*args, **kwargs):
+                seen[name] = connection.in_atomic_block
+                return func(*args, **kwargs)
+            return wrapper
+
+        cards = make_catalog(20)
+        with mock.patch.object(importer, 'fetch_data', record('fetch', lambda: cards)), \
+                mock.patch.object(importer, 'stage_records', record('stage', importer.stage_records)), \
+                mock.patch.object(importer, 'bulk_write', record('write', importer.bulk_write)):
+            import_cards(staged=True)
+        self.assertEqual(seen, {'fetch': False, 'stage': False, 'write': True})
+        self.assertEqual(Printing.objects.count(), 20)
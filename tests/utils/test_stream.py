@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from fab_cards.models import Card, Printing
+from fab_cards.utils.fetch import PageFetcher
+from fab_cards.utils.import_cards import iter_data, parse_data, read_ndjson, stream_data
+
+from .catalog import make_card, make_catalog
+from .server import StubAPIServer
+
+
+def snapshot():
+    return (
+        sorted(Card.objects.values_list('identifier', 'name', 'text', 'fingerprint')),
+        sorted(Printing.objects.values_list('sku', 'card__identifier', 'set__code', 'fingerprint')),
+    )
+
+
+class StreamImportTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def write_ndjson(self, cards):
+        path = os.path.join(self.tmpdir, 'cards.ndjson')
+        with open(path, 'w') as f:
+            for card_data in cards:
+                f.write(json.dumps(card_data) + '\n')
+        return path
+
+    def test_matches_parse_data(self):
+        cards = make_catalog(120)
+        parse_data(cards, bulk=True)
+        expected = snapshot()
+        Card.objects.all().delete()
+
+        stats = stream_data(iter(cards), batch_size=25)
+        self.assertEqual(snapshot(), expected)
+        self.assertEqual(stats['Card']['inserted'], 120)
+
+    def test_late_pitch_variant_prunes_plain_card(self):
+        cards = [make_card('snatch', name='Snatch')] + make_catalog(30) + [make_card('snatch-red', name='Snatch')]
+        stats = stream_data(iter(cards), batch_size=10)
+
+        self.assertFalse(Card.objects.filter(identifier='snatch').exists())
+        self.assertTrue(Card.objects.filter(identifier='snatch-red').exists())
+        self.assertEqual(stats['Card']['deleted'], 1)
+
+    def test_stale_cards_are_pruned(self):
+        parse_data(make_catalog(40), bulk=True)
+        stream_data(iter(make_catalog(30)), batch_size=10)
+        self.assertEqual(Card.objects.count(), 30)
+
+    def test_changed_only(self):
+        cards = make_catalog(30)
+        stream_data(iter(cards))
+        # Per batch of 10, one fingerprint lookup; then the stale-card scan.
+        with self.assertNumQueries(4):
+            stats = stream_data(iter(cards), batch_size=10, changed_only=True)
+        self.assertEqual(+stats['Card'], {'unchanged': 30})
+
+    def test_read_ndjson(self):
+        cards = make_catalog(10)
+        path = self.write_ndjson(cards)
+        self.assertEqual(list(read_ndjson(path)), cards)
+
+    def test_from_file_command(self):
+        path = self.write_ndjson(make_catalog(10))
+        out = StringIO()
+        call_command('import_fab_cards', '--stream', '--from-file', path, stdout=out)
+        self.assertEqual(Card.objects.count(), 10)
+        self.assertIn("Cards: 10 inserted, 0 updated, 0 unchanged.", out.getvalue())
+
+    def test_stream_from_api(self):
+        cards = make_catalog(50)
+        with StubAPIServer(cards) as server:
+            stream_data(iter_data(server.url, per_page=10), batch_size=20)
+        self.assertEqual(Card.objects.count(), 50)
+
+
+class IterPagesTests(TestCase):
+
+    def test_lookahead_is_bounded(self):
+        with StubAPIServer(make_catalog(200)) as server:
+            fetcher = PageFetcher(server.url, per_page=10, workers=2)
+            pages = fetcher.iter_pages()
+            next(pages)
+            next(pages)
+            pages.close()
+            requested = len(server.requests)
+
+        # The first page, then at most 2 * workers pages ahead of the consumer, plus one refill.
+        self.assertLessEqual(requested, 6)